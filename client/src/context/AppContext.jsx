@@ -1,5 +1,5 @@
-import { createContext, useContext, useEffect, useMemo, useState } from "react";
-import { apiFetch } from "../lib/api.js";
+import { createContext, useCallback, useContext, useEffect, useMemo, useRef, useState } from "react";
+import { apiFetch, apiUpload } from "../lib/api.js";
 import { deriveTheme } from "../lib/theme.js";
 
 const AppContext = createContext(null);
@@ -57,12 +57,31 @@ export function AppProvider({ children }) {
 
   const theme = useMemo(() => deriveTheme(summary?.stress_index), [summary]);
 
+  // The series is uploaded once and chats refer to it by id instead of re-sending every row.
+  const uploadRef = useRef({ series: null, id: null });
+  const ensureUploadId = useCallback(
+    async ({ refresh = false } = {}) => {
+      const cached = uploadRef.current;
+      if (!refresh && cached.id && cached.series === series) {
+        return cached.id;
+      }
+      if (!series.length) {
+        return null;
+      }
+      const data = await apiUpload("/upload", "series.json", JSON.stringify(series));
+      uploadRef.current = { series, id: data.upload_id };
+      return data.upload_id;
+    },
+    [series]
+  );
+
   const value = {
     personas,
     currentPersonaId,
     setCurrentPersonaId,
     series,
     setSeries,
+    ensureUploadId,
     summary,
     setSummary,
     loading,
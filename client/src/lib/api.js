@@ -26,5 +26,63 @@ export async function apiFetch(path, options = {}) {
   return response.json();
 }
 
+export async function apiUpload(path, filename, content, type = "application/json") {
+  const form = new FormData();
+  form.append("file", new Blob([content], { type }), filename);
+  const response = await fetch(`${API_BASE_URL}${path}`, { method: "POST", body: form });
+
+  if (!response.ok) {
+    const message = await response.text();
+    throw new Error(message || "Upload failed");
+  }
+
+  return response.json();
+}
+
+export async function apiStream(path, options = {}, onEvent = () => {}) {
+  const response = await fetch(`${API_BASE_URL}${path}`, {
+    headers: {
+      "Content-Type": "application/json",
+      Accept: "text/event-stream",
+      ...(options.headers || {}),
+    },
+    ...options,
+  });
+
+  if (!response.ok || !response.body) {
+    const message = await response.text();
+    throw new Error(message || "Request failed");
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) {
+      break;
+    }
+    buffer += decoder.decode(value, { stream: true });
+    let boundary = buffer.indexOf("\n\n");
+    while (boundary !== -1) {
+      const block = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      let event = "message";
+      let data = "";
+      for (const line of block.split("\n")) {
+        if (line.startsWith("event:")) {
+          event = line.slice(6).trim();
+        } else if (line.startsWith("data:")) {
+          data += line.slice(5).trim();
+        }
+      }
+      if (data) {
+        onEvent(event, JSON.parse(data));
+      }
+      boundary = buffer.indexOf("\n\n");
+    }
+  }
+}
+
 export { API_BASE_URL };
 export { SCRIBE_API_BASE_URL };
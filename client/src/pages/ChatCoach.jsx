@@ -2,10 +2,10 @@ import { useEffect, useRef, useState } from "react";
 import ReactMarkdown from "react-markdown";
 import SectionHeader from "../components/SectionHeader.jsx";
 import { useAppContext } from "../context/AppContext.jsx";
-import { apiFetch, SCRIBE_API_BASE_URL } from "../lib/api.js";
+import { apiStream, SCRIBE_API_BASE_URL } from "../lib/api.js";
 
 function ChatCoach() {
-  const { summary, series, userContext, personas, currentPersonaId, setCurrentPersonaId } =
+  const { summary, ensureUploadId, userContext, personas, currentPersonaId, setCurrentPersonaId } =
     useAppContext();
   const [messages, setMessages] = useState([
     {
@@ -231,24 +231,51 @@ function ChatCoach() {
             plan: activeContext.plan ? JSON.parse(JSON.stringify(activeContext.plan)) : null,
           }
         : null;
-      const response = await apiFetch("/chat", {
-        method: "POST",
-        body: JSON.stringify({
-          metrics: summary || {},
-          user_context: userContext,
-          query: userMessage.content,
-          series,
-          meeting_context: meetingPayload,
-        }),
+      let streamedAnswer = "";
+      let finalResponse = null;
+      const updateStreamingMessage = (message) =>
+        setMessages((prev) => [...prev.filter((item) => !item.streaming), message]);
+      const streamChat = (uploadId) =>
+        apiStream(
+          "/chat/stream",
+          {
+            method: "POST",
+            body: JSON.stringify({
+              metrics: summary || {},
+              user_context: userContext,
+              query: userMessage.content,
+              upload_id: uploadId,
+              meeting_context: meetingPayload,
+            }),
+          },
+          (event, data) => {
+            if (event === "token") {
+              streamedAnswer += data.text || "";
+              setLoading(false);
+              updateStreamingMessage({ role: "assistant", content: streamedAnswer, streaming: true });
+            } else if (event === "final") {
+              finalResponse = data;
+            }
+          }
+        );
+      try {
+        await streamChat(await ensureUploadId());
+      } catch (error) {
+        // Idle uploads expire server-side; upload the series again and retry once.
+        if (!String(error?.message).includes("Upload not found")) {
+          throw error;
+        }
+        await streamChat(await ensureUploadId({ refresh: true }));
+      }
+      const coachContent = buildCoachContent(finalResponse);
+      updateStreamingMessage({
+        role: "assistant",
+        content: coachContent.answer,
+        context: coachContent.context,
       });
-      const coachContent = buildCoachContent(response);
-      setMessages((prev) => [
-        ...prev,
-        { role: "assistant", content: coachContent.answer, context: coachContent.context },
-      ]);
     } catch {
       setMessages((prev) => [
-        ...prev,
+        ...prev.filter((message) => !message.streaming),
         {
           role: "assistant",
           content:
@@ -1,12 +1,23 @@
+import argparse
 import json
+import os
 import random
-from datetime import datetime, timedelta
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
 from pathlib import Path
 
 
 ROOT = Path(__file__).resolve().parent.parent
 DATA_DIR = ROOT / "server" / "data"
 PERSONA_DIR = DATA_DIR / "personas"
+# Fixed so regenerating produces byte-identical files; the committed personas end on this day.
+REFERENCE_DATE = date(2025, 12, 23)
+
+sys.path.insert(0, str(ROOT / "server"))
+
+from colformat import COLUMNAR_SUFFIX, write_columnar  # noqa: E402
+from series import ColumnarSeries  # noqa: E402
 
 
 PERSONAS = [
@@ -53,25 +64,24 @@ def clamp(value, min_value, max_value):
     return max(min_value, min(value, max_value))
 
 
-def generate_series(persona, days=30):
-    random.seed(persona["id"])
-    today = datetime.utcnow().date()
+def generate_series(persona, days=30, reference_date=REFERENCE_DATE, rng=None):
+    rng = rng or random.Random(persona["id"])
     series = []
     for day_offset in range(days):
-        date = today - timedelta(days=(days - day_offset - 1))
-        steps = random.randint(*persona["steps_range"])
-        sleep_hours = round(random.uniform(*persona["sleep_range"]), 2)
-        stress = random.randint(*persona["stress_range"])
-        resting_hr = random.randint(*persona["resting_hr_range"])
-        hrv_rmssd = round(random.uniform(40, 80), 1)
+        day = reference_date - timedelta(days=(days - day_offset - 1))
+        steps = rng.randint(*persona["steps_range"])
+        sleep_hours = round(rng.uniform(*persona["sleep_range"]), 2)
+        stress = rng.randint(*persona["stress_range"])
+        resting_hr = rng.randint(*persona["resting_hr_range"])
+        hrv_rmssd = round(rng.uniform(40, 80), 1)
         calories = int(1800 + steps * 0.05)
-        sleep_eff = round(clamp(random.uniform(0.78, 0.92), 0.7, 0.95), 2)
+        sleep_eff = round(clamp(rng.uniform(0.78, 0.92), 0.7, 0.95), 2)
         active_minutes = int(steps / 120)
-        awakenings = random.randint(1, 4) if "sleep" in persona["id"] else random.randint(0, 2)
+        awakenings = rng.randint(1, 4) if "sleep" in persona["id"] else rng.randint(0, 2)
 
         series.append(
             {
-                "date": date.isoformat(),
+                "date": day.isoformat(),
                 "steps": steps,
                 "sleep_hours": sleep_hours,
                 "stress_index": stress,
@@ -89,32 +99,123 @@ def generate_series(persona, days=30):
     return series
 
 
-def main():
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    PERSONA_DIR.mkdir(parents=True, exist_ok=True)
-
-    personas_index = []
-    for persona in PERSONAS:
-        data = generate_series(persona)
-        persona_payload = {
-            "id": persona["id"],
-            "name": persona["name"],
-            "description": persona["description"],
-            "data": data,
-        }
-        with (PERSONA_DIR / f"{persona['id']}.json").open("w", encoding="utf-8") as f:
-            json.dump(persona_payload, f, indent=2)
-
-        personas_index.append(
-            {
-                "id": persona["id"],
-                "name": persona["name"],
-                "description": persona["description"],
-                "days": len(data),
-            }
-        )
-
-    with (DATA_DIR / "personas.json").open("w", encoding="utf-8") as f:
+def generate_intraday(persona, series, interval_minutes, rng):
+    """Splits each day's steps across intraday buckets and samples a heart rate per bucket."""
+    buckets = (24 * 60) // interval_minutes
+    samples = []
+    for entry in series:
+        start = datetime.fromisoformat(entry["date"])
+        weights = [
+            rng.random() * (0.1 if (idx * interval_minutes) // 60 < 7 else 1.0) for idx in range(buckets)
+        ]
+        total_weight = sum(weights) or 1.0
+        for idx, weight in enumerate(weights):
+            timestamp = start + timedelta(minutes=idx * interval_minutes)
+            awake = 7 <= timestamp.hour < 23
+            samples.append(
+                {
+                    "date": timestamp.isoformat(),
+                    "steps": int(entry["steps"] * weight / total_weight),
+                    "heart_rate": entry["resting_hr"] + (rng.randint(5, 40) if awake else rng.randint(-4, 4)),
+                }
+            )
+    return samples
+
+
+def scaled_personas(count):
+    """The base personas first, then numbered variants with jittered ranges."""
+    personas = list(PERSONAS[:count])
+    for idx in range(len(personas), count):
+        template = PERSONAS[idx % len(PERSONAS)]
+        jitter = random.Random(f"variant:{idx}")
+        persona = dict(template)
+        persona["id"] = f"{template['id']}-{idx:06d}"
+        persona["name"] = f"{template['name']} #{idx}"
+        for key in ("steps_range", "sleep_range", "stress_range", "resting_hr_range"):
+            low, high = template[key]
+            scale = jitter.uniform(0.9, 1.1)
+            persona[key] = (type(low)(low * scale), type(high)(high * scale))
+        personas.append(persona)
+    return personas
+
+
+def write_persona(job):
+    persona, args = job
+    seed = persona["id"] if args.seed is None else f"{args.seed}:{persona['id']}"
+    rng = random.Random(seed)
+    data = generate_series(persona, args.days, args.reference_date, rng)
+    meta = {"id": persona["id"], "name": persona["name"], "description": persona["description"]}
+    persona_dir = args.output_dir / "personas"
+    indent = None if args.compact else 2
+    if args.format in ("json", "both"):
+        with (persona_dir / f"{persona['id']}.json").open("w", encoding="utf-8") as f:
+            json.dump({**meta, "data": data}, f, indent=indent)
+    if args.format in ("columnar", "both"):
+        write_columnar(persona_dir / f"{persona['id']}{COLUMNAR_SUFFIX}", meta, ColumnarSeries.from_rows(data))
+    if args.intraday_minutes:
+        samples = generate_intraday(persona, data, args.intraday_minutes, rng)
+        intraday_id = f"{persona['id']}.intraday"
+        if args.format in ("json", "both"):
+            with (persona_dir / f"{intraday_id}.json").open("w", encoding="utf-8") as f:
+                json.dump({**meta, "interval_minutes": args.intraday_minutes, "data": samples}, f, indent=indent)
+        if args.format in ("columnar", "both"):
+            intraday_meta = {**meta, "interval_minutes": args.intraday_minutes}
+            write_columnar(
+                persona_dir / f"{intraday_id}{COLUMNAR_SUFFIX}", intraday_meta, ColumnarSeries.from_rows(samples)
+            )
+    return {**meta, "days": len(data)}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic wearable persona data.")
+    parser.add_argument(
+        "--format",
+        choices=("json", "columnar", "both"),
+        default="json",
+        help="json writes <id>.json, columnar writes memory-mappable <id>.col files the server prefers.",
+    )
+    parser.add_argument(
+        "--personas",
+        type=int,
+        default=len(PERSONAS),
+        help="Number of personas; beyond the built-in ones, jittered variants are generated.",
+    )
+    parser.add_argument("--days", type=int, default=30, help="Days of history per persona.")
+    parser.add_argument(
+        "--intraday-minutes",
+        type=int,
+        default=0,
+        help="Also write <id>.intraday files sampled at this interval (0 disables).",
+    )
+    parser.add_argument(
+        "--reference-date",
+        type=date.fromisoformat,
+        default=REFERENCE_DATE,
+        help="Last day of every series (YYYY-MM-DD).",
+    )
+    parser.add_argument("--seed", help="Base seed mixed into every per-persona RNG stream.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes.")
+    parser.add_argument("--compact", action="store_true", help="Write JSON without indentation.")
+    parser.add_argument("--output-dir", type=Path, default=DATA_DIR, help="Data root to write into.")
+    args = parser.parse_args(argv)
+    if args.intraday_minutes and (24 * 60) % args.intraday_minutes:
+        parser.error("--intraday-minutes must divide a day evenly.")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    (args.output_dir / "personas").mkdir(parents=True, exist_ok=True)
+
+    jobs = [(persona, args) for persona in scaled_personas(args.personas)]
+    if args.workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            chunksize = max(1, len(jobs) // (args.workers * 4))
+            personas_index = list(executor.map(write_persona, jobs, chunksize=chunksize))
+    else:
+        personas_index = [write_persona(job) for job in jobs]
+
+    with (args.output_dir / "personas.json").open("w", encoding="utf-8") as f:
         json.dump(personas_index, f, indent=2)
 
 
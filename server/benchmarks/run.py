@@ -0,0 +1,243 @@
+"""Microbenchmarks for the summary, upload and prompt hot paths.
+
+Run from server/:
+
+    python -m benchmarks.run                       # all cases, default sizes
+    python -m benchmarks.run --sizes 30,3650 -k stats
+    python -m benchmarks.run --compare benchmarks/results/<older>.json
+
+Results are written to benchmarks/results/<commit>.json.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Callable
+
+import main
+import prompt_example
+from colformat import write_columnar
+from ingest import normalize_upload_data
+from persona_store import PersonaStore
+from series import ColumnarSeries
+from stats import compute_stats
+from summary import SUMMARY_FIELDS, compute_scores, summarize_series
+
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+DEFAULT_SIZES = (30, 365, 1825, 3650)
+
+
+@dataclass
+class Case:
+    name: str
+    days: int
+    func: Callable[[], Any]
+    setup: Callable[[], Any] | None = None
+
+
+def synthetic_series(days: int, seed: int = 0) -> list[dict[str, Any]]:
+    rng = random.Random(seed)
+    start = date(2025, 12, 23) - timedelta(days=days - 1)
+    series = []
+    for offset in range(days):
+        steps = rng.randint(2500, 12000)
+        sleep_hours = round(rng.uniform(4.5, 8.0), 2)
+        series.append(
+            {
+                "date": (start + timedelta(days=offset)).isoformat(),
+                "steps": steps,
+                "sleep_hours": sleep_hours,
+                "stress_index": rng.randint(20, 85),
+                "resting_hr": rng.randint(55, 85),
+                "hrv_rmssd": round(rng.uniform(40, 80), 1),
+                "calories_burned": int(1800 + steps * 0.05),
+                "sleep_efficiency": round(rng.uniform(0.78, 0.92), 2),
+                "active_minutes": int(steps / 120),
+                "awakenings": rng.randint(0, 4),
+                "sleep_stage_rem": round(sleep_hours * 0.25, 2),
+                "sleep_stage_deep": round(sleep_hours * 0.22, 2),
+                "sleep_stage_light": round(sleep_hours * 0.53, 2),
+            }
+        )
+    return series
+
+
+def build_cases(sizes: list[int], data_root: Path) -> list[Case]:
+    persona_dir = data_root / "personas"
+    persona_dir.mkdir(parents=True, exist_ok=True)
+    store = PersonaStore(data_root, max_personas=len(sizes) * 2)
+    main.PERSONA_STORE = store
+    cases = []
+    for days in sizes:
+        series = synthetic_series(days, seed=days)
+        columnar = ColumnarSeries.from_rows(series)
+        summary = summarize_series(series)
+        upload_rows = [{**entry, "steps": str(entry["steps"])} for entry in series]
+        json_id, col_id = f"bench-{days}", f"bench-{days}-col"
+        meta = {"id": json_id, "name": f"Bench {days}", "description": "Synthetic benchmark persona."}
+        (persona_dir / f"{json_id}.json").write_text(json.dumps({**meta, "data": series}, indent=2), encoding="utf-8")
+        write_columnar(persona_dir / f"{col_id}.col", {**meta, "id": col_id}, columnar)
+
+        def clear_all() -> None:
+            store.invalidate()
+            main.SUMMARY_CACHE.clear()
+
+        cases += [
+            Case("stats.compute_stats[rows]", days, lambda s=series: compute_stats(s, SUMMARY_FIELDS)),
+            Case("stats.compute_stats[columnar]", days, lambda s=columnar: compute_stats(s, SUMMARY_FIELDS)),
+            Case("summary.summarize_series", days, lambda s=series: summarize_series(s)),
+            Case("summary.compute_scores", days, lambda s=summary: compute_scores(s)),
+            Case(
+                "main.build_wearables_summary[cold]",
+                days,
+                lambda i=json_id: main.build_wearables_summary(i, 14),
+                setup=clear_all,
+            ),
+            Case(
+                "main.build_wearables_summary[warm]",
+                days,
+                lambda i=json_id: main.build_wearables_summary(i, 14),
+            ),
+            Case("ingest.normalize_upload_data", days, lambda r=upload_rows: normalize_upload_data(r)),
+            Case("main.load_persona_data[json]", days, lambda i=json_id: main.load_persona_data(i), setup=clear_all),
+            Case("main.load_persona_data[columnar]", days, lambda i=col_id: main.load_persona_data(i), setup=clear_all),
+            Case("persona_store.get[columnar]", days, lambda i=col_id: store.get(i), setup=clear_all),
+            Case(
+                "prompt_example.build_prompt_bundle",
+                days,
+                lambda s=summary: prompt_example.build_prompt_bundle(
+                    wearables_summary=s,
+                    coaching_context=prompt_example.COACHING_CONTEXT_JSON,
+                    user_query=prompt_example.USER_QUERY,
+                    response_schema=prompt_example.RESPONSE_SCHEMA,
+                ),
+            ),
+        ]
+    return cases
+
+
+def time_case(case: Case, min_time: float) -> dict[str, Any]:
+    """Best-of-five per-call time, each round sized to run for at least `min_time / 5` seconds."""
+    loops, round_time = 1, min_time / 5
+    while True:
+        elapsed = run_loops(case, loops)
+        if elapsed >= round_time or loops >= 1_000_000:
+            break
+        loops *= 2 if elapsed == 0 else max(2, min(10, int(round_time / elapsed) + 1))
+    best = min([elapsed] + [run_loops(case, loops) for _ in range(4)]) / loops
+
+    if case.setup:
+        case.setup()
+    gc.collect()
+    tracemalloc.start()
+    case.func()
+    allocated, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "name": case.name,
+        "days": case.days,
+        "loops": loops,
+        "seconds_per_call": best,
+        "calls_per_second": 1 / best if best else None,
+        "days_per_second": case.days / best if best else None,
+        "allocated_bytes": allocated,
+        "peak_bytes": peak,
+    }
+
+
+def run_loops(case: Case, loops: int) -> float:
+    elapsed = 0.0
+    for _ in range(loops):
+        if case.setup:
+            case.setup()
+        start = time.perf_counter()
+        case.func()
+        elapsed += time.perf_counter() - start
+    return elapsed
+
+
+def git_revision() -> tuple[str, bool]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = bool(
+            subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True).stdout
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+    return commit, dirty
+
+
+def format_row(result: dict[str, Any], baseline: dict[str, Any] | None) -> str:
+    change = ""
+    if baseline:
+        ratio = result["seconds_per_call"] / baseline["seconds_per_call"]
+        change = f"  x{ratio:5.2f} vs baseline"
+    return (
+        f"{result['name']:<40} {result['days']:>6}d "
+        f"{result['seconds_per_call'] * 1e6:>12.1f} us "
+        f"{result['calls_per_second']:>12.1f}/s "
+        f"peak {result['peak_bytes'] / 1024:>10.1f} KiB{change}"
+    )
+
+
+def main_cli(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="Comma-separated day counts.")
+    parser.add_argument("--min-time", type=float, default=0.5, help="Approximate seconds spent timing each case.")
+    parser.add_argument("-k", dest="keyword", help="Only run cases whose name contains this string.")
+    parser.add_argument("--compare", type=Path, help="Earlier results file to compare against.")
+    parser.add_argument("--output", type=Path, help="Results path (default: benchmarks/results/<commit>.json).")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    baseline = {}
+    if args.compare:
+        previous = json.loads(args.compare.read_text(encoding="utf-8"))
+        baseline = {(item["name"], item["days"]): item for item in previous["results"]}
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for case in build_cases(sizes, Path(tmp)):
+            if args.keyword and args.keyword not in case.name:
+                continue
+            result = time_case(case, args.min_time)
+            results.append(result)
+            print(format_row(result, baseline.get((case.name, case.days))), flush=True)
+
+    commit, dirty = git_revision()
+    output = args.output or RESULTS_DIR / f"{commit}{'-dirty' if dirty else ''}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(
+        json.dumps(
+            {
+                "commit": commit,
+                "dirty": dirty,
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "results": results,
+            },
+            indent=2,
+        ),
+        encoding="utf-8",
+    )
+    print(f"Wrote {output}")
+
+
+if __name__ == "__main__":
+    main_cli()
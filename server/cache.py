@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe bounded LRU map with optional per-entry TTL and hit/miss counters.
+
+    With `max_weight` set, entries are also evicted oldest-first until the summed
+    `weigh(value)` of everything resident fits the budget.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 128,
+        ttl_seconds: float | None = None,
+        name: str = "cache",
+        max_weight: int | None = None,
+        weigh: Callable[[Any], int] | None = None,
+    ):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = ttl_seconds
+        self.name = name
+        self.max_weight = max_weight
+        self.weigh = weigh
+        self.weight = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[Hashable, tuple[Any, float | None, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.peek(key, _MISSING) is not _MISSING
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self._expired(entry):
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self._expired(entry):
+                return default
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: float | None = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        weight = self.weigh(value) if self.weigh is not None else 0
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, expires_at, weight)
+            self.weight += weight
+            while len(self._entries) > self.max_entries or self._over_weight():
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def touch(self, key: Hashable, ttl_seconds: float | None = None) -> bool:
+        """Renews a live entry's TTL and recency without re-weighing it; returns whether it was present."""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self._expired(entry):
+                return False
+            expires_at = time.monotonic() + ttl if ttl is not None else None
+            self._entries[key] = (entry[0], expires_at, entry[2])
+            self._entries.move_to_end(key)
+            return True
+
+    def purge_expired(self) -> int:
+        """Drops every expired entry now instead of waiting for a lookup or eviction to reach it."""
+        with self._lock:
+            doomed = [key for key, entry in self._entries.items() if self._expired(entry)]
+            for key in doomed:
+                self._remove(key)
+            return len(doomed)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._remove(key)
+            return default if entry is None else entry[0]
+
+    def discard_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        with self._lock:
+            doomed = [key for key in self._entries if predicate(key)]
+            for key in doomed:
+                self._remove(key)
+            return len(doomed)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.weight = 0
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        stats = {
+            "name": self.name,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
+        if self.max_weight is not None:
+            stats["weight"] = self.weight
+            stats["max_weight"] = self.max_weight
+        return stats
+
+    def _remove(self, key: Hashable) -> tuple[Any, float | None, int] | None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.weight -= entry[2]
+        return entry
+
+    def _over_weight(self) -> bool:
+        # The newest entry always stays, even when it alone exceeds the budget.
+        return self.max_weight is not None and self.weight > self.max_weight and len(self._entries) > 1
+
+    @staticmethod
+    def _expired(entry: tuple[Any, float | None, int]) -> bool:
+        return entry[1] is not None and entry[1] <= time.monotonic()
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Any
+
+from series import ColumnarSeries
+
+
+MAGIC = b"EVCOL001"
+COLUMNAR_SUFFIX = ".col"
+_PREFIX = struct.Struct("<8sI")
+_ALIGN = 8
+
+
+class ColumnarFormatError(ValueError):
+    pass
+
+
+def write_columnar(path: Path, meta: dict[str, Any], series: ColumnarSeries) -> None:
+    """Writes `series` as `MAGIC | header length | JSON header | float64 little-endian columns`.
+
+    The header carries the metadata, field order, dates, row count, the per-cell kinds
+    of mixed columns (hex, see ColumnarSeries.cell_kinds) and the per-day non-numeric
+    values (ColumnarSeries.extras) when there are any; each column is
+    `rows * 8` bytes, starting on an 8-byte boundary, in header field order.
+    """
+    header = json.dumps(
+        {
+            "rows": len(series),
+            "fields": series.fields,
+            "integer_fields": sorted(series.integer_fields & set(series.fields)),
+            "cell_kinds": {field: kinds.hex() for field, kinds in series.cell_kinds.items()},
+            "dates": series.dates,
+            "extras": series.extras,
+            "meta": meta,
+        },
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+    header += b" " * (-(_PREFIX.size + len(header)) % _ALIGN)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with tmp_path.open("wb") as handle:
+        handle.write(_PREFIX.pack(MAGIC, len(header)))
+        handle.write(header)
+        for column in series.columns.values():
+            values = array("d", column)
+            if sys.byteorder != "little":
+                values.byteswap()
+            handle.write(values.tobytes())
+    # Replacing rather than rewriting keeps pages already mapped by other processes valid.
+    os.replace(tmp_path, path)
+
+
+def read_columnar(path: Path) -> tuple[dict[str, Any], ColumnarSeries]:
+    """Maps a columnar file read-only; the returned columns are zero-copy views of the mapping.
+
+    Any malformed file, including an empty one, raises ColumnarFormatError and leaves nothing mapped.
+    """
+    with Path(path).open("rb") as handle:
+        if os.fstat(handle.fileno()).st_size < _PREFIX.size:  # mmap refuses empty files outright.
+            raise ColumnarFormatError(f"{path} is too short to be a columnar file.")
+        mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    try:
+        magic, header_length = _PREFIX.unpack_from(view)
+        if magic != MAGIC:
+            raise ColumnarFormatError(f"{path} is not a columnar file.")
+        offset = _PREFIX.size + header_length
+        try:
+            header = json.loads(bytes(view[_PREFIX.size : offset]))
+            rows, fields, dates = header["rows"], header["fields"], header["dates"]
+            cell_kinds = {
+                field: bytearray.fromhex(kinds) for field, kinds in (header.get("cell_kinds") or {}).items()
+            }
+            extras = header.get("extras")
+            if extras is not None and (not isinstance(extras, list) or len(extras) != rows):
+                raise ValueError("extras do not match the row count")
+        except (ValueError, KeyError, TypeError, AttributeError) as exc:
+            raise ColumnarFormatError(f"{path} has an unreadable header.") from exc
+        if len(view) < offset + rows * 8 * len(fields):
+            raise ColumnarFormatError(f"{path} is truncated.")
+    except ColumnarFormatError:
+        view.release()
+        mapped.close()
+        raise
+    columns: dict[str, Any] = {}
+    for idx, field in enumerate(fields):
+        start = offset + idx * rows * 8
+        column = view[start : start + rows * 8]
+        if sys.byteorder == "little":
+            columns[field] = column.cast("d")
+        else:
+            columns[field] = array("d", bytes(column))
+            columns[field].byteswap()
+    series = ColumnarSeries(dates, columns, header.get("integer_fields") or (), cell_kinds, extras)
+    return header.get("meta") or {}, series
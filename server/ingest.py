@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import codecs
+import csv
+import json
+import os
+import re
+from typing import Any, AsyncIterator, Iterable
+
+from fastapi import UploadFile
+
+from profiling import traced
+from series import ColumnarSeries
+from stats import StatsAccumulator
+from summary import SUMMARY_FIELDS, summarize_stats
+
+
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(64 * 1024)))
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(50 * 1024 * 1024)))
+UPLOAD_MAX_ROWS = int(os.getenv("UPLOAD_MAX_ROWS", "200000"))
+
+_JSON_DECODER = json.JSONDecoder()
+_WHITESPACE = re.compile(r"\s*")
+
+UPLOAD_FIELDS = [
+    "steps",
+    "sleep_hours",
+    "resting_hr",
+    "hrv_rmssd",
+    "stress_index",
+    "calories_burned",
+    "sleep_efficiency",
+    "active_minutes",
+    "awakenings",
+    "sleep_stage_rem",
+    "sleep_stage_deep",
+    "sleep_stage_light",
+]
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+def normalize_upload_entry(entry: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "date": entry.get("date"),
+        "steps": float(entry.get("steps") or entry.get("average_steps") or 0),
+        "sleep_hours": float(entry.get("sleep_hours") or entry.get("sleep") or 0),
+        "resting_hr": float(entry.get("resting_hr") or entry.get("average_resting_hr") or 0),
+        "hrv_rmssd": float(entry.get("hrv_rmssd") or entry.get("hrv") or 0),
+        "stress_index": float(entry.get("stress_index") or entry.get("stress") or 0),
+        "calories_burned": float(entry.get("calories_burned") or entry.get("calories") or 0),
+        "sleep_efficiency": float(entry.get("sleep_efficiency") or 0),
+        "active_minutes": float(entry.get("active_minutes") or 0),
+        "awakenings": float(entry.get("awakenings") or 0),
+        "sleep_stage_rem": float(entry.get("sleep_stage_rem") or 0),
+        "sleep_stage_deep": float(entry.get("sleep_stage_deep") or 0),
+        "sleep_stage_light": float(entry.get("sleep_stage_light") or 0),
+    }
+
+
+@traced("ingest.normalize_upload_data")
+def normalize_upload_data(raw_data: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    if not isinstance(raw_data, list):
+        return []
+    return [normalize_upload_entry(entry) for entry in raw_data]
+
+
+class UploadIngest:
+    """Normalizes rows as they arrive and keeps running summary statistics.
+
+    Only the normalized values are retained, in a ColumnarSeries; raw text, parsed
+    records and the summary inputs are never materialized as whole-file copies.
+    """
+
+    def __init__(self, max_rows: int | None = None):
+        self.max_rows = UPLOAD_MAX_ROWS if max_rows is None else max_rows
+        self.series = ColumnarSeries.empty(UPLOAD_FIELDS)
+        self.accumulator = StatsAccumulator(SUMMARY_FIELDS)
+
+    def add(self, entry: dict[str, Any]) -> None:
+        if len(self.series) >= self.max_rows:
+            raise UploadTooLarge(f"Upload exceeds the {self.max_rows} row limit.")
+        row = normalize_upload_entry(entry)
+        self.series.append(row)
+        self.accumulator.add(row)
+
+    def extend(self, entries: Iterable[dict[str, Any]]) -> None:
+        for entry in entries:
+            self.add(entry)
+
+    def summary(self) -> dict[str, Any]:
+        return summarize_stats(self.accumulator.stats())
+
+
+async def read_upload_bytes(file: UploadFile, max_bytes: int | None = None) -> AsyncIterator[bytes]:
+    max_bytes = UPLOAD_MAX_BYTES if max_bytes is None else max_bytes
+    total = 0
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_BYTES)
+        if not chunk:
+            return
+        total += len(chunk)
+        if total > max_bytes:
+            raise UploadTooLarge(f"Upload exceeds the {max_bytes} byte limit.")
+        yield chunk
+
+
+async def iter_upload_lines(file: UploadFile, max_bytes: int | None = None) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in read_upload_bytes(file, max_bytes):
+        pending += decoder.decode(chunk)
+        lines = pending.splitlines(keepends=True)
+        pending = lines.pop() if lines and not lines[-1].endswith(("\n", "\r")) else ""
+        for line in lines:
+            yield line
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+async def iter_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[dict[str, Any]]:
+    header: list[str] | None = None
+    record_text = ""
+    async for line in lines:
+        record_text += line
+        if record_text.count('"') % 2:
+            continue  # A quoted field spans a newline; wait for the rest of the record.
+        values = next(csv.reader([record_text]), [])
+        record_text = ""
+        if not values:
+            continue
+        if header is None:
+            header = values
+            continue
+        yield dict(zip(header, values))
+
+
+async def iter_ndjson_records(lines: AsyncIterator[str]) -> AsyncIterator[dict[str, Any]]:
+    async for line in lines:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+async def iter_json_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[Any]:
+    """Yields the records of a JSON document (a list, or an object with a "data" list) one at a time.
+
+    Only the record being decoded is buffered, so the document is never held whole.
+    Anything after the records list is not read.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    text, pos, eof = "", 0, False
+
+    async def more() -> bool:
+        nonlocal text, pos, eof
+        chunk = await anext(chunks, b"")
+        if not chunk:
+            eof = True
+            text += decoder.decode(b"", final=True)
+            return False
+        text, pos = text[pos:] + decoder.decode(chunk), 0
+        return True
+
+    async def peek() -> str:
+        """Skips whitespace and returns the next character, or "" at the end of the document."""
+        nonlocal pos
+        while True:
+            pos = _WHITESPACE.match(text, pos).end()
+            if pos < len(text):
+                return text[pos]
+            if eof or not await more():
+                return ""
+
+    async def value() -> Any:
+        nonlocal pos
+        await peek()
+        while True:
+            try:
+                item, end = _JSON_DECODER.raw_decode(text, pos)
+            except ValueError:
+                if eof:
+                    raise
+            else:
+                # A value ending exactly at the buffer's end may be a number cut by the chunk boundary.
+                if end < len(text) or eof:
+                    pos = end
+                    return item
+            await more()
+
+    async def expect(allowed: str) -> str:
+        nonlocal pos
+        char = await peek()
+        if not char or char not in allowed:
+            raise ValueError(f"Expected one of {allowed!r} in the JSON upload.")
+        pos += 1
+        return char
+
+    if await peek() == "{":
+        pos += 1
+        if await peek() == "}":
+            return
+        while True:
+            key = await value()
+            await expect(":")
+            if key == "data" and await peek() == "[":
+                break
+            await value()
+            if await expect(",}") == "}":
+                return
+    elif await peek() != "[":
+        await value()  # A scalar document holds no records; malformed input still raises.
+        return
+    pos += 1
+    if await peek() == "]":
+        return
+    while True:
+        yield await value()
+        if await expect(",]") == "]":
+            return
+
+
+@traced("ingest.ingest_upload_file")
+async def ingest_upload_file(
+    file: UploadFile, max_rows: int | None = None, max_bytes: int | None = None
+) -> UploadIngest:
+    ingest = UploadIngest(max_rows)
+    filename = (file.filename or "").lower()
+    if filename.endswith(".csv"):
+        async for record in iter_csv_records(iter_upload_lines(file, max_bytes)):
+            ingest.add(record)
+    elif filename.endswith((".ndjson", ".jsonl")):
+        async for record in iter_ndjson_records(iter_upload_lines(file, max_bytes)):
+            ingest.add(record)
+    elif filename.endswith(".json"):
+        async for record in iter_json_records(read_upload_bytes(file, max_bytes)):
+            ingest.add(record)
+    return ingest
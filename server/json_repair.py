@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import copy
+import json
+import re
+from typing import Any
+
+from jsonschema.validators import validator_for
+
+
+MAX_REPAIRS = 100
+# Share of the schema's top-level required fields a payload needs before it is repaired locally.
+MIN_REQUIRED_PRESENT = 0.5
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?")
+
+
+class JSONRepairError(ValueError):
+    pass
+
+
+def extract_json_object(text: str) -> dict[str, Any]:
+    """Parses the first balanced top-level `{...}` object in `text`, ignoring fences and prose around it.
+
+    Only braces outside any other brace group are candidates, so a truncated object
+    raises instead of promoting one of its nested objects.
+    """
+    start = text.find("{")
+    while start != -1:
+        depth, in_string, escaped = 0, False, False
+        for idx in range(start, len(text)):
+            char = text[idx]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif char == "\\":
+                    escaped = True
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char == "{":
+                depth += 1
+            elif char == "}":
+                depth -= 1
+                if depth == 0:
+                    break
+        else:
+            raise JSONRepairError("The JSON object is not closed.")
+        try:
+            value = json.loads(text[start : idx + 1])
+        except ValueError:
+            value = None
+        if isinstance(value, dict):
+            return value
+        start = text.find("{", idx + 1)
+    raise JSONRepairError("No JSON object found.")
+
+
+def schema_types(schema: dict[str, Any]) -> list[str]:
+    types = schema.get("type", [])
+    return [types] if isinstance(types, str) else list(types)
+
+
+def default_for(schema: dict[str, Any]) -> Any:
+    """A placeholder for a missing value: the schema default, or an empty value of its type."""
+    if "default" in schema:
+        return copy.deepcopy(schema["default"])
+    types = schema_types(schema)
+    if "array" in types:
+        return []
+    if "object" in types:
+        properties = schema.get("properties", {})
+        return {name: default_for(properties.get(name, {})) for name in schema.get("required", [])}
+    if "null" in types:
+        return None
+    # Strings are never invented: a missing text would reach the user as a blank.
+    raise JSONRepairError(f"No default for a value of type {types or 'any'}.")
+
+
+def coerce(value: Any, schema: dict[str, Any]) -> Any:
+    for expected in schema_types(schema):
+        if expected == "array":
+            if value is None or value == "":
+                return []
+            if not isinstance(value, (list, dict)):
+                return [value]
+        elif expected == "string":
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                return str(value)
+            if isinstance(value, list) and all(isinstance(item, str) for item in value):
+                return " ".join(item.strip() for item in value)
+        elif expected in ("number", "integer"):
+            if isinstance(value, str) and _NUMBER.fullmatch(value.strip()):
+                number = float(value)
+                if number.is_integer():
+                    return int(number)
+                if expected == "number":
+                    return number
+            if expected == "integer" and isinstance(value, float) and value.is_integer():
+                return int(value)
+        elif expected == "boolean":
+            if isinstance(value, str) and value.strip().lower() in ("true", "false"):
+                return value.strip().lower() == "true"
+        elif expected == "object" and value is None:
+            return default_for(schema)
+        elif expected == "null" and value == "":
+            return None
+    if value is None:
+        return default_for(schema)
+    raise JSONRepairError(f"Cannot coerce {type(value).__name__} to {schema_types(schema)}.")
+
+
+def clamp_enum(value: Any, options: list[Any]) -> Any:
+    """Maps a near miss onto an allowed value: a case/whitespace variant, a single option named in it, or "other"."""
+    if isinstance(value, str):
+        folded = value.strip().casefold()
+        exact = [option for option in options if isinstance(option, str) and option.casefold() == folded]
+        if exact:
+            return exact[0]
+        named = [
+            option
+            for option in options
+            if isinstance(option, str) and re.search(rf"\b{re.escape(option.casefold())}\b", folded)
+        ]
+        if len(named) == 1:
+            return named[0]
+    if "other" in options:
+        return "other"
+    raise JSONRepairError(f"{value!r} is not one of {options}.")
+
+
+def repair_value(payload: dict[str, Any], error: Any) -> None:
+    """Fixes the single violation `error` (a jsonschema ValidationError) in place."""
+    path = list(error.absolute_path)
+    if not path and error.validator not in ("required", "additionalProperties"):
+        raise JSONRepairError(f"Cannot repair the top-level value: {error.message}")
+    parent = payload
+    for key in path[:-1]:
+        parent = parent[key]
+    instance, schema = error.instance, error.schema
+
+    if error.validator == "required":
+        properties = schema.get("properties", {})
+        for name in error.validator_value:
+            if isinstance(instance, dict) and name not in instance:
+                if not path:
+                    check_top_level_default(name, properties.get(name, {}))
+                instance[name] = default_for(properties.get(name, {}))
+        return
+    if error.validator == "additionalProperties" and isinstance(instance, dict):
+        allowed = set(schema.get("properties", {}))
+        for name in [name for name in instance if name not in allowed]:
+            del instance[name]
+        return
+    if error.validator == "maxItems":
+        parent[path[-1]] = instance[: error.validator_value]
+        return
+    if error.validator == "type":
+        if len(path) == 1 and instance in (None, ""):
+            check_top_level_default(path[0], schema)
+        parent[path[-1]] = coerce(instance, schema)
+        return
+    if error.validator == "enum":
+        parent[path[-1]] = clamp_enum(instance, error.validator_value)
+        return
+    raise JSONRepairError(f"No local repair for {error.validator!r}: {error.message}")
+
+
+def check_top_level_default(name: str, schema: dict[str, Any]) -> None:
+    """Refuses to make up a whole top-level array or object unless the schema declares a default for it
+    (as it does for `follow_ups`, which may legitimately be empty)."""
+    types = schema_types(schema)
+    if "default" not in schema and ("array" in types or "object" in types):
+        raise JSONRepairError(f"Required field {name!r} is missing.")
+
+
+def check_recognizable(payload: dict[str, Any], schema: dict[str, Any]) -> None:
+    """Only payloads that are mostly the requested object are repaired; refusals and fragments are not."""
+    properties = schema.get("properties")
+    if properties is not None and not set(payload) & set(properties):
+        raise JSONRepairError("The payload shares no fields with the schema.")
+    required = schema.get("required", [])
+    present = sum(name in payload for name in required)
+    if present < len(required) * MIN_REQUIRED_PRESENT:
+        raise JSONRepairError(f"Only {present} of {len(required)} required fields are present.")
+
+
+def repair_payload(payload: dict[str, Any], schema: dict[str, Any]) -> dict[str, Any]:
+    """Returns a copy of `payload` fixed until it validates against `schema`, or raises JSONRepairError.
+
+    Fixes are driven by the validator's error paths one violation at a time: missing
+    nested fields get defaults, scalars are coerced to the expected type and enum
+    values are clamped onto the allowed options. Payloads missing most required
+    fields, or any required string or top-level array/object, are not repaired.
+    """
+    if not isinstance(payload, dict):
+        raise JSONRepairError("Payload is not a JSON object.")
+    check_recognizable(payload, schema)
+    validator = validator_for(schema)(schema)
+    repaired = copy.deepcopy(payload)
+    for _ in range(MAX_REPAIRS):
+        error = next(iter(validator.iter_errors(repaired)), None)
+        if error is None:
+            return repaired
+        repair_value(repaired, error)
+    raise JSONRepairError("Too many violations to repair locally.")
+
+
+def load_json_object(text: str) -> dict[str, Any]:
+    """Parses model output as a whole document, else as the first balanced object in it."""
+    try:
+        payload = json.loads(text)
+    except ValueError:
+        return extract_json_object(text)
+    if not isinstance(payload, dict):
+        raise JSONRepairError("Payload is not a JSON object.")
+    return payload
+
+
+def repair_json_text(text: str, schema: dict[str, Any]) -> dict[str, Any]:
+    return repair_payload(load_json_object(text), schema)
@@ -1,15 +1,32 @@
 from __future__ import annotations
 
+import hashlib
 import importlib.util
 import sys
 import json
 import os
 import re
+import threading
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, AsyncIterator, Callable
 
+import httpx
 import jsonschema
-from openai import OpenAI
+from openai import NOT_GIVEN, AsyncOpenAI
+
+from llm_cache import llm_cache_from_env
+from json_repair import JSONRepairError, load_json_object, repair_payload
+from metrics import (
+    COACH_FALLBACKS,
+    LOCAL_JSON_REPAIRS,
+    SCHEMA_VALIDATION_FAILURES,
+    observe_stage,
+    record_prompt_tokens,
+    record_token_usage,
+)
+from profiling import traced
+from prompt_packet import compact_json, prompt_token_budget
 
 
 PROMPT_MODULE_PATH = Path(__file__).resolve().parent / "prompt_example.py"
@@ -19,9 +36,73 @@ class PromptModuleError(RuntimeError):
     pass
 
 
-def load_prompt_module():
-    if not PROMPT_MODULE_PATH.exists():
-        raise PromptModuleError("prompt_example not found in repo root.")
+_OPENAI_CLIENT: AsyncOpenAI | None = None
+LLM_CACHE = llm_cache_from_env()
+
+
+def create_openai_client() -> AsyncOpenAI:
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise RuntimeError("OPENAI_API_KEY is not set.")
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=int(os.getenv("OPENAI_MAX_CONNECTIONS", "32")),
+            max_keepalive_connections=int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "16")),
+            keepalive_expiry=float(os.getenv("OPENAI_KEEPALIVE_EXPIRY_SECONDS", "30")),
+        ),
+        timeout=httpx.Timeout(
+            float(os.getenv("OPENAI_TIMEOUT_SECONDS", "60")),
+            connect=float(os.getenv("OPENAI_CONNECT_TIMEOUT_SECONDS", "5")),
+        ),
+    )
+    return AsyncOpenAI(
+        api_key=api_key,
+        http_client=http_client,
+        max_retries=int(os.getenv("OPENAI_MAX_RETRIES", "2")),
+    )
+
+
+def get_openai_client() -> AsyncOpenAI:
+    """Returns the shared client, creating it on first use if startup did not."""
+    global _OPENAI_CLIENT
+    if _OPENAI_CLIENT is None:
+        _OPENAI_CLIENT = create_openai_client()
+    return _OPENAI_CLIENT
+
+
+def set_openai_client(client: AsyncOpenAI | None) -> None:
+    global _OPENAI_CLIENT
+    _OPENAI_CLIENT = client
+
+
+def start_openai_client() -> None:
+    if _OPENAI_CLIENT is None and os.getenv("OPENAI_API_KEY"):
+        set_openai_client(create_openai_client())
+
+
+async def close_openai_client() -> None:
+    client = _OPENAI_CLIENT
+    set_openai_client(None)
+    if client is not None:
+        await client.close()
+
+
+def llm_timeout(name: str, default: str) -> float:
+    return float(os.getenv(name, default))
+
+
+@dataclass
+class PromptAssets:
+    module: Any
+    mtime_ns: int
+    schema_version: str
+
+
+_PROMPT_ASSETS: PromptAssets | None = None
+_PROMPT_LOCK = threading.Lock()
+
+
+def _exec_prompt_module():
     spec = importlib.util.spec_from_file_location("prompt_example", PROMPT_MODULE_PATH)
     if spec is None or spec.loader is None:
         raise PromptModuleError("Unable to load prompt_example module.")
@@ -31,6 +112,36 @@ def load_prompt_module():
     return module
 
 
+def load_prompt_assets() -> PromptAssets:
+    """Returns the cached prompt module, re-executing it only when the file's mtime changes."""
+    global _PROMPT_ASSETS
+    try:
+        mtime_ns = PROMPT_MODULE_PATH.stat().st_mtime_ns
+    except FileNotFoundError:
+        raise PromptModuleError("prompt_example not found in repo root.") from None
+    assets = _PROMPT_ASSETS
+    if assets is not None and assets.mtime_ns == mtime_ns:
+        return assets
+    with _PROMPT_LOCK:
+        assets = _PROMPT_ASSETS
+        if assets is None or assets.mtime_ns != mtime_ns:
+            module = _exec_prompt_module()
+            # The prompt module serializes its schemas once (SCHEMA_JSON); the version hashes that text.
+            schema_text = "\n".join(text for _, text in module.SCHEMA_JSON)
+            schema_version = hashlib.sha256(schema_text.encode("utf-8")).hexdigest()[:16]
+            assets = PromptAssets(module=module, mtime_ns=mtime_ns, schema_version=schema_version)
+            _PROMPT_ASSETS = assets
+    return assets
+
+
+def load_prompt_module():
+    return load_prompt_assets().module
+
+
+def serialized_schema(schema: dict[str, Any]) -> str:
+    return load_prompt_module().schema_json(schema)
+
+
 def strip_code_fences(text: str) -> str:
     return re.sub(r"^\s*```(?:json)?|\s*```$", "", text.strip(), flags=re.I | re.M)
 
@@ -91,142 +202,197 @@ def validate_against_schema(payload: dict[str, Any], schema: dict[str, Any]) ->
     jsonschema.validate(instance=payload, schema=schema)
 
 
+def repair_locally(
+    output: str | dict[str, Any] | None,
+    schema: dict[str, Any],
+    step: str,
+    prepare: Callable[[dict[str, Any]], dict[str, Any]] | None = None,
+) -> dict[str, Any] | None:
+    """Tries the deterministic json_repair fixes on a failed output; None means the fixup LLM is needed."""
+    if output is None:
+        return None
+    try:
+        with observe_stage("local_repair"):
+            payload = load_json_object(output) if isinstance(output, str) else output
+            repaired = repair_payload(prepare(payload) if prepare else payload, schema)
+    except JSONRepairError:
+        return None
+    LOCAL_JSON_REPAIRS.inc(step=step)
+    return repaired
+
+
+@traced("llm.build_prompt_bundle")
 def build_prompt_bundle(
     wearables_summary: dict[str, Any],
     coaching_context: dict[str, Any],
     user_query: str,
     response_schema: dict[str, Any],
+    schema_in_response_format: bool = False,
 ):
     prompt_module = load_prompt_module()
-    return prompt_module.build_prompt_bundle(
+    bundle = prompt_module.build_prompt_bundle(
         wearables_summary=wearables_summary,
         coaching_context=coaching_context,
         user_query=user_query,
         response_schema=response_schema,
+        token_budget=prompt_token_budget(),
+        schema_in_response_format=schema_in_response_format,
     )
+    record_prompt_tokens(bundle)
+    return bundle
 
 
-def call_llm(bundle, model: str) -> str:
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise RuntimeError("OPENAI_API_KEY is not set.")
-    client = OpenAI(api_key=api_key)
+async def call_llm(bundle, model: str, response_format: dict[str, Any] | None = None) -> str:
+    client = get_openai_client()
     max_tokens = int(os.getenv("OPENAI_MAX_TOKENS", "10000"))
-    response = client.chat.completions.create(
+    response = await client.chat.completions.create(
         model=model,
-        messages=[
-            {"role": "system", "content": bundle.system},
-            {"role": "developer", "content": bundle.developer},
-            {"role": "user", "content": bundle.user},
-        ],
+        messages=bundle.messages(),
         temperature=0.6,
         max_tokens=max_tokens,
+        timeout=llm_timeout("OPENAI_TIMEOUT_SECONDS", "60"),
+        response_format=response_format or NOT_GIVEN,
     )
+    record_token_usage(response, "single" if response_format else "analysis")
     return response.choices[0].message.content or ""
 
 
-def call_fixup_llm(
+async def call_fixup_llm(
     bad_payload: dict[str, Any], schema: dict[str, Any], model: str
 ) -> str:
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise RuntimeError("OPENAI_API_KEY is not set.")
-    client = OpenAI(api_key=api_key)
+    client = get_openai_client()
     fix_system = "You fix JSON to match a schema. Return ONLY valid JSON that matches the schema."
     fix_user = "\n\n".join(
         [
             "SCHEMA:",
-            json.dumps(schema, indent=2),
+            serialized_schema(schema),
             "INVALID_JSON:",
-            json.dumps(bad_payload, indent=2),
+            compact_json(bad_payload),
         ]
     )
-    response = client.chat.completions.create(
+    response = await client.chat.completions.create(
         model=model,
         messages=[
             {"role": "system", "content": fix_system},
             {"role": "user", "content": fix_user},
         ],
         temperature=0.2,
+        timeout=llm_timeout("OPENAI_FIXUP_TIMEOUT_SECONDS", "30"),
     )
+    record_token_usage(response, "fixup")
     return response.choices[0].message.content or ""
 
 
-def call_llm_messages(messages: list[dict[str, str]], model: str, temperature: float = 0.4) -> str:
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise RuntimeError("OPENAI_API_KEY is not set.")
-    client = OpenAI(api_key=api_key)
+async def call_llm_messages(messages: list[dict[str, str]], model: str, temperature: float = 0.4) -> str:
+    client = get_openai_client()
     max_tokens = int(os.getenv("OPENAI_MAX_TOKENS", "10000"))
-    response = client.chat.completions.create(
+    response = await client.chat.completions.create(
         model=model,
         messages=messages,
         temperature=temperature,
         max_tokens=max_tokens,
+        timeout=llm_timeout("OPENAI_TIMEOUT_SECONDS", "60"),
     )
+    record_token_usage(response, "coach")
     return response.choices[0].message.content or ""
 
 
-async def generate_coach_response(
-    *,
-    wearables_summary: dict[str, Any],
-    coaching_context: dict[str, Any],
-    user_query: str,
-) -> dict[str, Any]:
-    prompt_module = load_prompt_module()
-    response_schema = prompt_module.RESPONSE_SCHEMA
-    analysis_schema = getattr(prompt_module, "ANALYSIS_SCHEMA", response_schema)
-    model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
-    analysis_bundle = build_prompt_bundle(
-        wearables_summary=wearables_summary,
-        coaching_context=coaching_context,
-        user_query=user_query,
-        response_schema=analysis_schema,
+PIPELINE_MODES = ("two_stage", "single")
+
+
+def coach_pipeline_mode() -> str:
+    """`two_stage` runs analysis then a coach rewrite; `single` asks for the full response in one structured call."""
+    mode = os.getenv("COACH_PIPELINE_MODE", "two_stage").strip().lower()
+    return mode if mode in PIPELINE_MODES else "two_stage"
+
+
+def json_schema_response_format(name: str, schema: dict[str, Any]) -> dict[str, Any]:
+    return {"type": "json_schema", "json_schema": {"name": name, "schema": schema, "strict": False}}
+
+
+def with_pipeline_meta(payload: dict[str, Any], mode: str, model: str) -> dict[str, Any]:
+    payload["meta"] = {"pipeline_mode": mode, "model": model}
+    return payload
+
+
+COACH_SYSTEM = (
+    "You are a human health coach. Use the analysis JSON and the user query to write a clear, "
+    "user-friendly response with appropriate detail. Do not include the analysis fields. "
+    "Return ONLY valid JSON with the shape: {\"answer\": \"...\"}."
+)
+
+COACH_STREAM_SYSTEM = (
+    "You are a human health coach. Use the analysis JSON and the user query to write a clear, "
+    "user-friendly response with appropriate detail. Do not include the analysis fields. "
+    "Reply with the answer text only (markdown allowed), not JSON."
+)
+
+
+def coach_messages(bundle, system: str, analysis_payload: dict[str, Any]) -> list[dict[str, str]]:
+    """The coach prompt: the static coach system message, then the query and the analysis JSON.
+
+    Replaying the whole analysis prompt here would make most of it a prompt-cache hit,
+    but it costs more input tokens in total than this short prompt, even after the discount.
+    """
+    coach_user = "\n\n".join(["USER_QUERY:", bundle.user, "ANALYSIS_JSON:", compact_json(analysis_payload)])
+    return [
+        {"role": "system", "content": system},
+        {"role": "user", "content": coach_user},
+    ]
+
+
+async def call_llm_messages_stream(
+    messages: list[dict[str, str]], model: str, temperature: float = 0.4
+) -> AsyncIterator[str]:
+    client = get_openai_client()
+    max_tokens = int(os.getenv("OPENAI_MAX_TOKENS", "10000"))
+    stream = await client.chat.completions.create(
+        model=model,
+        messages=messages,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        timeout=llm_timeout("OPENAI_TIMEOUT_SECONDS", "60"),
+        stream=True,
+        stream_options={"include_usage": True},
     )
+    async for chunk in stream:
+        if chunk.usage is not None:
+            record_token_usage(chunk, "coach")
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
 
+async def run_analysis_stage(bundle, analysis_schema: dict[str, Any], model: str) -> dict[str, Any] | None:
+    """Runs the analysis completion (plus local repair, then one fixup); returns None when all fail validation."""
+    raw_analysis = None
     try:
-        raw_analysis = call_llm(analysis_bundle, model)
+        with observe_stage("analysis_llm"):
+            raw_analysis = await call_llm(bundle, model)
         analysis_payload = parse_json_response(raw_analysis)
         validate_against_schema(analysis_payload, analysis_schema)
     except Exception:
+        SCHEMA_VALIDATION_FAILURES.inc(step="analysis")
+        repaired = repair_locally(raw_analysis, analysis_schema, "analysis")
+        if repaired is not None:
+            return repaired
         try:
-            raw_fix = call_fixup_llm(
-                analysis_payload if "analysis_payload" in locals() else {},
-                analysis_schema,
-                model,
-            )
+            with observe_stage("fixup_llm"):
+                raw_fix = await call_fixup_llm(
+                    analysis_payload if "analysis_payload" in locals() else {},
+                    analysis_schema,
+                    model,
+                )
             analysis_payload = parse_json_response(raw_fix)
             validate_against_schema(analysis_payload, analysis_schema)
         except Exception:
-            return safe_fallback_response()
+            SCHEMA_VALIDATION_FAILURES.inc(step="analysis_fixup")
+            return None
+    return analysis_payload
 
-    coach_system = (
-        "You are a human health coach. Use the analysis JSON and the user query to write a clear, "
-        "user-friendly response with appropriate detail. Do not include the analysis fields. "
-        "Return ONLY valid JSON with the shape: {\"answer\": \"...\"}."
-    )
-    coach_user = "\n\n".join(
-        [
-            "USER_QUERY:",
-            user_query.strip(),
-            "ANALYSIS_JSON:",
-            json.dumps(analysis_payload, indent=2),
-        ]
-    )
-    try:
-        raw_answer = call_llm_messages(
-            [
-                {"role": "system", "content": coach_system},
-                {"role": "user", "content": coach_user},
-            ],
-            model,
-            temperature=0.5,
-        )
-        answer_payload = parse_json_response(raw_answer)
-    except Exception:
-        answer_payload = {}
 
-    answer_text = str(answer_payload.get("answer") or "").strip()
+async def finalize_coach_response(
+    analysis_payload: dict[str, Any], answer_text: str, response_schema: dict[str, Any], model: str
+) -> dict[str, Any] | None:
     merged = dict(analysis_payload)
     merged["answer"] = answer_text
     merged = ensure_message_alias(merged)
@@ -235,11 +401,186 @@ async def generate_coach_response(
         validate_against_schema(merged, response_schema)
         return merged
     except Exception:
+        SCHEMA_VALIDATION_FAILURES.inc(step="response")
+        repaired = repair_locally(merged, response_schema, "response")
+        if repaired is not None:
+            return repaired
         try:
-            raw_fix = call_fixup_llm(merged, response_schema, model)
+            with observe_stage("fixup_llm"):
+                raw_fix = await call_fixup_llm(merged, response_schema, model)
             fixed = ensure_message_alias(parse_json_response(raw_fix))
             fixed = coalesce_blank_answer(fixed)
             validate_against_schema(fixed, response_schema)
             return fixed
         except Exception:
-            return safe_fallback_response()
+            SCHEMA_VALIDATION_FAILURES.inc(step="response_fixup")
+            return None
+
+
+async def run_single_stage(bundle, response_schema: dict[str, Any], model: str) -> dict[str, Any] | None:
+    """Produces the full response payload in one structured-output completion (plus local repair, then one fixup)."""
+    raw_response = None
+    try:
+        with observe_stage("single_llm"):
+            raw_response = await call_llm(
+                bundle, model, response_format=json_schema_response_format("coach_response", response_schema)
+            )
+        payload = coalesce_blank_answer(ensure_message_alias(json.loads(raw_response)))
+        validate_against_schema(payload, response_schema)
+        return payload
+    except Exception:
+        SCHEMA_VALIDATION_FAILURES.inc(step="single")
+        repaired = repair_locally(
+            raw_response, response_schema, "single", prepare=lambda p: coalesce_blank_answer(ensure_message_alias(p))
+        )
+        if repaired is not None:
+            return repaired
+        try:
+            with observe_stage("fixup_llm"):
+                raw_fix = await call_fixup_llm(
+                    payload if "payload" in locals() else {},
+                    response_schema,
+                    model,
+                )
+            fixed = coalesce_blank_answer(ensure_message_alias(parse_json_response(raw_fix)))
+            validate_against_schema(fixed, response_schema)
+            return fixed
+        except Exception:
+            SCHEMA_VALIDATION_FAILURES.inc(step="single_fixup")
+            return None
+
+
+@dataclass
+class CoachRequest:
+    """Everything one coach turn needs, resolved once: schemas, model, mode, prompt bundle and cache key."""
+
+    user_query: str
+    response_schema: dict[str, Any]
+    analysis_schema: dict[str, Any]
+    model: str
+    mode: str
+    bundle: Any
+    cache_key: str | None
+
+
+def prepare_coach_request(
+    wearables_summary: dict[str, Any], coaching_context: dict[str, Any], user_query: str
+) -> CoachRequest:
+    assets = load_prompt_assets()
+    response_schema = assets.module.RESPONSE_SCHEMA
+    analysis_schema = getattr(assets.module, "ANALYSIS_SCHEMA", response_schema)
+    model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+    mode = coach_pipeline_mode()
+    with observe_stage("prompt_build"):
+        bundle = build_prompt_bundle(
+            wearables_summary=wearables_summary,
+            coaching_context=coaching_context,
+            user_query=user_query,
+            response_schema=response_schema if mode == "single" else analysis_schema,
+            schema_in_response_format=mode == "single",
+        )
+    cache_key = LLM_CACHE.key_for(bundle, model, assets.schema_version, mode) if LLM_CACHE else None
+    return CoachRequest(user_query, response_schema, analysis_schema, model, mode, bundle, cache_key)
+
+
+async def cached_coach_response(request: CoachRequest) -> dict[str, Any] | None:
+    if request.cache_key is None:
+        return None
+    payload = await LLM_CACHE.get_async(request.cache_key)
+    if payload is None:
+        return None
+    payload = with_pipeline_meta(payload, request.mode, request.model)
+    payload["meta"]["cached"] = True
+    return payload
+
+
+async def complete_coach_response(request: CoachRequest, payload: dict[str, Any] | None) -> dict[str, Any]:
+    """Caches a successful payload and attaches pipeline metadata; failures become the safe fallback."""
+    if payload is None:
+        COACH_FALLBACKS.inc(mode=request.mode)
+        return with_pipeline_meta(safe_fallback_response(), request.mode, request.model)
+    if request.cache_key is not None:
+        await LLM_CACHE.set_async(request.cache_key, payload)
+    return with_pipeline_meta(payload, request.mode, request.model)
+
+
+@traced("llm.generate_coach_response")
+async def generate_coach_response(
+    *,
+    wearables_summary: dict[str, Any],
+    coaching_context: dict[str, Any],
+    user_query: str,
+) -> dict[str, Any]:
+    request = prepare_coach_request(wearables_summary, coaching_context, user_query)
+    cached = await cached_coach_response(request)
+    if cached is not None:
+        return cached
+
+    if request.mode == "single":
+        payload = await run_single_stage(request.bundle, request.response_schema, request.model)
+        return await complete_coach_response(request, payload)
+
+    analysis_payload = await run_analysis_stage(request.bundle, request.analysis_schema, request.model)
+    if analysis_payload is None:
+        return await complete_coach_response(request, None)
+
+    try:
+        with observe_stage("coach_llm"):
+            raw_answer = await call_llm_messages(
+                coach_messages(request.bundle, COACH_SYSTEM, analysis_payload),
+                request.model,
+                temperature=0.5,
+            )
+        answer_payload = parse_json_response(raw_answer)
+    except Exception:
+        answer_payload = {}
+
+    answer_text = str(answer_payload.get("answer") or "").strip()
+    payload = await finalize_coach_response(analysis_payload, answer_text, request.response_schema, request.model)
+    return await complete_coach_response(request, payload)
+
+
+async def stream_coach_response(
+    *,
+    wearables_summary: dict[str, Any],
+    coaching_context: dict[str, Any],
+    user_query: str,
+) -> AsyncIterator[tuple[str, Any]]:
+    """Yields (event, data) pairs: status updates, answer text deltas, then the full payload as "final"."""
+    request = prepare_coach_request(wearables_summary, coaching_context, user_query)
+    cached = await cached_coach_response(request)
+    if cached is not None:
+        yield "token", {"text": cached.get("answer", "")}
+        yield "final", cached
+        return
+
+    if request.mode == "single":
+        # The single structured call returns one JSON document, so there are no answer deltas to forward.
+        yield "status", {"stage": "response"}
+        payload = await run_single_stage(request.bundle, request.response_schema, request.model)
+        yield "final", await complete_coach_response(request, payload)
+        return
+
+    yield "status", {"stage": "analysis"}
+    analysis_payload = await run_analysis_stage(request.bundle, request.analysis_schema, request.model)
+    if analysis_payload is None:
+        yield "final", await complete_coach_response(request, None)
+        return
+
+    yield "status", {"stage": "answer"}
+    parts: list[str] = []
+    try:
+        with observe_stage("coach_llm_stream"):
+            async for delta in call_llm_messages_stream(
+                coach_messages(request.bundle, COACH_STREAM_SYSTEM, analysis_payload),
+                request.model,
+                temperature=0.5,
+            ):
+                parts.append(delta)
+                yield "token", {"text": delta}
+    except Exception:
+        yield "status", {"stage": "answer", "interrupted": True}
+
+    answer_text = "".join(parts).strip()
+    payload = await finalize_coach_response(analysis_payload, answer_text, request.response_schema, request.model)
+    yield "final", await complete_coach_response(request, payload)
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from cache import LRUCache
+from prompt_packet import compact_json, drop_path
+
+
+CONTEXT_HEADER = "CONTEXT_PACKET_JSON:\n"
+# Context fields that change between otherwise identical requests and never affect the answer.
+VOLATILE_CONTEXT_PATHS: tuple[tuple[str, ...], ...] = (("wearables_summary", "generated_at"),)
+
+
+class LLMResponseCache:
+    """Content-addressed cache of validated coach responses.
+
+    Entries live in a TTL-bounded in-memory LRU and, when `disk_path` is set, in a
+    SQLite table that survives restarts. Payloads are stored as JSON text so callers
+    always get a fresh copy they can annotate.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl_seconds: float = 900,
+        disk_path: Path | None = None,
+        disk_max_entries: int = 10000,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.memory = LRUCache(max_entries, ttl_seconds=ttl_seconds, name="llm_responses")
+        self.disk_path = disk_path
+        self.disk_max_entries = disk_max_entries
+        self.disk_hits = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+        if disk_path is not None:
+            disk_path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(disk_path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, payload TEXT NOT NULL, created_at REAL NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def key_for(bundle: Any, model: str, schema_version: str, mode: str) -> str:
+        material = json.dumps(
+            [bundle.system, bundle.developer, stable_context(bundle.context), bundle.user, model, schema_version, mode],
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        text = self.memory.get(key)
+        if text is None and self._db is not None:
+            text = self._disk_get(key)
+        return json.loads(text) if text is not None else None
+
+    async def get_async(self, key: str) -> dict[str, Any] | None:
+        """Like get, but the SQLite lookup on a memory miss runs in a worker thread, off the event loop."""
+        text = self.memory.get(key)
+        if text is None and self._db is not None:
+            text = await asyncio.to_thread(self._disk_get, key)
+        return json.loads(text) if text is not None else None
+
+    def set(self, key: str, payload: dict[str, Any]) -> None:
+        text = json.dumps(payload, ensure_ascii=False)
+        self.memory.set(key, text)
+        if self._db is not None:
+            self._disk_set(key, text)
+
+    async def set_async(self, key: str, payload: dict[str, Any]) -> None:
+        text = json.dumps(payload, ensure_ascii=False)
+        self.memory.set(key, text)
+        if self._db is not None:
+            await asyncio.to_thread(self._disk_set, key, text)
+
+    def _disk_get(self, key: str) -> str | None:
+        with self._lock:
+            if self._db is None:
+                return None
+            row = self._db.execute(
+                "SELECT payload, expires_at FROM llm_cache WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            ).fetchone()
+        if row is None:
+            return None
+        self.disk_hits += 1
+        self.memory.set(key, row[0], ttl_seconds=max(row[1] - time.time(), 0))
+        return row[0]
+
+    def _disk_set(self, key: str, text: str) -> None:
+        now = time.time()
+        with self._lock:
+            if self._db is None:
+                return
+            self._db.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, payload, created_at, expires_at) VALUES (?, ?, ?, ?)",
+                (key, text, now, now + self.ttl_seconds),
+            )
+            self._writes += 1
+            if self._writes % 64 == 0:
+                self._prune(now)
+            self._db.commit()
+
+    def _prune(self, now: float) -> None:
+        self._db.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+        self._db.execute(
+            "DELETE FROM llm_cache WHERE key NOT IN "
+            "(SELECT key FROM llm_cache ORDER BY created_at DESC LIMIT ?)",
+            (self.disk_max_entries,),
+        )
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self._db is not None:
+            with self._lock:
+                self._db.execute("DELETE FROM llm_cache")
+                self._db.commit()
+
+    def close(self) -> None:
+        if self._db is not None:
+            with self._lock:
+                self._db.close()
+                self._db = None
+
+    def stats(self) -> dict[str, Any]:
+        stats = self.memory.stats()
+        stats["disk_enabled"] = self._db is not None
+        stats["disk_hits"] = self.disk_hits
+        return stats
+
+
+def stable_context(context: str) -> str:
+    """The bundle's context packet without VOLATILE_CONTEXT_PATHS, so a fresh timestamp still hits the cache."""
+    if not context.startswith(CONTEXT_HEADER):
+        return context
+    try:
+        packet = json.loads(context[len(CONTEXT_HEADER) :])
+    except ValueError:
+        return context
+    for path in VOLATILE_CONTEXT_PATHS:
+        drop_path(packet, path)
+    return compact_json(packet)
+
+
+def llm_cache_from_env() -> LLMResponseCache | None:
+    if os.getenv("LLM_CACHE_ENABLED", "1").lower() in ("0", "false", "no"):
+        return None
+    disk_path = os.getenv("LLM_CACHE_PATH")
+    return LLMResponseCache(
+        max_entries=int(os.getenv("LLM_CACHE_SIZE", "512")),
+        ttl_seconds=float(os.getenv("LLM_CACHE_TTL_SECONDS", "900")),
+        disk_path=Path(disk_path) if disk_path else None,
+        disk_max_entries=int(os.getenv("LLM_CACHE_DISK_MAX_ENTRIES", "10000")),
+    )
@@ -0,0 +1,214 @@
+"""Local stand-ins for the OpenAI chat-completions API and the Scribe meetings API.
+
+Both apps are plain FastAPI apps, so tests can mount them in-process through
+`httpx.ASGITransport` and the load-test harness can serve them with uvicorn.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from fastapi import Body, FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+@dataclass
+class FakeBehavior:
+    """Latency is drawn uniformly from `latency_ms ± jitter_ms`; rates are per request."""
+
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    failure_rate: float = 0.0
+    invalid_json_rate: float = 0.0
+    seed: int | None = None
+
+    def __post_init__(self) -> None:
+        self.rng = random.Random(self.seed)
+
+    async def delay(self) -> None:
+        latency = self.latency_ms + self.rng.uniform(-self.jitter_ms, self.jitter_ms)
+        if latency > 0:
+            await asyncio.sleep(latency / 1000)
+
+    def fails(self) -> bool:
+        return self.rng.random() < self.failure_rate
+
+    def garbles(self) -> bool:
+        return self.rng.random() < self.invalid_json_rate
+
+
+FAKE_ANALYSIS = {
+    "reasoning_trace": ["Average sleep is below the 7 hour target.", "Resting heart rate is stable."],
+    "data_references": [
+        {"metric_path": "aggregates.sleep.duration_mean_h", "value": 6.4, "window_days": 14, "comparison": "vs baseline"}
+    ],
+    "recommendations": [
+        {
+            "category": "sleep",
+            "action": "Move bedtime 30 minutes earlier on weeknights.",
+            "why": "Sleep duration is below target.",
+            "priority": "high",
+            "timeframe": "next 7 days",
+            "success_metric": "sleep_duration_mean_h +0.5",
+        }
+    ],
+    "follow_ups": [],
+    "safety": {"disclaimer": "This is not medical advice.", "red_flags": []},
+}
+FAKE_ANSWER = "Your sleep has been a little short. Try moving bedtime 30 minutes earlier this week."
+GARBLED = 'Sure! Here is the JSON you asked for: {"reasoning_trace": ['
+
+
+def fake_completion_content(body: dict[str, Any]) -> str:
+    """Picks a reply shaped for whichever coach pipeline step issued the request."""
+    messages = body.get("messages") or []
+    system = messages[0].get("content", "") if messages else ""
+    last = messages[-1].get("content", "") if messages else ""
+    if system.startswith("You fix JSON"):
+        schema_text = last.split("INVALID_JSON:", 1)[0]
+        wants_answer = '"answer"' in schema_text
+        return json.dumps({**FAKE_ANALYSIS, "answer": FAKE_ANSWER} if wants_answer else FAKE_ANALYSIS)
+    if system.startswith("You are a human health coach"):
+        return FAKE_ANSWER if "not JSON" in system else json.dumps({"answer": FAKE_ANSWER})
+    if (body.get("response_format") or {}).get("type") == "json_schema":
+        return json.dumps({**FAKE_ANALYSIS, "answer": FAKE_ANSWER})
+    return json.dumps(FAKE_ANALYSIS)
+
+
+class FakePromptCache:
+    """Mimics provider prefix caching at message granularity.
+
+    The longest run of leading messages already seen in an earlier request counts as
+    cached, once it reaches 1024 tokens, rounded down to a 128-token step.
+    """
+
+    min_tokens = 1024
+    step_tokens = 128
+
+    def __init__(self) -> None:
+        self.prefixes: set[str] = set()
+        self._lock = threading.Lock()
+
+    def cached_tokens(self, messages: list[dict[str, Any]]) -> int:
+        digest = hashlib.sha256()
+        chars = cached_chars = 0
+        with self._lock:
+            for message in messages:
+                digest.update(json.dumps(message, sort_keys=True).encode("utf-8"))
+                chars += len(str(message.get("content", "")))
+                key = digest.hexdigest()
+                if key in self.prefixes:
+                    cached_chars = chars
+                else:
+                    self.prefixes.add(key)
+        tokens = cached_chars // 4
+        return tokens - tokens % self.step_tokens if tokens >= self.min_tokens else 0
+
+
+def fake_usage(body: dict[str, Any], content: str, cached_tokens: int = 0) -> dict[str, Any]:
+    prompt_chars = sum(len(str(message.get("content", ""))) for message in body.get("messages") or [])
+    prompt_tokens, completion_tokens = prompt_chars // 4, len(content) // 4
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+        "prompt_tokens_details": {"cached_tokens": cached_tokens},
+    }
+
+
+def create_fake_openai_app(behavior: FakeBehavior | None = None) -> FastAPI:
+    behavior = behavior or FakeBehavior()
+    app = FastAPI()
+    app.state.requests = 0
+    app.state.prompt_cache = FakePromptCache()
+    app.state.prompt_tokens = app.state.cached_tokens = 0
+
+    async def completions(body: dict[str, Any] = Body(...)):
+        app.state.requests += 1
+        await behavior.delay()
+        if behavior.fails():
+            return JSONResponse(status_code=500, content={"error": {"message": "Injected failure.", "type": "server_error"}})
+        content = GARBLED if behavior.garbles() else fake_completion_content(body)
+        usage = fake_usage(body, content, app.state.prompt_cache.cached_tokens(body.get("messages") or []))
+        app.state.prompt_tokens += usage["prompt_tokens"]
+        app.state.cached_tokens += usage["prompt_tokens_details"]["cached_tokens"]
+        model = body.get("model", "fake-model")
+        created = int(time.time())
+        if body.get("stream"):
+            include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+            return StreamingResponse(
+                stream_chunks(content, model, created, usage if include_usage else None), media_type="text/event-stream"
+            )
+        return {
+            "id": f"chatcmpl-fake-{app.state.requests}",
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+            "usage": usage,
+        }
+
+    app.add_api_route("/v1/chat/completions", completions, methods=["POST"])
+    app.add_api_route("/chat/completions", completions, methods=["POST"])
+    return app
+
+
+async def stream_chunks(content: str, model: str, created: int, usage: dict[str, Any] | None = None):
+    chunk = {"id": "chatcmpl-fake-stream", "object": "chat.completion.chunk", "created": created, "model": model}
+    words = content.split(" ")
+    for idx, word in enumerate(words):
+        delta = {"content": word if idx == 0 else " " + word}
+        yield f"data: {json.dumps({**chunk, 'choices': [{'index': 0, 'delta': delta, 'finish_reason': None}]})}\n\n"
+    if usage is not None:
+        # Like the real API with stream_options.include_usage: a final chunk with no choices.
+        yield f"data: {json.dumps({**chunk, 'choices': [], 'usage': usage})}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+def fake_meeting(meeting_id: str) -> dict[str, Any]:
+    return {
+        "id": meeting_id,
+        "createdAt": "2025-12-01T10:00:00Z",
+        "status": "completed",
+        "plan": {
+            "sleep": {"baseline": "Averaging 6 hours on weeknights.", "smartGoals": ["In bed by 22:30 five nights a week."]},
+            "activity": {"baseline": "Mostly sedentary workdays.", "smartGoals": ["Walk 20 minutes after lunch."]},
+        },
+    }
+
+
+def create_fake_scribe_app(behavior: FakeBehavior | None = None, meetings: int = 50) -> FastAPI:
+    behavior = behavior or FakeBehavior()
+    meeting_ids = [f"meeting-{idx:04d}" for idx in range(meetings)]
+    app = FastAPI()
+    app.state.requests = 0
+
+    @app.get("/api/meetings")
+    async def list_meetings():
+        app.state.requests += 1
+        await behavior.delay()
+        if behavior.fails():
+            return JSONResponse(status_code=503, content={"error": "Injected failure."})
+        return [
+            {key: meeting[key] for key in ("id", "createdAt", "status")}
+            for meeting in map(fake_meeting, meeting_ids)
+        ]
+
+    @app.get("/api/meetings/{meeting_id}")
+    async def get_meeting(meeting_id: str):
+        app.state.requests += 1
+        await behavior.delay()
+        if behavior.fails():
+            return JSONResponse(status_code=503, content={"error": "Injected failure."})
+        if meeting_id not in meeting_ids:
+            return JSONResponse(status_code=404, content={"error": "Meeting not found."})
+        return fake_meeting(meeting_id)
+
+    return app
@@ -0,0 +1,264 @@
+"""End-to-end load test of the API against local OpenAI and Scribe stand-ins.
+
+Run from server/:
+
+    python -m loadtest.run --concurrency 1,8,32 --requests 200
+    python -m loadtest.run --endpoints chat --openai-latency-ms 800 --openai-invalid-json-rate 0.1
+    python -m loadtest.run --target http://localhost:8000 --endpoints summary,persona
+
+Without --target, the fakes are served with uvicorn on local ports and the app is
+started as a uvicorn subprocess pointed at them. Per endpoint and concurrency
+level it prints p50/p95/p99 latency, throughput and status-code counts.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Iterator
+
+import httpx
+import uvicorn
+
+from loadtest.fakes import FakeBehavior, create_fake_openai_app, create_fake_scribe_app
+
+
+SERVER_DIR = Path(__file__).resolve().parent.parent
+PERSONAS = ["active-alex", "stressed-sam", "sleep-challenged-chris", "recovering-riley"]
+ENDPOINTS = ("chat", "summary", "persona", "upload")
+
+
+def percentile(sorted_values: list[float], pct: float) -> float | None:
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[rank]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def serve_in_thread(app: Any) -> Iterator[str]:
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        thread.join(timeout=5)
+
+
+@contextmanager
+def serve_app(openai_url: str, scribe_url: str, workers: int, extra_env: dict[str, str]) -> Iterator[str]:
+    port = free_port()
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": "loadtest",
+        "OPENAI_BASE_URL": f"{openai_url}/v1",
+        "SCRIBE_API_BASE_URL": scribe_url,
+        **extra_env,
+    }
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=SERVER_DIR,
+        env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                if httpx.get(f"{url}/api/health", timeout=1).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if process.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError("The API server did not start.")
+            time.sleep(0.1)
+        yield url
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def upload_csv(rng: random.Random, days: int = 90) -> str:
+    lines = ["date,steps,sleep_hours,resting_hr,hrv_rmssd,stress_index"]
+    for day in range(days):
+        lines.append(
+            f"2025-{1 + day // 28 % 12:02d}-{1 + day % 28:02d},{rng.randint(3000, 12000)},"
+            f"{rng.uniform(5, 8):.2f},{rng.randint(55, 80)},{rng.uniform(40, 80):.1f},{rng.randint(20, 80)}"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def request_factory(
+    endpoint: str, rng: random.Random, meeting_ids: list[str], cacheable_chat: bool
+) -> Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]:
+    if endpoint == "chat":
+
+        def chat(client: httpx.AsyncClient, idx: int) -> Awaitable[httpx.Response]:
+            payload: dict[str, Any] = {
+                "user_id": rng.choice(PERSONAS),
+                "message": "How am I doing this week?" if cacheable_chat else f"How am I doing this week? ({idx})",
+            }
+            if meeting_ids:
+                payload["meeting_id"] = rng.choice(meeting_ids)
+            return client.post("/chat", json=payload)
+
+        return chat
+    if endpoint == "summary":
+        return lambda client, idx: client.get(
+            f"/users/{rng.choice(PERSONAS)}/wearables/summary", params={"window_days": rng.choice((7, 14, 30))}
+        )
+    if endpoint == "persona":
+        return lambda client, idx: client.get(f"/persona/{rng.choice(PERSONAS)}/data")
+    if endpoint == "upload":
+        body = upload_csv(rng)
+        return lambda client, idx: client.post("/upload", files={"file": ("upload.csv", body, "text/csv")})
+    raise ValueError(f"Unknown endpoint {endpoint!r}.")
+
+
+async def drive(
+    base_url: str, make_request: Callable, concurrency: int, total: int, timeout: float
+) -> dict[str, Any]:
+    latencies: list[float] = []
+    statuses: dict[str, int] = {}
+    counter = iter(range(total))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+
+        async def worker() -> None:
+            for idx in counter:
+                start = time.perf_counter()
+                try:
+                    response = await make_request(client, idx)
+                    status = str(response.status_code)
+                except httpx.HTTPError as exc:
+                    status = type(exc).__name__
+                latencies.append(time.perf_counter() - start)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "seconds": elapsed,
+        "throughput_rps": len(latencies) / elapsed if elapsed else None,
+        "p50_ms": (percentile(latencies, 50) or 0) * 1000,
+        "p95_ms": (percentile(latencies, 95) or 0) * 1000,
+        "p99_ms": (percentile(latencies, 99) or 0) * 1000,
+        "max_ms": latencies[-1] * 1000 if latencies else 0,
+        "statuses": dict(sorted(statuses.items())),
+    }
+
+
+def format_row(endpoint: str, result: dict[str, Any]) -> str:
+    return (
+        f"{endpoint:<8} c={result['concurrency']:<4} n={result['requests']:<6} "
+        f"{result['throughput_rps']:>9.1f} req/s  p50 {result['p50_ms']:>8.1f} ms  "
+        f"p95 {result['p95_ms']:>8.1f} ms  p99 {result['p99_ms']:>8.1f} ms  {result['statuses']}"
+    )
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help=f"Comma-separated subset of {ENDPOINTS}.")
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated concurrency levels.")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint and concurrency level.")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Client timeout per request in seconds.")
+    parser.add_argument("--target", help="Drive an already running server instead of starting one.")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the started server.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--meetings", type=int, default=50, help="Meetings served by the fake Scribe (0 disables).")
+    parser.add_argument("--cacheable-chat", action="store_true", help="Repeat one chat question per persona.")
+    parser.add_argument("--llm-cache", action="store_true", help="Leave the coach response cache enabled.")
+    parser.add_argument("--pipeline-mode", choices=("two_stage", "single"), help="COACH_PIPELINE_MODE for the server.")
+    for name in ("openai", "scribe"):
+        parser.add_argument(f"--{name}-latency-ms", type=float, default=300.0 if name == "openai" else 50.0)
+        parser.add_argument(f"--{name}-jitter-ms", type=float, default=0.0)
+        parser.add_argument(f"--{name}-failure-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--openai-invalid-json-rate", type=float, default=0.0, help="Share of completions returned as broken JSON."
+    )
+    parser.add_argument("--output", type=Path, help="Also write the results as JSON here.")
+    return parser.parse_args(argv)
+
+
+def run(args: argparse.Namespace, base_url: str, meeting_ids: list[str]) -> list[dict[str, Any]]:
+    rng = random.Random(args.seed)
+    results = []
+    for endpoint in [name.strip() for name in args.endpoints.split(",") if name.strip()]:
+        make_request = request_factory(endpoint, rng, meeting_ids, args.cacheable_chat)
+        for concurrency in [int(level) for level in args.concurrency.split(",") if level]:
+            result = asyncio.run(drive(base_url, make_request, concurrency, args.requests, args.timeout))
+            result["endpoint"] = endpoint
+            results.append(result)
+            print(format_row(endpoint, result), flush=True)
+    return results
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    meeting_ids = [f"meeting-{idx:04d}" for idx in range(args.meetings)]
+    if args.target:
+        results = run(args, args.target.rstrip("/"), [])
+    else:
+        openai_behavior = FakeBehavior(
+            latency_ms=args.openai_latency_ms,
+            jitter_ms=args.openai_jitter_ms,
+            failure_rate=args.openai_failure_rate,
+            invalid_json_rate=args.openai_invalid_json_rate,
+            seed=args.seed,
+        )
+        scribe_behavior = FakeBehavior(
+            latency_ms=args.scribe_latency_ms,
+            jitter_ms=args.scribe_jitter_ms,
+            failure_rate=args.scribe_failure_rate,
+            seed=args.seed,
+        )
+        mirror_dir = tempfile.TemporaryDirectory(prefix="loadtest-meetings-")
+        extra_env = {"MEETING_MIRROR_DIR": mirror_dir.name}
+        if not args.llm_cache:
+            extra_env["LLM_CACHE_ENABLED"] = "0"
+        if args.pipeline_mode:
+            extra_env["COACH_PIPELINE_MODE"] = args.pipeline_mode
+        openai_app = create_fake_openai_app(openai_behavior)
+        scribe_app = create_fake_scribe_app(scribe_behavior, meetings=args.meetings)
+        with serve_in_thread(openai_app) as openai_url, serve_in_thread(scribe_app) as scribe_url:
+            with serve_app(openai_url, scribe_url, args.workers, extra_env) as base_url:
+                results = run(args, base_url, meeting_ids)
+            print(f"fake OpenAI requests: {openai_app.state.requests}, fake Scribe requests: {scribe_app.state.requests}")
+            if openai_app.state.prompt_tokens:
+                hit_rate = openai_app.state.cached_tokens / openai_app.state.prompt_tokens
+                print(f"prompt cache: {hit_rate:.1%} of {openai_app.state.prompt_tokens} prompt tokens served from cache")
+        mirror_dir.cleanup()
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
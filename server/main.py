@@ -1,18 +1,57 @@
+import asyncio
+import contextlib
+import copy
 import json
 import os
 import time
 from pathlib import Path
 from typing import Any
 
-import httpx
-from fastapi import Body, FastAPI, File, UploadFile
+from fastapi import Body, FastAPI, File, Request, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+
+from cache import LRUCache
+from ingest import UploadIngest, UploadTooLarge, ingest_upload_file
+from llm import LLM_CACHE, close_openai_client, generate_coach_response, start_openai_client, stream_coach_response
+from meetings import (
+    MeetingContextCache,
+    MeetingMirror,
+    MeetingNotFound,
+    coaching_context_from_meeting,
+    create_scribe_client,
+    run_periodic_sync,
+    sync_meetings,
+)
+from metrics import HTTP_REQUEST_SECONDS, REGISTRY, observe_stage, sampled_metric
+from persona_store import PersonaRecord, PersonaStore
+from profiling import ProfileStore, is_profile_admin, profiling_middleware
+from stats import WindowIndex
+from summary import SUMMARY_FIELDS, SummaryPipeline, summarize_series
+from uploads import UploadStore
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_openai_client()
+    MEETING_CACHE.set_client(create_scribe_client())
+    sync_task = (
+        asyncio.create_task(run_periodic_sync(MEETING_CACHE, MEETING_SYNC_INTERVAL_SECONDS, MEETING_SYNC_CONCURRENCY))
+        if MEETING_SYNC_INTERVAL_SECONDS > 0
+        else None
+    )
+    yield
+    if sync_task is not None:
+        sync_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await sync_task
+    await close_openai_client()
+    await MEETING_CACHE.close()
+    if LLM_CACHE:
+        LLM_CACHE.close()
 
-from llm import generate_coach_response
-from stats import compute_stats, round_value
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 cors_origins = (
     [origin.strip() for origin in os.getenv("CORS_ORIGINS", "*").split(",")]
@@ -29,336 +68,115 @@ app.add_middleware(
 )
 
 DATA_ROOT = Path(__file__).resolve().parent / "data"
-PERSONAS_INDEX_PATH = DATA_ROOT / "personas.json"
+PERSONA_STORE = PersonaStore(DATA_ROOT, max_personas=int(os.getenv("PERSONA_CACHE_SIZE", "128")))
+SUMMARY_CACHE = LRUCache(int(os.getenv("SUMMARY_CACHE_SIZE", "256")), name="summaries")
+# Last data version summarized per persona; older versions' summaries are purged once when it changes.
+SUMMARY_VERSIONS: dict[str, str] = {}
+UPLOAD_STORE = UploadStore(
+    max_bytes=int(os.getenv("UPLOAD_STORE_MAX_BYTES", str(256 * 1024 * 1024))),
+    max_entries=int(os.getenv("UPLOAD_STORE_SIZE", "256")),
+    ttl_seconds=float(os.getenv("UPLOAD_STORE_TTL_SECONDS", "3600")),
+)
+UPLOAD_PAGE_MAX_ROWS = int(os.getenv("UPLOAD_PAGE_MAX_ROWS", "1000"))
 
 SCRIBE_API_BASE_URL = os.getenv("SCRIBE_API_BASE_URL", "https://evida-scribe-api-production.up.railway.app")
-MEETING_CACHE_TTL = 300
-MEETING_CACHE: dict[str, dict[str, Any]] = {}
+MEETING_CACHE = MeetingContextCache(
+    SCRIBE_API_BASE_URL,
+    ttl_seconds=float(os.getenv("MEETING_CACHE_TTL_SECONDS", "300")),
+    stale_seconds=float(os.getenv("MEETING_CACHE_STALE_SECONDS", "3600")),
+    negative_ttl_seconds=float(os.getenv("MEETING_CACHE_NEGATIVE_TTL_SECONDS", "60")),
+    max_entries=int(os.getenv("MEETING_CACHE_SIZE", "256")),
+    mirror=MeetingMirror(Path(os.getenv("MEETING_MIRROR_DIR") or DATA_ROOT / "meetings")),
+    mirror_flush_seconds=float(os.getenv("MEETING_MIRROR_FLUSH_SECONDS", "5")),
+)
+MEETING_SYNC_INTERVAL_SECONDS = float(os.getenv("MEETING_SYNC_INTERVAL_SECONDS", "0"))
+MEETING_SYNC_CONCURRENCY = int(os.getenv("MEETING_SYNC_CONCURRENCY", "8"))
+PROFILE_STORE = ProfileStore(
+    Path(os.getenv("PROFILE_DIR") or DATA_ROOT / "profiles"), keep=int(os.getenv("PROFILE_KEEP", "50"))
+)
+app.middleware("http")(profiling_middleware(PROFILE_STORE))
 
 
 def load_personas_index() -> list[dict[str, Any]]:
-    if not PERSONAS_INDEX_PATH.exists():
-        return []
-    return json.loads(PERSONAS_INDEX_PATH.read_text(encoding="utf-8"))
+    return PERSONA_STORE.index()
 
 
 def load_persona_data(persona_id: str) -> dict[str, Any] | None:
-    persona_path = DATA_ROOT / "personas" / f"{persona_id}.json"
-    if not persona_path.exists():
-        return None
-    return json.loads(persona_path.read_text(encoding="utf-8"))
-
-
-def summarize_series(series: list[dict[str, Any]]) -> dict[str, Any]:
-    fields = [
-        "steps",
-        "sleep_hours",
-        "resting_hr",
-        "hrv_rmssd",
-        "stress_index",
-        "calories_burned",
-        "sleep_efficiency",
-        "active_minutes",
-    ]
-    stats = compute_stats(series, fields)
-    return {
-        "average_steps": stats.get("steps", {}).get("mean"),
-        "average_sleep_hours": stats.get("sleep_hours", {}).get("mean"),
-        "average_resting_hr": stats.get("resting_hr", {}).get("mean"),
-        "hrv_rmssd": stats.get("hrv_rmssd", {}).get("mean"),
-        "stress_index": stats.get("stress_index", {}).get("mean"),
-        "calories_burned": stats.get("calories_burned", {}).get("mean"),
-        "sleep_efficiency": stats.get("sleep_efficiency", {}).get("mean"),
-        "active_minutes": stats.get("active_minutes", {}).get("mean"),
-        "variance": {
-            "average_steps": stats.get("steps", {}).get("variance"),
-            "average_sleep_hours": stats.get("sleep_hours", {}).get("variance"),
-            "average_resting_hr": stats.get("resting_hr", {}).get("variance"),
-            "hrv_rmssd": stats.get("hrv_rmssd", {}).get("variance"),
-        },
-    }
+    record = PERSONA_STORE.get(persona_id)
+    return {**record.data, "data": record.series.to_rows()} if record else None
 
 
-def compute_scores(summary: dict[str, Any]) -> dict[str, Any]:
-    sleep = summary.get("average_sleep_hours") or 0
-    stress = summary.get("stress_index") or 0
-    resting_hr = summary.get("average_resting_hr") or 0
-    hrv = summary.get("hrv_rmssd") or 0
-    steps = summary.get("average_steps") or 0
-    sleep_eff = summary.get("sleep_efficiency") or 0
-
-    sleep_score = min((sleep / 8) * 100, 100) if sleep else None
-    efficiency_score = min(sleep_eff * 100, 100) if sleep_eff else None
-    sleep_score = (
-        round_value(((sleep_score or 0) * 0.6 + (efficiency_score or 0) * 0.4), 1)
-        if sleep_score is not None
-        else None
-    )
-    stress_burden = round_value(max(0, 100 - stress), 1) if stress else None
-    readiness = (
-        round_value(((sleep_score or 0) * 0.4 + (100 - stress) * 0.35 + max(0, 100 - (resting_hr - 50) * 1.5) * 0.25), 1)
-        if sleep_score is not None and stress and resting_hr
-        else None
-    )
-    recovery = (
-        round_value(((hrv / 70) * 100) * 0.6 + max(0, 100 - (resting_hr - 50) * 1.2) * 0.4, 1)
-        if hrv and resting_hr
-        else None
-    )
-    activity = round_value(min(steps / 100, 100), 1) if steps else None
-
-    return {
-        "readiness_score_0_100": readiness,
-        "recovery_score_0_100": recovery,
-        "sleep_score_0_100": sleep_score,
-        "activity_score_0_100": activity,
-        "stress_burden_score_0_100": stress_burden,
-        "score_bands": {"green": [80, 100], "yellow": [60, 79], "red": [0, 59]},
-        "score_explanations": {
-            "readiness_score_0_100": "Computed from sleep score, HRV vs baseline, RHR vs baseline, and recent load.",
-        },
-    }
+def persona_window_index(record: PersonaRecord) -> WindowIndex:
+    if record.window_index is None:
+        record.window_index = WindowIndex(record.series, SUMMARY_FIELDS)
+    return record.window_index
 
 
 def build_wearables_summary(user_id: str, window_days: int) -> dict[str, Any]:
-    persona_data = load_persona_data(user_id)
-    if not persona_data:
+    with observe_stage("persona_load"):
+        record = PERSONA_STORE.get(user_id)
+    if not record:
         raise KeyError("Persona not found.")
-    series = persona_data.get("data", [])
-    window = series[-window_days:] if window_days else series
-    stats = compute_stats(
-        window,
-        [
-            "steps",
-            "sleep_hours",
-            "resting_hr",
-            "hrv_rmssd",
-            "stress_index",
-            "calories_burned",
-            "sleep_efficiency",
-            "active_minutes",
-        ],
-    )
-    summary = summarize_series(window)
-    baseline_summary = summarize_series(series)
-    notable_trends = []
-    if summary.get("average_sleep_hours") and baseline_summary.get("average_sleep_hours"):
-        delta = round_value(summary["average_sleep_hours"] - baseline_summary["average_sleep_hours"], 2)
-        if abs(delta) >= 0.3:
-            notable_trends.append(f"Sleep duration {'up' if delta > 0 else 'down'} {abs(delta)}h vs baseline.")
-    if summary.get("average_steps") and baseline_summary.get("average_steps"):
-        delta = round_value(summary["average_steps"] - baseline_summary["average_steps"], 0)
-        if abs(delta) >= 500:
-            notable_trends.append(f"Steps {'up' if delta > 0 else 'down'} {abs(delta)} vs baseline.")
-    if summary.get("hrv_rmssd") and baseline_summary.get("hrv_rmssd"):
-        delta = round_value(summary["hrv_rmssd"] - baseline_summary["hrv_rmssd"], 1)
-        if abs(delta) >= 3:
-            notable_trends.append(f"HRV {'up' if delta > 0 else 'down'} {abs(delta)} ms vs baseline.")
-    if summary.get("stress_index") and baseline_summary.get("stress_index"):
-        delta = round_value(summary["stress_index"] - baseline_summary["stress_index"], 1)
-        if abs(delta) >= 5:
-            notable_trends.append(f"Stress index {'up' if delta > 0 else 'down'} {abs(delta)} vs baseline.")
-
-    return {
-        "window_days": window_days,
-        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
-        "data_quality": {
-            "coverage_pct": min(len(window) / float(window_days or 1), 1.0),
-            "missingness_notes": [],
-            "device_sources": ["demo"],
-        },
-        "demographics": {"age": None, "sex": None, "timezone": "UTC"},
-        "baselines": {
-            "baseline_window_days": len(series),
-            "sleep_duration_mean_h": baseline_summary.get("average_sleep_hours"),
-            "hrv_rmssd_mean_ms": baseline_summary.get("hrv_rmssd"),
-            "resting_hr_mean_bpm": baseline_summary.get("average_resting_hr"),
-            "steps_mean": baseline_summary.get("average_steps"),
-        },
-        "aggregates": {
-            "sleep": {
-                "duration_mean_h": summary.get("average_sleep_hours"),
-                "duration_std_h": stats.get("sleep_hours", {}).get("std"),
-                "efficiency_mean_pct": summary.get("sleep_efficiency"),
-                "efficiency_std_pct": stats.get("sleep_efficiency", {}).get("std"),
-                "bedtime_mean_local": None,
-                "bedtime_std_min": None,
-                "wake_time_mean_local": None,
-                "wake_time_std_min": None,
-                "awakenings_mean": None,
-            },
-            "recovery": {
-                "resting_hr_mean_bpm": summary.get("average_resting_hr"),
-                "resting_hr_std_bpm": stats.get("resting_hr", {}).get("std"),
-                "hrv_rmssd_mean_ms": summary.get("hrv_rmssd"),
-                "hrv_rmssd_std_ms": stats.get("hrv_rmssd", {}).get("std"),
-                "resp_rate_mean_rpm": None,
-            },
-            "activity": {
-                "steps_mean": summary.get("average_steps"),
-                "steps_std": stats.get("steps", {}).get("std"),
-                "active_minutes_mean": summary.get("active_minutes"),
-                "training_load_mean": None,
-                "strain_mean": None,
-            },
-            "stress": {
-                "stress_index_mean": summary.get("stress_index"),
-                "stress_index_std": stats.get("stress_index", {}).get("std"),
-                "high_stress_minutes_mean": None,
-            },
-        },
-        "derived_scores": compute_scores(summary),
-        "notable_trends": notable_trends,
-        "alerts": [],
-    }
+    cache_key = (user_id, window_days, record.version)
+    cached = SUMMARY_CACHE.get(cache_key)
+    if cached is not None:
+        # Callers may add fields to the payload; the cached copy stays untouched.
+        return copy.deepcopy(cached)
+    with observe_stage("wearables_summary"):
+        if SUMMARY_VERSIONS.get(user_id) != record.version:
+            SUMMARY_CACHE.discard_where(lambda key: key[0] == user_id and key[2] != record.version)
+            SUMMARY_VERSIONS[user_id] = record.version
+        summary = SummaryPipeline.from_index(persona_window_index(record), window_days).build()
+    SUMMARY_CACHE.set(cache_key, summary)
+    return copy.deepcopy(summary)
+
+
+def invalidate_persona_data(persona_id: str | None = None) -> None:
+    PERSONA_STORE.invalidate(persona_id)
+    if persona_id is None:
+        SUMMARY_CACHE.clear()
+    else:
+        SUMMARY_CACHE.discard_where(lambda key: key[0] == persona_id)
 
 
 def build_wearables_summary_from_series(series: list[dict[str, Any]], window_days: int) -> dict[str, Any]:
-    window = series[-window_days:] if window_days else series
-    summary = summarize_series(window)
-    baseline_summary = summarize_series(series)
-    stats = compute_stats(window, [
-        "steps",
-        "sleep_hours",
-        "resting_hr",
-        "hrv_rmssd",
-        "stress_index",
-        "calories_burned",
-        "sleep_efficiency",
-        "active_minutes",
-    ])
+    return SummaryPipeline.from_series(series, window_days).build()
 
-    return {
-        "window_days": window_days,
-        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
-        "data_quality": {
-            "coverage_pct": min(len(window) / float(window_days or 1), 1.0),
-            "missingness_notes": [],
-            "device_sources": ["demo"],
-        },
-        "demographics": {"age": None, "sex": None, "timezone": "UTC"},
-        "baselines": {
-            "baseline_window_days": len(series),
-            "sleep_duration_mean_h": baseline_summary.get("average_sleep_hours"),
-            "hrv_rmssd_mean_ms": baseline_summary.get("hrv_rmssd"),
-            "resting_hr_mean_bpm": baseline_summary.get("average_resting_hr"),
-            "steps_mean": baseline_summary.get("average_steps"),
-        },
-        "aggregates": {
-            "sleep": {
-                "duration_mean_h": summary.get("average_sleep_hours"),
-                "duration_std_h": stats.get("sleep_hours", {}).get("std"),
-                "efficiency_mean_pct": summary.get("sleep_efficiency"),
-                "efficiency_std_pct": stats.get("sleep_efficiency", {}).get("std"),
-                "bedtime_mean_local": None,
-                "bedtime_std_min": None,
-                "wake_time_mean_local": None,
-                "wake_time_std_min": None,
-                "awakenings_mean": None,
-            },
-            "recovery": {
-                "resting_hr_mean_bpm": summary.get("average_resting_hr"),
-                "resting_hr_std_bpm": stats.get("resting_hr", {}).get("std"),
-                "hrv_rmssd_mean_ms": summary.get("hrv_rmssd"),
-                "hrv_rmssd_std_ms": stats.get("hrv_rmssd", {}).get("std"),
-                "resp_rate_mean_rpm": None,
-            },
-            "activity": {
-                "steps_mean": summary.get("average_steps"),
-                "steps_std": stats.get("steps", {}).get("std"),
-                "active_minutes_mean": summary.get("active_minutes"),
-                "training_load_mean": None,
-                "strain_mean": None,
-            },
-            "stress": {
-                "stress_index_mean": summary.get("stress_index"),
-                "stress_index_std": stats.get("stress_index", {}).get("std"),
-                "high_stress_minutes_mean": None,
-            },
-        },
-        "derived_scores": compute_scores(summary),
-        "notable_trends": [],
-        "alerts": [],
-    }
 
-
-def coaching_context_from_meeting(detail: dict[str, Any]) -> dict[str, Any]:
-    plan = detail.get("plan") or {}
-    coach_brief = []
-    goals = []
-    for domain, value in plan.items():
-        if not isinstance(value, dict):
-            continue
-        baseline = value.get("baseline")
-        if baseline:
-            coach_brief.append(f"{domain}: {baseline}")
-        smart_goals = value.get("smartGoals") or []
-        for idx, goal in enumerate(smart_goals[:2]):
-            goals.append(
-                {
-                    "id": f"{domain}_{idx}",
-                    "domain": domain,
-                    "target": goal,
-                    "horizon_weeks": None,
-                    "priority": "medium",
-                }
-            )
-    return {
-        "meeting_id": detail.get("id") or "",
-        "meeting_date": (detail.get("createdAt") or "")[:10],
-        "source": "scribe_summary",
-        "coach_brief": coach_brief,
-        "goals": goals,
-        "constraints": [],
-        "plan": {
-            "weekly_actions": [
-                {"id": f"action_{idx}", "action": goal, "frequency": "weekly", "notes": ""}
-                for idx, goal in enumerate([g["target"] for g in goals][:6])
-            ],
-            "tracking_preferences": {"check_in_day": "Sunday", "preferred_style": "direct_and_brief"},
-        },
-        "open_questions": [],
-    }
+def build_wearables_summary_from_upload(upload_id: str, window_days: int) -> dict[str, Any]:
+    dataset = UPLOAD_STORE.get(upload_id)
+    if dataset is None:
+        raise KeyError("Upload not found.")
+    return build_wearables_summary_from_series(dataset.series, window_days)
 
 
 async def fetch_meeting_context(meeting_id: str) -> dict[str, Any]:
-    cached = MEETING_CACHE.get(meeting_id)
-    if cached and cached.get("expires_at", 0) > time.time():
-        return cached["data"]
-    url = f"{SCRIBE_API_BASE_URL}/api/meetings/{meeting_id}"
-    async with httpx.AsyncClient(timeout=10) as client:
-        response = await client.get(url)
-    if response.status_code != 200:
-        raise RuntimeError("Unable to load meeting context.")
-    detail = response.json()
-    context = coaching_context_from_meeting(detail)
-    MEETING_CACHE[meeting_id] = {"data": context, "expires_at": time.time() + MEETING_CACHE_TTL}
-    return context
-
-
-def normalize_upload_data(raw_data: list[dict[str, Any]]) -> list[dict[str, Any]]:
-    if not isinstance(raw_data, list):
-        return []
-    normalized = []
-    for entry in raw_data:
-        normalized.append(
-            {
-                "date": entry.get("date"),
-                "steps": float(entry.get("steps") or entry.get("average_steps") or 0),
-                "sleep_hours": float(entry.get("sleep_hours") or entry.get("sleep") or 0),
-                "resting_hr": float(entry.get("resting_hr") or entry.get("average_resting_hr") or 0),
-                "hrv_rmssd": float(entry.get("hrv_rmssd") or entry.get("hrv") or 0),
-                "stress_index": float(entry.get("stress_index") or entry.get("stress") or 0),
-                "calories_burned": float(entry.get("calories_burned") or entry.get("calories") or 0),
-                "sleep_efficiency": float(entry.get("sleep_efficiency") or 0),
-                "active_minutes": float(entry.get("active_minutes") or 0),
-                "awakenings": float(entry.get("awakenings") or 0),
-                "sleep_stage_rem": float(entry.get("sleep_stage_rem") or 0),
-                "sleep_stage_deep": float(entry.get("sleep_stage_deep") or 0),
-                "sleep_stage_light": float(entry.get("sleep_stage_light") or 0),
-            }
-        )
-    return normalized
+    with observe_stage("meeting_context"):
+        return await MEETING_CACHE.get(meeting_id)
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template so ids in paths don't create a series per request.
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, method=request.method, route=route, status=status)
+
+
+@app.get("/api/profiles/{profile_id}")
+def get_profile(profile_id: str, request: Request) -> dict[str, Any]:
+    if not is_profile_admin(request):
+        return JSONResponse(status_code=403, content={"error": "Profiling is not allowed."})
+    profile = PROFILE_STORE.load(profile_id)
+    if profile is None:
+        return JSONResponse(status_code=404, content={"error": "Profile not found."})
+    return profile
 
 
 @app.get("/api/health")
@@ -366,6 +184,56 @@ def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/api/cache/stats")
+def cache_stats() -> dict[str, Any]:
+    return {
+        "personas": PERSONA_STORE.stats(),
+        "summaries": SUMMARY_CACHE.stats(),
+        "llm_responses": LLM_CACHE.stats() if LLM_CACHE else None,
+        "meetings": MEETING_CACHE.stats(),
+        "uploads": UPLOAD_STORE.stats(),
+    }
+
+
+def cache_metrics() -> list[str]:
+    stats = {name: values for name, values in cache_stats().items() if values}
+    lines: list[str] = []
+    for metric, key, kind, documentation in (
+        ("cache_hits_total", "hits", "counter", "Cache lookups that found an entry."),
+        ("cache_misses_total", "misses", "counter", "Cache lookups that found nothing."),
+        ("cache_evictions_total", "evictions", "counter", "Entries evicted to stay within cache bounds."),
+        ("cache_entries", "size", "gauge", "Entries currently held."),
+    ):
+        samples = [({"cache": name}, values[key]) for name, values in stats.items() if key in values]
+        lines.extend(sampled_metric(metric, kind, documentation, samples))
+    return lines
+
+
+REGISTRY.register_collector(cache_metrics)
+
+
+@app.get("/metrics")
+def metrics() -> PlainTextResponse:
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+def admin_required(request: Request) -> JSONResponse | None:
+    """The 403 response for callers without the admin token (PROFILE_ADMIN_TOKEN), else None."""
+    if is_profile_admin(request):
+        return None
+    return JSONResponse(status_code=403, content={"error": "Admin token required."})
+
+
+@app.post("/api/cache/invalidate")
+def invalidate_cache(request: Request, payload: dict[str, Any] | None = Body(default=None)) -> dict[str, Any]:
+    denied = admin_required(request)
+    if denied is not None:
+        return denied
+    persona_id = (payload or {}).get("persona_id")
+    invalidate_persona_data(str(persona_id) if persona_id else None)
+    return {"status": "ok", "persona_id": persona_id}
+
+
 @app.get("/personas")
 def list_personas() -> list[dict[str, Any]]:
     return load_personas_index()
@@ -373,12 +241,11 @@ def list_personas() -> list[dict[str, Any]]:
 
 @app.get("/persona/{persona_id}/data")
 def get_persona_data(persona_id: str) -> dict[str, Any]:
-    persona_data = load_persona_data(persona_id)
-    if not persona_data:
+    record = PERSONA_STORE.get(persona_id)
+    if not record:
         return JSONResponse(status_code=404, content={"error": "Persona not found."})
-    summary = summarize_series(persona_data.get("data", []))
-    response = dict(persona_data)
-    response["summary"] = summary
+    response = {**record.data, "data": record.series.to_rows()}
+    response["summary"] = summarize_series(record.series)
     return response
 
 
@@ -390,10 +257,23 @@ def get_wearables_summary(user_id: str, window_days: int = 14) -> dict[str, Any]
         return JSONResponse(status_code=404, content={"error": "User not found."})
 
 
+@app.post("/meetings/sync")
+async def sync_meeting_mirror(request: Request) -> dict[str, Any]:
+    denied = admin_required(request)
+    if denied is not None:
+        return denied
+    try:
+        return await sync_meetings(MEETING_CACHE, concurrency=MEETING_SYNC_CONCURRENCY)
+    except Exception:
+        return JSONResponse(status_code=502, content={"error": "Unable to sync meetings."})
+
+
 @app.get("/meetings/{meeting_id}/context")
 async def get_meeting_context(meeting_id: str) -> dict[str, Any]:
     try:
         return await fetch_meeting_context(meeting_id)
+    except MeetingNotFound:
+        return JSONResponse(status_code=404, content={"error": "Meeting not found."})
     except Exception:
         return JSONResponse(status_code=502, content={"error": "Unable to load meeting context."})
 
@@ -404,37 +284,62 @@ async def upload_data(
     payload: dict[str, Any] | list[dict[str, Any]] | None = Body(default=None),
 ) -> dict[str, Any]:
     try:
-        data: list[dict[str, Any]] = []
+        ingest = UploadIngest()
         if file:
-            content = (await file.read()).decode("utf-8")
-            if file.filename and file.filename.endswith(".json"):
-                parsed = json.loads(content)
-                data = normalize_upload_data(parsed.get("data") if isinstance(parsed, dict) else parsed)
-            elif file.filename and file.filename.endswith(".csv"):
-                import csv
-
-                records = list(csv.DictReader(content.splitlines()))
-                data = normalize_upload_data(records)
+            ingest = await ingest_upload_file(file)
         elif payload is not None:
-            if isinstance(payload, dict) and "data" in payload:
-                data = normalize_upload_data(payload.get("data"))
+            if isinstance(payload, dict) and isinstance(payload.get("data"), list):
+                ingest.extend(payload["data"])
             elif isinstance(payload, list):
-                data = normalize_upload_data(payload)
+                ingest.extend(payload)
 
-        if not data:
+        if not len(ingest.series):
             return JSONResponse(status_code=400, content={"error": "No data uploaded."})
 
-        summary = summarize_series(data)
-        app.state.uploaded_data = {"data": data, "summary": summary}
-        return {"data": data, "summary": summary}
+        summary = ingest.summary()
+        dataset = UPLOAD_STORE.add(ingest.series, summary)
+        # The rows stay server-side; clients page through them with GET /uploads/{upload_id}/data.
+        return {"upload_id": dataset.upload_id, "rows": len(dataset), "summary": summary}
+    except UploadTooLarge as exc:
+        return JSONResponse(status_code=413, content={"error": str(exc)})
     except Exception:
         return JSONResponse(status_code=400, content={"error": "Unable to parse uploaded data."})
 
 
+@app.get("/uploads/{upload_id}/summary")
+def get_upload_summary(upload_id: str, window_days: int = 14) -> dict[str, Any]:
+    try:
+        return build_wearables_summary_from_upload(upload_id, window_days)
+    except KeyError:
+        return JSONResponse(status_code=404, content={"error": "Upload not found."})
+
+
+@app.get("/uploads/{upload_id}/data")
+def get_upload_data(upload_id: str, offset: int = 0, limit: int = UPLOAD_PAGE_MAX_ROWS) -> dict[str, Any]:
+    dataset = UPLOAD_STORE.get(upload_id)
+    if dataset is None:
+        return JSONResponse(status_code=404, content={"error": "Upload not found."})
+    offset = max(offset, 0)
+    limit = min(max(limit, 0), UPLOAD_PAGE_MAX_ROWS)
+    return {
+        "upload_id": upload_id,
+        "offset": offset,
+        "total": len(dataset),
+        "data": dataset.series[offset : offset + limit].to_rows(),
+    }
+
+
+@app.delete("/uploads/{upload_id}")
+def delete_upload(upload_id: str) -> dict[str, Any]:
+    if not UPLOAD_STORE.remove(upload_id):
+        return JSONResponse(status_code=404, content={"error": "Upload not found."})
+    return {"status": "deleted", "upload_id": upload_id}
+
+
 def is_valid_chat_payload(body: dict[str, Any]) -> bool:
     if not isinstance(body, dict):
         return False
-    if not isinstance(body.get("metrics"), dict):
+    if not isinstance(body.get("metrics"), dict) and not body.get("upload_id"):
         return False
     if not isinstance(body.get("query"), str):
         return False
@@ -445,8 +350,21 @@ def is_valid_chat_payload(body: dict[str, Any]) -> bool:
     return True
 
 
-@app.post("/chat")
-async def chat(payload: dict[str, Any] = Body(...)) -> dict[str, Any]:
+def empty_coaching_context() -> dict[str, Any]:
+    return {
+        "meeting_id": "",
+        "meeting_date": "",
+        "source": "none",
+        "coach_brief": [],
+        "goals": [],
+        "constraints": [],
+        "plan": {"weekly_actions": [], "tracking_preferences": {}},
+        "open_questions": [],
+    }
+
+
+async def resolve_chat_request(payload: dict[str, Any]) -> tuple[dict[str, Any], dict[str, Any], str] | JSONResponse:
+    """Returns (wearables_summary, coaching_context, user_query) for a chat payload, or an error response."""
     if "user_id" in payload or "message" in payload:
         user_id = payload.get("user_id")
         if not user_id:
@@ -457,57 +375,76 @@ async def chat(payload: dict[str, Any] = Body(...)) -> dict[str, Any]:
             wearables_summary = build_wearables_summary(user_id, window_days)
         except KeyError:
             return JSONResponse(status_code=404, content={"error": "User not found."})
-        coaching_context = {
-            "meeting_id": "",
-            "meeting_date": "",
-            "source": "none",
-            "coach_brief": [],
-            "goals": [],
-            "constraints": [],
-            "plan": {"weekly_actions": [], "tracking_preferences": {}},
-            "open_questions": [],
-        }
+        coaching_context = empty_coaching_context()
         meeting_id = payload.get("meeting_id")
         if meeting_id:
             try:
                 coaching_context = await fetch_meeting_context(str(meeting_id))
+            except MeetingNotFound:
+                return JSONResponse(status_code=404, content={"error": "Meeting not found."})
             except Exception:
                 return JSONResponse(status_code=502, content={"error": "Unable to load meeting context."})
-        response = await generate_coach_response(
-            wearables_summary=wearables_summary,
-            coaching_context=coaching_context,
-            user_query=message,
-        )
-        return response
+        return wearables_summary, coaching_context, message
 
     if not is_valid_chat_payload(payload):
         return JSONResponse(status_code=400, content={"error": "Invalid request payload."})
 
-    metrics = payload.get("metrics", {})
     query = payload.get("query")
     series = payload.get("series")
     window_days = int(payload.get("window_days") or 14)
     meeting_context = payload.get("meeting_context")
-    series_data = series if isinstance(series, list) else []
-    wearables_summary = build_wearables_summary_from_series(series_data, window_days)
+    upload_id = payload.get("upload_id")
+    if upload_id:
+        try:
+            wearables_summary = build_wearables_summary_from_upload(str(upload_id), window_days)
+        except KeyError:
+            return JSONResponse(status_code=404, content={"error": "Upload not found."})
+    else:
+        series_data = series if isinstance(series, list) else []
+        wearables_summary = build_wearables_summary_from_series(series_data, window_days)
     coaching_context = (
         coaching_context_from_meeting(meeting_context)
         if isinstance(meeting_context, dict)
-        else {
-            "meeting_id": "",
-            "meeting_date": "",
-            "source": "none",
-            "coach_brief": [],
-            "goals": [],
-            "constraints": [],
-            "plan": {"weekly_actions": [], "tracking_preferences": {}},
-            "open_questions": [],
-        }
+        else empty_coaching_context()
     )
+    return wearables_summary, coaching_context, query or ""
 
+
+def format_sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.post("/chat")
+async def chat(payload: dict[str, Any] = Body(...)) -> dict[str, Any]:
+    resolved = await resolve_chat_request(payload)
+    if isinstance(resolved, JSONResponse):
+        return resolved
+    wearables_summary, coaching_context, user_query = resolved
     response = await generate_coach_response(
         wearables_summary=wearables_summary,
         coaching_context=coaching_context,
-        user_query=query or "",
+        user_query=user_query,
     )
     return response
+
+
+@app.post("/chat/stream")
+async def chat_stream(payload: dict[str, Any] = Body(...)):
+    resolved = await resolve_chat_request(payload)
+    if isinstance(resolved, JSONResponse):
+        return resolved
+    wearables_summary, coaching_context, user_query = resolved
+
+    async def events():
+        async for event, data in stream_coach_response(
+            wearables_summary=wearables_summary,
+            coaching_context=coaching_context,
+            user_query=user_query,
+        ):
+            yield format_sse(event, data)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
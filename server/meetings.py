@@ -0,0 +1,366 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+from urllib.parse import quote
+
+import httpx
+
+from cache import LRUCache
+
+
+class MeetingNotFound(LookupError):
+    pass
+
+
+def coaching_context_from_meeting(detail: dict[str, Any]) -> dict[str, Any]:
+    plan = detail.get("plan") or {}
+    coach_brief = []
+    goals = []
+    for domain, value in plan.items():
+        if not isinstance(value, dict):
+            continue
+        baseline = value.get("baseline")
+        if baseline:
+            coach_brief.append(f"{domain}: {baseline}")
+        smart_goals = value.get("smartGoals") or []
+        for idx, goal in enumerate(smart_goals[:2]):
+            goals.append(
+                {
+                    "id": f"{domain}_{idx}",
+                    "domain": domain,
+                    "target": goal,
+                    "horizon_weeks": None,
+                    "priority": "medium",
+                }
+            )
+    return {
+        "meeting_id": detail.get("id") or "",
+        "meeting_date": (detail.get("createdAt") or "")[:10],
+        "source": "scribe_summary",
+        "coach_brief": coach_brief,
+        "goals": goals,
+        "constraints": [],
+        "plan": {
+            "weekly_actions": [
+                {"id": f"action_{idx}", "action": goal, "frequency": "weekly", "notes": ""}
+                for idx, goal in enumerate([g["target"] for g in goals][:6])
+            ],
+            "tracking_preferences": {"check_in_day": "Sunday", "preferred_style": "direct_and_brief"},
+        },
+        "open_questions": [],
+    }
+
+
+def create_scribe_client(transport: httpx.AsyncBaseTransport | None = None) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=float(os.getenv("SCRIBE_TIMEOUT_SECONDS", "10")),
+        limits=httpx.Limits(
+            max_connections=int(os.getenv("SCRIBE_MAX_CONNECTIONS", "20")),
+            max_keepalive_connections=int(os.getenv("SCRIBE_MAX_KEEPALIVE_CONNECTIONS", "10")),
+        ),
+        transport=transport,
+    )
+
+
+class MeetingMirror:
+    """Local on-disk copy of Scribe meeting contexts.
+
+    Each meeting's coaching context lives in `<root>/<meeting_id>.json`; `index.json`
+    records the `createdAt`/`status` each file was synced from so syncs only
+    refetch meetings that are new or changed.
+
+    Methods do blocking file I/O; async callers run them through `asyncio.to_thread`.
+    Index changes stay in memory until `flush`, which only rewrites `index.json` when dirty.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.index_path = self.root / "index.json"
+        self._index: dict[str, dict[str, Any]] | None = None
+        self._lock = threading.Lock()
+        self._dirty = False
+
+    def context_path(self, meeting_id: str) -> Path:
+        return self.root / f"{quote(meeting_id, safe='')}.json"
+
+    @property
+    def index(self) -> dict[str, dict[str, Any]]:
+        with self._lock:
+            return self._load_index()
+
+    def _load_index(self) -> dict[str, dict[str, Any]]:
+        if self._index is None:
+            try:
+                self._index = json.loads(self.index_path.read_text(encoding="utf-8"))
+            except (FileNotFoundError, ValueError):
+                self._index = {}
+        return self._index
+
+    def read(self, meeting_id: str) -> dict[str, Any] | None:
+        try:
+            return json.loads(self.context_path(meeting_id).read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def needs_sync(self, listing: dict[str, Any]) -> bool:
+        known = self.index.get(str(listing.get("id")))
+        if known is None or not self.context_path(str(listing.get("id"))).exists():
+            return True
+        return known.get("createdAt") != listing.get("createdAt") or known.get("status") != listing.get("status")
+
+    def write(self, meeting_id: str, context: dict[str, Any], source: dict[str, Any], flush: bool = True) -> None:
+        self._write_json(self.context_path(meeting_id), context)
+        with self._lock:
+            self._load_index()[meeting_id] = {
+                "createdAt": source.get("createdAt"),
+                "status": source.get("status"),
+                "synced_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            }
+            self._dirty = True
+        if flush:
+            self.flush()
+
+    def remove(self, meeting_id: str) -> None:
+        self.context_path(meeting_id).unlink(missing_ok=True)
+        with self._lock:
+            if self._load_index().pop(meeting_id, None) is not None:
+                self._dirty = True
+
+    def known_ids(self) -> list[str]:
+        with self._lock:
+            return list(self._load_index())
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = dict(self._load_index())
+            self._dirty = False
+        self._write_json(self.index_path, payload)
+
+    def _write_json(self, path: Path, payload: Any) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+
+@dataclass
+class MeetingEntry:
+    context: dict[str, Any] | None
+    fetched_at: float
+
+
+class MeetingContextCache:
+    """Bounded LRU of meeting coaching contexts fetched from Scribe.
+
+    Concurrent misses for one meeting share a single fetch, contexts older than
+    `ttl_seconds` are served stale while a background refresh runs (up to
+    `stale_seconds` more), and 404s are remembered for `negative_ttl_seconds`. Past
+    that window, or after eviction, the mirror answers before Scribe is awaited. Fetched
+    contexts are mirrored at once, but the mirror index is flushed at most every
+    `mirror_flush_seconds`.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        ttl_seconds: float = 300,
+        stale_seconds: float = 3600,
+        negative_ttl_seconds: float = 60,
+        max_entries: int = 256,
+        client: httpx.AsyncClient | None = None,
+        mirror: MeetingMirror | None = None,
+        mirror_flush_seconds: float = 5,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.entries = LRUCache(max_entries, name="meetings")
+        self.fetches = 0
+        self.stale_served = 0
+        self.negative_hits = 0
+        self._client = client
+        self.mirror = mirror
+        self.mirror_hits = 0
+        self.mirror_flush_seconds = mirror_flush_seconds
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._flush_task: asyncio.Task | None = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = create_scribe_client()
+        return self._client
+
+    def set_client(self, client: httpx.AsyncClient | None) -> None:
+        self._client = client
+
+    async def close(self) -> None:
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+        flush_task, self._flush_task = self._flush_task, None
+        if flush_task is not None:
+            flush_task.cancel()
+        if self.mirror is not None and self.mirror.dirty:
+            await asyncio.to_thread(self.mirror.flush)
+
+    async def get(self, meeting_id: str) -> dict[str, Any]:
+        entry = self.entries.get(meeting_id)
+        if entry is not None:
+            age = time.monotonic() - entry.fetched_at
+            if entry.context is None:
+                if age < self.negative_ttl_seconds:
+                    self.negative_hits += 1
+                    raise MeetingNotFound(meeting_id)
+            elif age < self.ttl_seconds:
+                return entry.context
+            elif age < self.ttl_seconds + self.stale_seconds:
+                self.stale_served += 1
+                self._start_fetch(meeting_id)
+                return entry.context
+        if self.mirror is not None:
+            context = await asyncio.to_thread(self.mirror.read, meeting_id)
+            if context is not None:
+                self.mirror_hits += 1
+                self.store(meeting_id, context)
+                if entry is not None:
+                    self._start_fetch(meeting_id)  # Expired: answer from the mirror, recheck Scribe in the background.
+                return context
+        return await asyncio.shield(self._start_fetch(meeting_id))
+
+    def store(self, meeting_id: str, context: dict[str, Any]) -> None:
+        self.entries.set(meeting_id, MeetingEntry(context, time.monotonic()))
+
+    def refresh(self, meeting_id: str) -> None:
+        """Marks a cached context as just fetched; sync calls this for meetings Scribe lists as unchanged."""
+        entry = self.entries.peek(meeting_id)
+        if entry is not None and entry.context is not None:
+            entry.fetched_at = time.monotonic()
+
+    def _start_fetch(self, meeting_id: str) -> asyncio.Task:
+        task = self._inflight.get(meeting_id)
+        if task is None:
+            task = asyncio.create_task(self._fetch(meeting_id))
+            self._inflight[meeting_id] = task
+            task.add_done_callback(lambda done: self._fetch_done(meeting_id, done))
+        return task
+
+    def _fetch_done(self, meeting_id: str, task: asyncio.Task) -> None:
+        if self._inflight.get(meeting_id) is task:
+            del self._inflight[meeting_id]
+        if not task.cancelled():
+            task.exception()  # Background refresh failures are not fatal; keep serving the stale entry.
+
+    async def _fetch(self, meeting_id: str) -> dict[str, Any]:
+        self.fetches += 1
+        response = await self.client.get(f"{self.base_url}/api/meetings/{quote(meeting_id, safe='')}")
+        if response.status_code == 404:
+            self.entries.set(meeting_id, MeetingEntry(None, time.monotonic()))
+            raise MeetingNotFound(meeting_id)
+        if response.status_code != 200:
+            raise RuntimeError("Unable to load meeting context.")
+        detail = response.json()
+        context = coaching_context_from_meeting(detail)
+        self.store(meeting_id, context)
+        if self.mirror is not None:
+            await asyncio.to_thread(self.mirror.write, meeting_id, context, detail, False)
+            self._schedule_flush()
+        return context
+
+    def _schedule_flush(self) -> None:
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.mirror_flush_seconds)
+        await asyncio.to_thread(self.mirror.flush)
+
+    def stats(self) -> dict[str, Any]:
+        stats = self.entries.stats()
+        stats.update(
+            {
+                "fetches": self.fetches,
+                "inflight": len(self._inflight),
+                "stale_served": self.stale_served,
+                "negative_hits": self.negative_hits,
+                "mirror_hits": self.mirror_hits,
+            }
+        )
+        return stats
+
+
+async def sync_meetings(cache: MeetingContextCache, concurrency: int = 8, prune: bool = True) -> dict[str, Any]:
+    """Lists Scribe meetings and mirrors every new or changed one with bounded parallelism."""
+    mirror = cache.mirror
+    if mirror is None:
+        raise RuntimeError("Meeting mirror is not configured.")
+    response = await cache.client.get(f"{cache.base_url}/api/meetings")
+    response.raise_for_status()
+    listings = [item for item in response.json() if isinstance(item, dict) and item.get("id")]
+
+    def partition() -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+        pending, unchanged = [], []
+        for item in listings:
+            (pending if mirror.needs_sync(item) else unchanged).append(item)
+        return pending, unchanged
+
+    pending, unchanged = await asyncio.to_thread(partition)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    failed: list[str] = []
+
+    async def mirror_one(listing: dict[str, Any]) -> None:
+        meeting_id = str(listing["id"])
+        async with semaphore:
+            try:
+                detail_response = await cache.client.get(
+                    f"{cache.base_url}/api/meetings/{quote(meeting_id, safe='')}"
+                )
+                detail_response.raise_for_status()
+                context = coaching_context_from_meeting(detail_response.json())
+            except Exception:
+                failed.append(meeting_id)
+                return
+        await asyncio.to_thread(mirror.write, meeting_id, context, listing, False)
+        cache.store(meeting_id, context)
+
+    await asyncio.gather(*(mirror_one(item) for item in pending))
+    for item in unchanged:
+        cache.refresh(str(item["id"]))
+    removed = 0
+    if prune:
+        listed_ids = {str(item["id"]) for item in listings}
+        stale_ids = [known for known in mirror.known_ids() if known not in listed_ids]
+        for meeting_id in stale_ids:
+            await asyncio.to_thread(mirror.remove, meeting_id)
+        removed = len(stale_ids)
+    await asyncio.to_thread(mirror.flush)  # One index write per sync batch.
+    return {
+        "listed": len(listings),
+        "fetched": len(pending) - len(failed),
+        "unchanged": len(unchanged),
+        "removed": removed,
+        "failed": sorted(failed),
+    }
+
+
+async def run_periodic_sync(cache: MeetingContextCache, interval_seconds: float, concurrency: int) -> None:
+    while True:
+        try:
+            await sync_meetings(cache, concurrency=concurrency)
+        except Exception:
+            pass  # Scribe being unreachable must not kill the loop; the next tick retries.
+        await asyncio.sleep(interval_seconds)
@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def escape_label(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels: dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{escape_label(value)}"' for key, value in labels.items()) + "}"
+
+
+def format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter per label set, rendered in the Prometheus text format."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(tuple(str(labels.get(name, "")) for name in self.labelnames), 0)
+
+    def collect(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{format_labels(dict(zip(self.labelnames, key)))} {format_value(value)}" for key, value in items
+        ]
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram per label set."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[tuple, list[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # One slot per bucket, then sum and count.
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for idx, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[idx] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: Any) -> int:
+        series = self._series.get(tuple(str(labels.get(name, "")) for name in self.labelnames))
+        return series[-1] if series else 0
+
+    def collect(self) -> list[str]:
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        lines = []
+        for key, series in items:
+            labels = dict(zip(self.labelnames, key))
+            for bound, bucket_count in zip(self.buckets + (math.inf,), series[:-2] + [series[-1]]):
+                lines.append(f"{self.name}_bucket{format_labels({**labels, 'le': format_value(bound)})} {bucket_count}")
+            lines.append(f"{self.name}_sum{format_labels(labels)} {format_value(series[-2])}")
+            lines.append(f"{self.name}_count{format_labels(labels)} {series[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """Owns the process's metrics plus callbacks that sample values kept elsewhere (e.g. cache stats)."""
+
+    def __init__(self) -> None:
+        self._metrics: list[Counter | Histogram] = []
+        self._collectors: list[Callable[[], list[str]]] = []
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self, name: str, documentation: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], list[str]]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.collect())
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+def sampled_metric(name: str, kind: str, documentation: str, samples: list[tuple[dict[str, Any], float]]) -> list[str]:
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+    lines.extend(f"{name}{format_labels(labels)} {format_value(value)}" for labels, value in samples)
+    return lines
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "Time to produce a response (headers, for streaming routes), by route template.",
+    ("method", "route", "status"),
+)
+STAGE_SECONDS = REGISTRY.histogram(
+    "pipeline_stage_duration_seconds",
+    "Time spent in one stage of the summary/chat pipeline.",
+    ("stage",),
+)
+SCHEMA_VALIDATION_FAILURES = REGISTRY.counter(
+    "llm_schema_validation_failures_total",
+    "Model outputs that failed to parse or validate, by pipeline step.",
+    ("step",),
+)
+LOCAL_JSON_REPAIRS = REGISTRY.counter(
+    "llm_local_json_repairs_total",
+    "Invalid model outputs fixed by json_repair, each saving a fixup completion, by pipeline step.",
+    ("step",),
+)
+COACH_FALLBACKS = REGISTRY.counter(
+    "coach_fallback_responses_total",
+    "Chat turns answered with safe_fallback_response.",
+    ("mode",),
+)
+LLM_TOKENS = REGISTRY.counter(
+    "llm_tokens_total",
+    "Tokens reported by the OpenAI usage block, by call and kind (prompt, completion, and cached: the "
+    "prompt tokens served from the provider's prefix cache).",
+    ("call", "kind"),
+)
+PROMPT_SECTION_TOKENS = REGISTRY.histogram(
+    "prompt_section_tokens",
+    "Estimated tokens per prompt section at build time, after compaction and budget trimming.",
+    ("section",),
+    buckets=(32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384),
+)
+PROMPT_TRIMS = REGISTRY.counter(
+    "prompt_context_trims_total",
+    "Context paths dropped to fit PROMPT_TOKEN_BUDGET.",
+    ("path",),
+)
+
+
+def observe_stage(stage: str):
+    return STAGE_SECONDS.time(stage=stage)
+
+
+def record_token_usage(response: Any, call: str) -> None:
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    for kind in ("prompt_tokens", "completion_tokens"):
+        value = getattr(usage, kind, None)
+        if isinstance(value, int):
+            LLM_TOKENS.inc(value, call=call, kind=kind.split("_")[0])
+    details = getattr(usage, "prompt_tokens_details", None)
+    # Older openai clients keep this block as an untyped dict.
+    cached = details.get("cached_tokens") if isinstance(details, dict) else getattr(details, "cached_tokens", None)
+    if isinstance(cached, int):
+        LLM_TOKENS.inc(cached, call=call, kind="cached")
+
+
+def record_prompt_tokens(bundle: Any) -> None:
+    for section, tokens in getattr(bundle, "token_counts", {}).items():
+        PROMPT_SECTION_TOKENS.observe(tokens, section=section)
+    for path in getattr(bundle, "trimmed", ()):
+        PROMPT_TRIMS.inc(path=path)
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import json
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from cache import LRUCache
+from colformat import COLUMNAR_SUFFIX, ColumnarFormatError, read_columnar
+from series import ColumnarSeries
+from stats import WindowIndex
+
+
+@dataclass
+class PersonaRecord:
+    persona_id: str
+    version: str
+    data: dict[str, Any]
+    series: ColumnarSeries
+    window_index: WindowIndex | None = None
+
+
+def file_version(path: Path) -> str | None:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+
+class PersonaStore:
+    """Keeps parsed persona files in memory and reloads them when mtime/size change.
+
+    The day rows are held as a ColumnarSeries and `data` keeps only the remaining
+    metadata. A `<id>.col` file at least as new as `<id>.json` is memory-mapped instead
+    of parsing the JSON. Records are shared between requests; callers must treat them
+    as read-only.
+    """
+
+    def __init__(self, data_root: Path, max_personas: int = 128):
+        self.data_root = Path(data_root)
+        self.index_path = self.data_root / "personas.json"
+        self.persona_dir = self.data_root / "personas"
+        self.records = LRUCache(max_personas, name="personas")
+        self.reloads = 0
+        self._index: tuple[str, list[dict[str, Any]]] | None = None
+        self._index_hits = 0
+        self._index_misses = 0
+        self._lock = threading.Lock()
+
+    def persona_path(self, persona_id: str) -> Path:
+        return self.persona_dir / f"{persona_id}.json"
+
+    def source_path(self, persona_id: str) -> Path:
+        json_path = self.persona_path(persona_id)
+        columnar_path = json_path.with_suffix(COLUMNAR_SUFFIX)
+        try:
+            columnar_mtime = columnar_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return json_path
+        try:
+            return columnar_path if columnar_mtime >= json_path.stat().st_mtime_ns else json_path
+        except FileNotFoundError:
+            return columnar_path
+
+    def get(self, persona_id: str) -> PersonaRecord | None:
+        if self.persona_path(persona_id).parent != self.persona_dir:
+            return None
+        path = self.source_path(persona_id)
+        version = file_version(path)
+        if version is None:
+            self.records.pop(persona_id)
+            return None
+        version = f"{path.suffix[1:]}-{version}"
+        record = self.records.get(persona_id)
+        if record is not None and record.version == version:
+            return record
+        if record is not None:
+            self.reloads += 1
+        data, series = self.load(path)
+        record = PersonaRecord(persona_id=persona_id, version=version, data=data, series=series)
+        self.records.set(persona_id, record)
+        return record
+
+    def load(self, path: Path) -> tuple[dict[str, Any], ColumnarSeries]:
+        if path.suffix == COLUMNAR_SUFFIX:
+            try:
+                return read_columnar(path)
+            except ColumnarFormatError:
+                json_path = path.with_suffix(".json")
+                if not json_path.exists():
+                    raise
+                path = json_path
+        data = json.loads(path.read_text(encoding="utf-8"))
+        rows = data.pop("data", None)
+        return data, ColumnarSeries.from_rows(rows if isinstance(rows, list) else [])
+
+    def index(self) -> list[dict[str, Any]]:
+        version = file_version(self.index_path)
+        if version is None:
+            return []
+        with self._lock:
+            if self._index is not None and self._index[0] == version:
+                self._index_hits += 1
+                return self._index[1]
+            self._index_misses += 1
+        personas = json.loads(self.index_path.read_text(encoding="utf-8"))
+        with self._lock:
+            self._index = (version, personas)
+        return personas
+
+    def invalidate(self, persona_id: str | None = None) -> None:
+        if persona_id is None:
+            self.records.clear()
+            with self._lock:
+                self._index = None
+            return
+        self.records.pop(persona_id)
+
+    def stats(self) -> dict[str, Any]:
+        stats = self.records.stats()
+        stats["reloads"] = self.reloads
+        stats["index_hits"] = self._index_hits
+        stats["index_misses"] = self._index_misses
+        return stats
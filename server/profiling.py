@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import functools
+import hmac
+import inspect
+import io
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+
+PROFILE_MODES = ("cprofile", "sample")
+SPAN_LOGGER = logging.getLogger("evida.spans")
+TRACE_SPANS = os.getenv("TRACE_SPANS", "0").lower() in ("1", "true", "yes")
+
+
+def profile_admin_token() -> str | None:
+    return os.getenv("PROFILE_ADMIN_TOKEN") or None
+
+
+@dataclass
+class RequestTrace:
+    request_id: str
+    spans: list[dict[str, Any]] = field(default_factory=list)
+
+
+_REQUEST_TRACE: ContextVar[RequestTrace | None] = ContextVar("request_trace", default=None)
+_SPAN_STACK: ContextVar[tuple[str, ...]] = ContextVar("span_stack", default=())
+
+
+@contextmanager
+def span(name: str, **fields: Any) -> Iterator[None]:
+    """Times a block as a nested span.
+
+    Spans are collected for profiled requests and logged as JSON to `evida.spans`
+    when TRACE_SPANS is set; otherwise this is a no-op.
+    """
+    trace = _REQUEST_TRACE.get()
+    log_spans = TRACE_SPANS
+    if trace is None and not log_spans:
+        yield
+        return
+    parents = _SPAN_STACK.get()
+    token = _SPAN_STACK.set(parents + (name,))
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration_ms = (time.perf_counter() - start) * 1000
+        _SPAN_STACK.reset(token)
+        record = {
+            "span": name,
+            "parent": parents[-1] if parents else None,
+            "depth": len(parents),
+            "duration_ms": round(duration_ms, 3),
+            "request_id": trace.request_id if trace else None,
+            **fields,
+        }
+        if trace is not None:
+            trace.spans.append(record)
+        if log_spans:
+            SPAN_LOGGER.info(json.dumps(record, default=str))
+
+
+def traced(name: str) -> Callable[[Callable], Callable]:
+    """Wraps a sync or async function in a `span` of the given name."""
+
+    def decorate(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with span(name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+class StackSampler:
+    """Samples every other thread's Python stack at a fixed interval into collapsed-stack counts."""
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self.samples: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval_seconds):
+            for thread in threading.enumerate():
+                names[thread.ident] = thread.name
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{Path(code.co_filename).name}:{code.co_name}")
+                    frame = frame.f_back
+                if stack and stack[0].split(":", 1)[1] in ("wait", "select", "_worker", "poll"):
+                    continue  # Idle threads (event loop selector, parked pool workers) are noise.
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.samples[";".join(reversed(stack))] += 1
+
+    def report(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common())
+
+
+class RequestProfiler:
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.profile = cProfile.Profile() if mode == "cprofile" else None
+        interval = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "2")) / 1000
+        self.sampler = StackSampler(interval) if mode == "sample" else None
+
+    def start(self) -> None:
+        if self.profile is not None:
+            self.profile.enable()
+        if self.sampler is not None:
+            self.sampler.start()
+
+    def stop(self) -> None:
+        if self.profile is not None:
+            self.profile.disable()
+        if self.sampler is not None:
+            self.sampler.stop()
+
+    def report(self) -> str:
+        if self.sampler is not None:
+            return self.sampler.report()
+        stream = io.StringIO()
+        pstats.Stats(self.profile, stream=stream).sort_stats("cumulative").print_stats(60)
+        return stream.getvalue()
+
+
+class ProfileStore:
+    """Keeps the most recent `keep` profiles as JSON (plus a pstats dump for cProfile runs)."""
+
+    def __init__(self, root: Path, keep: int = 50):
+        self.root = Path(root)
+        self.keep = keep
+
+    def path(self, profile_id: str) -> Path:
+        return self.root / f"{profile_id}.json"
+
+    def save(self, profile_id: str, profiler: RequestProfiler, summary: dict[str, Any]) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        if profiler.profile is not None:
+            profiler.profile.dump_stats(str(self.root / f"{profile_id}.prof"))
+        payload = {"id": profile_id, "mode": profiler.mode, **summary, "report": profiler.report()}
+        self.path(profile_id).write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        self._prune()
+
+    def load(self, profile_id: str) -> dict[str, Any] | None:
+        path = self.path(profile_id)
+        if path.parent != self.root:
+            return None
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _prune(self) -> None:
+        profiles = sorted(self.root.glob("*.json"), key=lambda path: path.stat().st_mtime_ns)
+        for path in profiles[: max(len(profiles) - self.keep, 0)]:
+            path.unlink(missing_ok=True)
+            path.with_suffix(".prof").unlink(missing_ok=True)
+
+
+def is_profile_admin(request: Request) -> bool:
+    token = profile_admin_token()
+    supplied = request.headers.get("x-admin-token") or ""
+    return token is not None and hmac.compare_digest(supplied.encode(), token.encode())
+
+
+def requested_profile_mode(request: Request) -> str | None:
+    mode = request.headers.get("x-profile") or request.query_params.get("profile")
+    return mode.lower() if mode else None
+
+
+def profiling_middleware(store: ProfileStore) -> Callable:
+    """Builds the HTTP middleware behind `X-Profile: cprofile|sample` (or `?profile=`).
+
+    Only callers presenting PROFILE_ADMIN_TOKEN in `X-Admin-Token` may profile; the flag
+    is ignored for everyone else and their request runs unprofiled. The
+    profile covers the request up to its response headers; cProfile only sees the
+    event-loop thread, so sync routes (run in the threadpool) need `sample` mode.
+    Both modes also observe any concurrent requests sharing the process.
+    """
+
+    async def middleware(request: Request, call_next: Callable) -> Any:
+        mode = requested_profile_mode(request)
+        if mode is not None and not is_profile_admin(request):
+            mode = None
+        if mode is None:
+            if not TRACE_SPANS:
+                return await call_next(request)
+            token = _REQUEST_TRACE.set(RequestTrace(request.headers.get("x-request-id") or uuid.uuid4().hex))
+            try:
+                return await call_next(request)
+            finally:
+                _REQUEST_TRACE.reset(token)
+        if mode not in PROFILE_MODES:
+            return JSONResponse(status_code=400, content={"error": f"Profile mode must be one of {PROFILE_MODES}."})
+
+        profile_id = uuid.uuid4().hex
+        trace = RequestTrace(request.headers.get("x-request-id") or profile_id)
+        token = _REQUEST_TRACE.set(trace)
+        profiler = RequestProfiler(mode)
+        start = time.perf_counter()
+        profiler.start()
+        try:
+            response = await call_next(request)
+        finally:
+            profiler.stop()
+            _REQUEST_TRACE.reset(token)
+        await asyncio.to_thread(
+            store.save,
+            profile_id,
+            profiler,
+            {
+                "request_id": trace.request_id,
+                "method": request.method,
+                "path": request.url.path,
+                "status": response.status_code,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+                "spans": trace.spans,
+            },
+        )
+        response.headers["X-Profile-Id"] = profile_id
+        return response
+
+    return middleware
@@ -7,7 +7,8 @@ B) coaching context: imported coaching calls (goals, constraints, plans)
 
 It produces:
 - system_prompt: strict behavioral policy + safety boundaries
-- developer_prompt: structured context packet (JSON) + response schema requirements
+- developer_prompt: instructions + response schema requirements (a static, cacheable prefix)
+- context_prompt: compact, token-budgeted context packet (JSON)
 - user_prompt: the user's query
 
 Replace the placeholder JSON dicts with real payloads.
@@ -15,10 +16,11 @@ Replace the placeholder JSON dicts with real payloads.
 
 from __future__ import annotations
 
-import json
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional, Tuple
 
+from prompt_packet import compact_json, count_tokens, fit_to_budget, prune_empty
+
 
 # ----------------------------
 # 1) Placeholders (to replace)
@@ -188,6 +190,7 @@ ANALYSIS_SCHEMA: Dict[str, Any] = {
             "type": "array",
             "description": "At most 3 clarifying questions ONLY if necessary due to missing data or ambiguity.",
             "items": {"type": "string"},
+            "default": [],
         },
         "safety": {
             "type": "object",
@@ -255,6 +258,7 @@ RESPONSE_SCHEMA: Dict[str, Any] = {
             "type": "array",
             "description": "At most 3 clarifying questions ONLY if necessary due to missing data or ambiguity.",
             "items": {"type": "string"},
+            "default": [],
         },
         "safety": {
             "type": "object",
@@ -314,14 +318,82 @@ ROBUSTNESS RULES:
 - If population benchmarks are not provided, do NOT claim 'above average'—use baseline comparisons instead.
 - Keep reasoning_trace short and factual.
 
+CONTEXT PACKET GLOSSARY (field -> meaning, unit):
+wearables_summary:
+- window_days: length of the analysed window in days; all aggregates cover this window.
+- data_quality.coverage_pct: share of days in the window with data (0-1). Below 0.7, say the picture is partial.
+- data_quality.missingness_notes: known gaps; mention them when they affect a recommendation.
+- baselines.*: the user's own longer-run means (baseline_window_days, usually 30). Compare against these, never against population norms.
+- aggregates.sleep: duration_mean_h / duration_std_h (hours), efficiency_mean_pct / efficiency_std_pct (0-1 fraction, not percent), bedtime_* and wake_time_* (local clock time and spread in minutes), awakenings_mean (count per night).
+- aggregates.recovery: resting_hr_mean_bpm / resting_hr_std_bpm (beats per minute; lower is usually better), hrv_rmssd_mean_ms / hrv_rmssd_std_ms (milliseconds; higher is usually better), resp_rate_mean_rpm (breaths per minute).
+- aggregates.activity: steps_mean / steps_std (steps per day), active_minutes_mean (minutes per day), training_load_mean and strain_mean (device-specific units; describe direction only).
+- aggregates.stress: stress_index_mean / stress_index_std (device index, 0-100, higher means more stress), high_stress_minutes_mean (minutes per day).
+- derived_scores.*_0_100: rule-based scores from 0 to 100. Read them with score_bands (green/yellow/red) and score_explanations; cite the underlying aggregates as well.
+- notable_trends / alerts: precomputed facts and deterministic flags; you may restate them but do not extend them.
+- A field that is null or absent was not measured: treat it as missing, not as zero.
+coaching_context:
+- coach_brief: the human coach's summary of the user's situation; trust it over your own inferences.
+- goals: id, domain, target, horizon_weeks, priority. Recommendations should name the goal they serve.
+- constraints: hard limits (injuries, schedule, preferences). Never recommend something that breaks one.
+- plan.weekly_actions: actions already agreed with the coach. Build on them before proposing new ones.
+- plan.tracking_preferences: check-in day and preferred tone for the answer.
+- open_questions: unresolved items; prefer these when choosing follow_ups.
+
+CITING METRICS:
+- data_references.metric_path is the dotted path inside wearables_summary, e.g. aggregates.sleep.duration_mean_h or baselines.hrv_rmssd_mean_ms.
+- data_references.value is copied verbatim from the packet; window_days is the window it covers.
+- data_references.comparison names the reference: 'vs baseline', 'trend', 'score band', or 'no baseline available'.
+
 Return JSON that strictly matches the response schema below.
 """
 
+def serialize_schema(schema: Dict[str, Any]) -> str:
+    """Serializes a schema compactly; it is sent once per prompt, never inside the context packet."""
+    return compact_json(schema)
+
+
+# Serialized once per module load and reused by every build_prompt_bundle call.
+SYSTEM_PROMPT = SYSTEM_POLICY.strip()
+DEVELOPER_PREAMBLE = DEVELOPER_INSTRUCTIONS.strip()
+SCHEMA_JSON: List[Tuple[Dict[str, Any], str]] = [
+    (ANALYSIS_SCHEMA, serialize_schema(ANALYSIS_SCHEMA)),
+    (RESPONSE_SCHEMA, serialize_schema(RESPONSE_SCHEMA)),
+]
+# Stands in for the schema when the API already receives it as a json_schema response_format.
+SCHEMA_IN_RESPONSE_FORMAT = "(supplied as the structured-output response_format)"
+
+
+def schema_json(schema: Dict[str, Any]) -> str:
+    for known, text in SCHEMA_JSON:
+        if known is schema:
+            return text
+    return serialize_schema(schema)
+
+
 @dataclass
 class PromptBundle:
+    """
+    `system` and `developer` are the static prefix (policy, instructions, schema):
+    byte-identical for every user and call with the same schema, so providers can
+    serve them from their prompt cache. `context` and `user` carry per-request data
+    and always come last.
+    """
+
     system: str
     developer: str
+    context: str
     user: str
+    # Estimated tokens per section, and the context paths dropped to meet the token budget.
+    token_counts: Dict[str, int] = field(default_factory=dict)
+    trimmed: List[str] = field(default_factory=list)
+
+    def messages(self) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": self.system},
+            {"role": "developer", "content": self.developer},
+            {"role": "developer", "content": self.context},
+            {"role": "user", "content": self.user},
+        ]
 
 
 def build_prompt_bundle(
@@ -329,28 +401,38 @@ def build_prompt_bundle(
     coaching_context: Dict[str, Any],
     user_query: str,
     response_schema: Dict[str, Any],
+    token_budget: Optional[int] = None,
+    schema_in_response_format: bool = False,
 ) -> PromptBundle:
     """
-    Builds a three-message prompt bundle (system/developer/user).
+    Builds a prompt bundle (system/developer prefix, then context and user query).
     This is compatible with most chat-completion APIs.
+
+    The context packet is compact JSON without nulls or empty values. When the
+    whole prompt would exceed `token_budget` tokens, low-priority context is
+    trimmed (see prompt_packet.TRIM_ORDER).
     """
-    context_packet = {
-        "wearables_summary": wearables_summary,
-        "coaching_context": coaching_context,
-        "response_schema": response_schema,
+    user = user_query.strip()
+    schema_text = SCHEMA_IN_RESPONSE_FORMAT if schema_in_response_format else schema_json(response_schema)
+    token_counts = {
+        "system": count_tokens(SYSTEM_PROMPT),
+        "instructions": count_tokens(DEVELOPER_PREAMBLE),
+        "response_schema": count_tokens(schema_text),
+        "user": count_tokens(user),
     }
-
-    developer = "\n\n".join(
-        [
-            DEVELOPER_INSTRUCTIONS.strip(),
-            "CONTEXT_PACKET_JSON:\n" + json.dumps(context_packet, indent=2, ensure_ascii=False),
-        ]
-    )
+    context_packet = prune_empty({"wearables_summary": wearables_summary, "coaching_context": coaching_context})
+    context_budget = token_budget - sum(token_counts.values()) if token_budget else None
+    context_packet, trimmed = fit_to_budget(context_packet, context_budget)
+    for name in ("wearables_summary", "coaching_context"):
+        token_counts[name] = count_tokens(compact_json(context_packet.get(name, {})))
 
     return PromptBundle(
-        system=SYSTEM_POLICY.strip(),
-        developer=developer,
-        user=user_query.strip(),
+        system=SYSTEM_PROMPT,
+        developer=DEVELOPER_PREAMBLE + "\n\nRESPONSE_SCHEMA_JSON:\n" + schema_text,
+        context="CONTEXT_PACKET_JSON:\n" + compact_json(context_packet),
+        user=user,
+        token_counts=token_counts,
+        trimmed=trimmed,
     )
 
 
@@ -364,4 +446,5 @@ if __name__ == "__main__":
 
     print("\n--- SYSTEM ---\n", bundle.system)
     print("\n--- DEVELOPER ---\n", bundle.developer[:2000], "\n... (truncated) ...")
+    print("\n--- CONTEXT ---\n", bundle.context)
     print("\n--- USER ---\n", bundle.user)
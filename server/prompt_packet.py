@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import functools
+import json
+import math
+import os
+from fnmatch import fnmatchcase
+from typing import Any
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken is optional; token counts fall back to a characters-per-token estimate.
+    tiktoken = None
+
+
+CHARS_PER_TOKEN = 4
+TOKENIZER_ENCODING = os.getenv("PROMPT_TOKENIZER_ENCODING", "o200k_base")
+# Providers only cache a prompt prefix of at least this many tokens; the static system + developer
+# messages are kept above it. Without tiktoken, counts are estimates, so checks add ESTIMATE_MARGIN.
+PROMPT_CACHE_MIN_TOKENS = 1024
+ESTIMATE_MARGIN = 1.25
+
+# Context dropped, in order, when a packet is over budget: bookkeeping first, then spreads and
+# baselines, then the plan. Goals, constraints, the coach brief and headline metrics are never trimmed.
+# Each step is a key path; path segments are fnmatch patterns.
+TRIM_ORDER: tuple[tuple[str, ...], ...] = (
+    ("wearables_summary", "generated_at"),
+    ("wearables_summary", "data_quality", "device_sources"),
+    ("wearables_summary", "demographics"),
+    ("coaching_context", "source"),
+    ("coaching_context", "meeting_id"),
+    ("coaching_context", "plan", "tracking_preferences"),
+    ("coaching_context", "plan", "weekly_actions", "*", "notes"),
+    ("wearables_summary", "aggregates", "*", "*_std*"),
+    ("wearables_summary", "baselines"),
+    ("wearables_summary", "data_quality"),
+    ("coaching_context", "plan"),
+    ("wearables_summary", "notable_trends"),
+)
+
+
+def prompt_token_budget() -> int | None:
+    """PROMPT_TOKEN_BUDGET caps the whole prompt (all messages); unset or 0 means no cap."""
+    budget = int(os.getenv("PROMPT_TOKEN_BUDGET", "0") or 0)
+    return budget if budget > 0 else None
+
+
+@functools.lru_cache(maxsize=1)
+def _encoding() -> Any:
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding(TOKENIZER_ENCODING)
+    except Exception:  # Unknown encoding, or the BPE file can't be fetched offline.
+        return None
+
+
+def has_tokenizer() -> bool:
+    return _encoding() is not None
+
+
+def count_tokens(text: str) -> int:
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def compact_json(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def prune_empty(value: Any) -> Any:
+    """Returns a copy of `value` without None, empty strings, empty lists or empty dicts, at any depth."""
+    if isinstance(value, dict):
+        pruned = {key: prune_empty(item) for key, item in value.items()}
+        return {key: item for key, item in pruned.items() if not is_empty(item)}
+    if isinstance(value, list):
+        pruned = [prune_empty(item) for item in value]
+        return [item for item in pruned if not is_empty(item)]
+    return value
+
+
+def is_empty(value: Any) -> bool:
+    return value is None or (isinstance(value, (str, list, dict)) and not value)
+
+
+def drop_path(value: Any, path: tuple[str, ...]) -> bool:
+    """Deletes every key matching `path` in place; returns whether anything was removed."""
+    head, rest = path[0], path[1:]
+    if isinstance(value, list):
+        if head != "*":
+            return False
+        if not rest:
+            removed = bool(value)
+            value.clear()
+            return removed
+        return any([drop_path(item, rest) for item in value])
+    if not isinstance(value, dict):
+        return False
+    keys = [key for key in value if fnmatchcase(key, head)]
+    if not rest:
+        for key in keys:
+            del value[key]
+        return bool(keys)
+    return any([drop_path(value[key], rest) for key in keys])
+
+
+def fit_to_budget(packet: dict[str, Any], budget: int | None) -> tuple[dict[str, Any], list[str]]:
+    """Drops TRIM_ORDER paths from a pruned packet until its compact JSON fits in `budget` tokens.
+
+    Returns the packet and the paths that were dropped. Trimming stops when TRIM_ORDER
+    is exhausted, so a packet can still end up over budget.
+    """
+    trimmed: list[str] = []
+    if budget is None or count_tokens(compact_json(packet)) <= budget:
+        return packet, trimmed
+    for path in TRIM_ORDER:
+        if not drop_path(packet, path):
+            continue
+        packet = prune_empty(packet)
+        trimmed.append(".".join(path))
+        if count_tokens(compact_json(packet)) <= budget:
+            break
+    return packet, trimmed
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import math
+import sys
+from array import array
+from typing import Any, Iterable, Iterator
+
+
+def is_number(value: Any) -> bool:
+    """Whether `value` is a measurement; bools are not, even though they are ints."""
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+# Per-cell kinds, kept only for columns that mix them (see ColumnarSeries.cell_kinds).
+MISSING, INTEGER, FLOAT, NULL = 0, 1, 2, 3
+
+
+def cell_kind(entry: dict[str, Any], field: str) -> int:
+    value = entry.get(field)
+    if is_number(value):
+        return INTEGER if isinstance(value, int) else FLOAT
+    return NULL if value is None and field in entry else MISSING
+
+
+class ColumnarSeries:
+    """A day-ordered wearable series stored as one `array('d')` per field plus a dates column.
+
+    Columns mapped from a columnar file (see colformat.py) are read-only float64
+    memoryviews instead; they support everything here except `append`.
+
+    Rows rebuilt by `row()`/`to_rows()` match the rows that were appended: fields whose
+    values were all ints come back as ints, other fields as floats, and absent keys stay
+    absent. A column that mixes ints with floats, or holds explicit nulls, keeps a
+    `cell_kinds` bytearray (one MISSING/INTEGER/FLOAT/NULL code per day) so each value
+    comes back as it went in. Values no column can hold (strings, bools, nested notes)
+    are kept per day in `extras`, a list that only exists once some day has one.
+    """
+
+    __slots__ = ("dates", "columns", "integer_fields", "cell_kinds", "extras")
+
+    def __init__(
+        self,
+        dates: list[Any],
+        columns: dict[str, array],
+        integer_fields: Iterable[str] = (),
+        cell_kinds: dict[str, bytearray] | None = None,
+        extras: list[dict[str, Any] | None] | None = None,
+    ):
+        self.dates = dates
+        self.columns = columns
+        self.integer_fields = set(integer_fields)
+        self.cell_kinds = cell_kinds or {}
+        self.extras = extras
+
+    @classmethod
+    def empty(cls, fields: Iterable[str]) -> "ColumnarSeries":
+        fields = list(fields)
+        return cls([], {field: array("d") for field in fields}, fields)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[dict[str, Any]], fields: Iterable[str] | None = None) -> "ColumnarSeries":
+        rows = [entry for entry in rows if isinstance(entry, dict)]
+        if fields is None:
+            seen: dict[str, None] = {}
+            for entry in rows:
+                for key, value in entry.items():
+                    if key != "date" and (value is None or is_number(value)):
+                        seen.setdefault(key)
+            fields = seen
+        series = cls.empty(fields)
+        for entry in rows:
+            series.append(entry)
+        return series
+
+    def append(self, entry: dict[str, Any]) -> None:
+        for field, column in self.columns.items():
+            kind = cell_kind(entry, field)
+            kinds = self.cell_kinds.get(field)
+            if kinds is None and not self._fits(field, kind):
+                kinds = self._split(field)
+            if kinds is not None:
+                kinds.append(kind)
+            column.append(entry[field] if kind in (INTEGER, FLOAT) else math.nan)
+        extra = {
+            key: value
+            for key, value in entry.items()
+            if key != "date" and (key not in self.columns or not (value is None or is_number(value)))
+        }
+        if extra and self.extras is None:
+            self.extras = [None] * len(self.dates)
+        if self.extras is not None:
+            self.extras.append(extra or None)
+        self.dates.append(entry.get("date"))
+
+    def _fits(self, field: str, kind: int) -> bool:
+        """Whether a `kind` cell keeps `field` a plain int or float column, updating its type if need be."""
+        if kind == MISSING:
+            return True
+        if kind == NULL:
+            return False
+        if field in self.integer_fields:
+            if kind == INTEGER:
+                return True
+            if any(value == value for value in self.columns[field]):
+                return False
+            self.integer_fields.discard(field)  # The first value is a float: a float column.
+            return True
+        return kind == FLOAT
+
+    def _split(self, field: str) -> bytearray:
+        """Starts per-cell kinds for `field` from the uniform type of its values so far."""
+        kind = INTEGER if field in self.integer_fields else FLOAT
+        self.integer_fields.discard(field)
+        kinds = bytearray(kind if value == value else MISSING for value in self.columns[field])
+        self.cell_kinds[field] = kinds
+        return kinds
+
+    @property
+    def fields(self) -> list[str]:
+        return list(self.columns)
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def __getitem__(self, days: slice) -> "ColumnarSeries":
+        return ColumnarSeries(
+            self.dates[days],
+            {field: column[days] for field, column in self.columns.items()},
+            self.integer_fields,
+            {field: kinds[days] for field, kinds in self.cell_kinds.items()},
+            self.extras[days] if self.extras is not None else None,
+        )
+
+    def values(self, field: str) -> list[float | None]:
+        """The field's per-day values as `row()` returns them (ints stay ints), with None for gaps."""
+        column = self.columns.get(field)
+        if column is None:
+            return [None] * len(self)
+        kinds = self.cell_kinds.get(field)
+        if kinds is not None:
+            return [
+                int(value) if kind == INTEGER else value if kind == FLOAT else None for value, kind in zip(column, kinds)
+            ]
+        if field in self.integer_fields:
+            return [int(value) if value == value else None for value in column]
+        return [value if value == value else None for value in column]
+
+    def row(self, idx: int) -> dict[str, Any]:
+        entry: dict[str, Any] = {"date": self.dates[idx]}
+        for field, column in self.columns.items():
+            value = column[idx]
+            kinds = self.cell_kinds.get(field)
+            if kinds is not None:
+                kind = kinds[idx]
+                if kind != MISSING:
+                    entry[field] = None if kind == NULL else int(value) if kind == INTEGER else value
+            elif value == value:
+                entry[field] = int(value) if field in self.integer_fields else value
+        if self.extras is not None and self.extras[idx]:
+            entry.update(self.extras[idx])
+        return entry
+
+    def iter_rows(self) -> Iterator[dict[str, Any]]:
+        for idx in range(len(self)):
+            yield self.row(idx)
+
+    def to_rows(self) -> list[dict[str, Any]]:
+        return list(self.iter_rows())
+
+    @property
+    def nbytes(self) -> int:
+        column_bytes = sum(column.itemsize * len(column) for column in self.columns.values())
+        column_bytes += sum(len(kinds) for kinds in self.cell_kinds.values())
+        date_bytes = sum(sys.getsizeof(date) for date in self.dates if date is not None)
+        if self.extras is not None:
+            date_bytes += sys.getsizeof(self.extras) + sum(
+                sys.getsizeof(extra) + sum(sys.getsizeof(value) for value in extra.values())
+                for extra in self.extras
+                if extra
+            )
+        return column_bytes + date_bytes + sys.getsizeof(self.dates)
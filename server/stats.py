@@ -1,7 +1,20 @@
 from __future__ import annotations
 
 import math
-from typing import Iterable
+import os
+from typing import Any, Iterable
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the pure-Python accumulators are the fallback.
+    np = None
+
+from profiling import traced
+from series import INTEGER, ColumnarSeries, is_number
+
+
+STATS_BACKEND = os.getenv("STATS_BACKEND", "auto").lower()
+NUMPY_MIN_ROWS = int(os.getenv("STATS_NUMPY_MIN_ROWS", "256"))
 
 
 def mean(values: Iterable[float]) -> float | None:
@@ -35,17 +48,374 @@ def round_value(value: float | None, digits: int = 2) -> float | None:
     return round(value * factor) / factor
 
 
-def compute_stats(series: list[dict], fields: list[str]) -> dict[str, dict[str, float | None]]:
-    stats: dict[str, dict[str, float | None]] = {}
-    for field in fields:
-        values = [
-            entry.get(field)
-            for entry in series
-            if isinstance(entry, dict) and isinstance(entry.get(field), (int, float))
-        ]
-        stats[field] = {
-            "mean": round_value(mean(values)),
-            "variance": round_value(variance(values)),
-            "std": round_value(std(values)),
+def rounding_error_bounds(count: int, low: float, high: float, std_value: float) -> tuple[float, float, float]:
+    """Worst-case float error of a computed mean, variance and std of `count` values in [low, high].
+
+    Covers sequential or pairwise sums and Welford or two-pass variances, with a safety
+    margin; deviations from the mean are bounded by the spread.
+    """
+    unit = 2.0**-53
+    magnitude, spread = max(abs(low), abs(high)), high - low
+    mean_error = (count + 2) * unit * magnitude
+    variance_error = 16 * (count + 2) * unit * magnitude * spread
+    std_error = min(variance_error / std_value if std_value else math.inf, math.sqrt(variance_error))
+    return mean_error, variance_error, std_error + 4 * unit * std_value
+
+
+def near_rounding_tie(value: float, error: float, digits: int = 2) -> bool:
+    """Whether two computations of `value`, each within `error`, could round differently in round_value."""
+    scaled = value * 10**digits
+    tolerance = 2 * 10**digits * error + 4 * 2.0**-53 * abs(scaled)
+    if not (math.isfinite(scaled) and math.isfinite(tolerance)):
+        return True
+    return abs(scaled - math.floor(scaled) - 0.5) <= tolerance
+
+
+class FieldAccumulator:
+    """Running count/sum/min/max plus Welford's M2 for one field.
+
+    The mean is taken from the running sum so it matches ``mean()`` exactly.
+    """
+
+    __slots__ = ("count", "total", "minimum", "maximum", "_mean", "_m2")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.minimum: float | None = None
+        self.maximum: float | None = None
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        delta = value - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (value - self._mean)
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+
+    def mean(self) -> float | None:
+        return self.total / self.count if self.count else None
+
+    def variance(self) -> float | None:
+        return max(self._m2, 0.0) / self.count if self.count else None
+
+    def std(self) -> float | None:
+        var = self.variance()
+        return math.sqrt(var) if var is not None else None
+
+    def as_stats(self) -> dict[str, float | None]:
+        return {
+            "mean": round_value(self.mean()),
+            "variance": round_value(self.variance()),
+            "std": round_value(self.std()),
+            "count": self.count,
+            "min": self.minimum,
+            "max": self.maximum,
+        }
+
+
+class StatsAccumulator:
+    """Feeds rows one at a time into a FieldAccumulator per field, for data that arrives incrementally."""
+
+    __slots__ = ("accumulators", "_pairs")
+
+    def __init__(self, fields: list[str]):
+        self.accumulators = {field: FieldAccumulator() for field in fields}
+        self._pairs = list(self.accumulators.items())
+
+    def add(self, entry: dict) -> None:
+        for field, accumulator in self._pairs:
+            value = entry.get(field)
+            if is_number(value):
+                accumulator.add(value)
+
+    def stats(self) -> dict[str, dict[str, float | None]]:
+        return {field: accumulator.as_stats() for field, accumulator in self._pairs}
+
+
+def accumulate(series: Iterable[dict] | ColumnarSeries, fields: list[str]) -> dict[str, FieldAccumulator]:
+    if isinstance(series, ColumnarSeries):
+        return accumulate_columns(series, fields)
+    accumulator = StatsAccumulator(fields)
+    for entry in series:
+        if isinstance(entry, dict):
+            accumulator.add(entry)
+    return accumulator.accumulators
+
+
+def accumulate_columns(series: ColumnarSeries, fields: list[str]) -> dict[str, FieldAccumulator]:
+    accumulators = {field: FieldAccumulator() for field in fields}
+    for field, accumulator in accumulators.items():
+        for value in series.values(field):
+            if value is not None:
+                accumulator.add(value)
+    return accumulators
+
+
+def numeric_or_nan(value: Any) -> float:
+    return value if is_number(value) else math.nan
+
+
+class ColumnMatrix:
+    """A (fields x days) float64 matrix with NaN for missing values.
+
+    Built once from a series, one column per day (non-dict rows become all-NaN days);
+    slicing along days returns zero-copy views, so ``matrix[-window_days:]`` matches
+    slicing the list. A boolean matrix of the same shape marks the cells that were ints,
+    so min/max come back as the values compute_stats returns. The matrix keeps its
+    source so `as_columns` can rebuild it for fields it was not built with.
+    """
+
+    __slots__ = ("fields", "values", "integers", "source")
+
+    def __init__(
+        self,
+        fields: list[str],
+        values: Any,
+        source: list[dict] | ColumnarSeries | None = None,
+        integers: Any = None,
+    ):
+        self.fields = list(fields)
+        self.values = values
+        self.integers = np.zeros(values.shape, dtype=bool) if integers is None else integers
+        self.source = source
+
+    @classmethod
+    def from_series(cls, series: list[dict], fields: list[str]) -> "ColumnMatrix":
+        rows = [entry if isinstance(entry, dict) else {} for entry in series]
+        values = np.empty((len(fields), len(rows)), dtype=np.float64)
+        integers = np.empty((len(fields), len(rows)), dtype=bool)
+        for idx, field in enumerate(fields):
+            values[idx] = np.fromiter((numeric_or_nan(entry.get(field)) for entry in rows), np.float64, len(rows))
+            integers[idx] = np.fromiter(
+                (is_number(entry.get(field)) and isinstance(entry.get(field), int) for entry in rows), bool, len(rows)
+            )
+        return cls(fields, values, series, integers)
+
+    @classmethod
+    def from_columnar(cls, series: ColumnarSeries, fields: list[str]) -> "ColumnMatrix":
+        values = np.full((len(fields), len(series)), np.nan, dtype=np.float64)
+        integers = np.zeros((len(fields), len(series)), dtype=bool)
+        for idx, field in enumerate(fields):
+            column = series.columns.get(field)
+            if column is not None and len(column):
+                values[idx] = np.frombuffer(column, dtype=np.float64)
+                kinds = series.cell_kinds.get(field)
+                if kinds is not None:
+                    integers[idx] = np.frombuffer(kinds, dtype=np.uint8) == INTEGER
+                elif field in series.integer_fields:
+                    integers[idx] = ~np.isnan(values[idx])
+        return cls(fields, values, series, integers)
+
+    def __len__(self) -> int:
+        return self.values.shape[1]
+
+    def __getitem__(self, days: slice) -> "ColumnMatrix":
+        source = self.source[days] if self.source is not None else None
+        return ColumnMatrix(self.fields, self.values[:, days], source, self.integers[:, days])
+
+    def cell(self, idx: int, day: int) -> float:
+        value = float(self.values[idx, day])
+        return int(value) if self.integers[idx, day] else value
+
+    def stats(self, fields: list[str]) -> dict[str, dict[str, float | None]]:
+        """Vectorized compute_stats; fields whose mean, variance or std lie too close to a rounding
+        half-way point for the float results to be trusted are accumulated exactly as compute_stats does."""
+        values = self.values
+        present = ~np.isnan(values)
+        counts = present.sum(axis=1)
+        safe_counts = np.maximum(counts, 1)
+        means = np.where(present, values, 0.0).sum(axis=1) / safe_counts
+        deviations = np.where(present, values - means[:, None], 0.0)
+        variances = (deviations * deviations).sum(axis=1) / safe_counts
+        if values.shape[1]:
+            # First occurrence, like FieldAccumulator, so an int and an equal float resolve the same way.
+            low_days = np.where(present, values, np.inf).argmin(axis=1)
+            high_days = np.where(present, values, -np.inf).argmax(axis=1)
+        positions = {field: idx for idx, field in enumerate(self.fields)}
+        stats: dict[str, dict[str, float | None]] = {}
+        for field in fields:
+            idx = positions.get(field)
+            if idx is None or not counts[idx]:
+                stats[field] = FieldAccumulator().as_stats()
+                continue
+            count, low, high = int(counts[idx]), self.cell(idx, low_days[idx]), self.cell(idx, high_days[idx])
+            mean_value, var = float(means[idx]), float(variances[idx])
+            std_value = math.sqrt(var)
+            mean_error, variance_error, std_error = rounding_error_bounds(count, low, high, std_value)
+            if (
+                near_rounding_tie(mean_value, mean_error)
+                or near_rounding_tie(var, variance_error)
+                or near_rounding_tie(std_value, std_error)
+            ):
+                accumulator = FieldAccumulator()
+                for day in np.flatnonzero(present[idx]):
+                    accumulator.add(self.cell(idx, day))
+                stats[field] = accumulator.as_stats()
+                continue
+            stats[field] = {
+                "mean": round_value(mean_value),
+                "variance": round_value(var),
+                "std": round_value(std_value),
+                "count": count,
+                "min": low,
+                "max": high,
+            }
+        return stats
+
+
+def nearest_integer(numerator: int, denominator: int, tolerance: float) -> int | None:
+    """Rounds `numerator / denominator` (denominator > 0) to the nearest integer, exactly.
+
+    Returns None when the value is within `tolerance` of a half-way point, where a float
+    computation of the same value could round the other way.
+    """
+    quotient, remainder = divmod(numerator, denominator)
+    if abs(2 * remainder - denominator) <= 2 * tolerance * denominator:
+        return None
+    return quotient + (2 * remainder > denominator)
+
+
+class WindowIndex:
+    """Exact prefix sums and sums of squares per field for O(1) trailing-window statistics.
+
+    Each column is scaled to integers (floats are dyadic rationals), so window sums are
+    exact and mean/variance/std are rounded from exact values. ``compute_stats`` rounds
+    float results instead, so when an exact value lies within that path's worst-case
+    float error of a rounding half-way point, the field is recomputed with
+    ``compute_stats`` on the window and both agree exactly. Windows follow
+    ``series[-days:]`` semantics; suffix min/max arrays give O(1) extremes.
+    """
+
+    __slots__ = ("fields", "length", "source", "_columns")
+
+    def __init__(self, series: list[dict] | ColumnarSeries, fields: list[str]):
+        self.fields = list(fields)
+        self.source = series
+        self.length = len(series)
+        if isinstance(series, ColumnarSeries):
+            self._columns = {field: self._build_column(series.values(field)) for field in fields}
+            return
+        self._columns = {
+            field: self._build_column([entry.get(field) if isinstance(entry, dict) else None for entry in series])
+            for field in fields
+        }
+
+    @staticmethod
+    def _build_column(raw: list[Any]) -> tuple[int | None, list[int], list[int], list[int], list, list]:
+        values = [value if is_number(value) else None for value in raw]
+        ratios = []
+        for value in values:
+            if value is not None:
+                if not math.isfinite(value):
+                    ratios = None  # Not representable exactly; every window falls back to compute_stats.
+                    break
+                ratios.append(value.as_integer_ratio())
+        scale = max((denominator.bit_length() - 1 for _, denominator in ratios), default=0) if ratios is not None else None
+        counts, sums, squares = [0], [0], [0]
+        present = iter(ratios or ())
+        for value in values:
+            scaled = 0
+            if value is not None and scale is not None:
+                numerator, denominator = next(present)
+                scaled = numerator << (scale - denominator.bit_length() + 1)
+            counts.append(counts[-1] + (value is not None))
+            sums.append(sums[-1] + scaled)
+            squares.append(squares[-1] + scaled * scaled)
+        minimums: list = [None] * (len(values) + 1)
+        maximums: list = [None] * (len(values) + 1)
+        for idx in range(len(values) - 1, -1, -1):
+            value, low, high = values[idx], minimums[idx + 1], maximums[idx + 1]
+            minimums[idx] = value if value is not None and (low is None or value < low) else low
+            maximums[idx] = value if value is not None and (high is None or value > high) else high
+        return scale, counts, sums, squares, minimums, maximums
+
+    def __len__(self) -> int:
+        return self.length
+
+    def window_start(self, window_days: int | None) -> int:
+        return slice(-window_days, None).indices(self.length)[0] if window_days else 0
+
+    def window_length(self, window_days: int | None) -> int:
+        return self.length - self.window_start(window_days)
+
+    def stats(self, window_days: int | None, fields: list[str] | None = None) -> dict[str, dict[str, float | None]]:
+        start, end = self.window_start(window_days), self.length
+        stats: dict[str, dict[str, float | None]] = {}
+        for field in fields or self.fields:
+            column = self._columns.get(field)
+            count = column[1][end] - column[1][start] if column else 0
+            if not count:
+                stats[field] = FieldAccumulator().as_stats()
+                continue
+            field_stats = self._exact_stats(column, start, end, count)
+            if field_stats is None:
+                field_stats = compute_stats(self.source[start:end], [field])[field]
+            stats[field] = field_stats
+        return stats
+
+    @staticmethod
+    def _exact_stats(column: tuple, start: int, end: int, count: int) -> dict[str, float | None] | None:
+        scale, _, sums, squares, minimums, maximums = column
+        if scale is None:
+            return None
+        low, high = minimums[start], maximums[start]
+        total, total_squares = sums[end] - sums[start], squares[end] - squares[start]
+        factor = 10**2
+        # variance = (count * sum(x^2) - sum(x)^2) / count^2, in units of 2^-2*scale.
+        variance_numerator = count * total_squares - total * total
+        variance_denominator = (count * count) << (2 * scale)
+        std_value = math.sqrt(variance_numerator / variance_denominator)
+        mean_error, variance_error, std_error = rounding_error_bounds(count, low, high, std_value)
+        mean = nearest_integer(factor * total, count << scale, 2 * factor * mean_error)
+        variance = nearest_integer(factor * variance_numerator, variance_denominator, 2 * factor * variance_error)
+        std = nearest_integer(*(std_value * factor).as_integer_ratio(), 2 * factor * std_error)
+        if mean is None or variance is None or std is None:
+            return None
+        return {
+            "mean": mean / factor,
+            "variance": variance / factor,
+            "std": std / factor,
+            "count": count,
+            "min": low,
+            "max": high,
         }
-    return stats
+
+
+def use_numpy(rows: int) -> bool:
+    if np is None or STATS_BACKEND == "python":
+        return False
+    return STATS_BACKEND == "numpy" or rows >= NUMPY_MIN_ROWS
+
+
+def as_columns(
+    series: list[dict] | ColumnarSeries | ColumnMatrix, fields: list[str]
+) -> list[dict] | ColumnarSeries | ColumnMatrix:
+    """Convert a series to a ColumnMatrix once when the NumPy backend applies, else pass it through.
+
+    A ColumnMatrix missing any of `fields` is rebuilt from its source; without one that is an error.
+    """
+    if isinstance(series, ColumnMatrix):
+        if set(fields) <= set(series.fields):
+            return series
+        if series.source is None:
+            raise ValueError(f"ColumnMatrix has no source to add fields {sorted(set(fields) - set(series.fields))}.")
+        series = series.source
+    if not use_numpy(len(series)):
+        return series
+    if isinstance(series, ColumnarSeries):
+        return ColumnMatrix.from_columnar(series, fields)
+    return ColumnMatrix.from_series(series, fields)
+
+
+@traced("stats.compute_stats")
+def compute_stats(series: list[dict] | ColumnarSeries | ColumnMatrix, fields: list[str]) -> dict[str, dict[str, float | None]]:
+    series = as_columns(series, fields)
+    if isinstance(series, ColumnMatrix):
+        return series.stats(fields)
+    return {field: accumulator.as_stats() for field, accumulator in accumulate(series, fields).items()}
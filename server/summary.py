@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import time
+from typing import Any
+
+from series import ColumnarSeries
+from stats import ColumnMatrix, WindowIndex, as_columns, compute_stats, round_value
+
+
+SUMMARY_FIELDS = [
+    "steps",
+    "sleep_hours",
+    "resting_hr",
+    "hrv_rmssd",
+    "stress_index",
+    "calories_burned",
+    "sleep_efficiency",
+    "active_minutes",
+]
+
+
+def summarize_series(series: list[dict[str, Any]] | ColumnarSeries | ColumnMatrix) -> dict[str, Any]:
+    return summarize_stats(compute_stats(series, SUMMARY_FIELDS))
+
+
+def summarize_stats(stats: dict[str, dict[str, Any]]) -> dict[str, Any]:
+    return {
+        "average_steps": stats.get("steps", {}).get("mean"),
+        "average_sleep_hours": stats.get("sleep_hours", {}).get("mean"),
+        "average_resting_hr": stats.get("resting_hr", {}).get("mean"),
+        "hrv_rmssd": stats.get("hrv_rmssd", {}).get("mean"),
+        "stress_index": stats.get("stress_index", {}).get("mean"),
+        "calories_burned": stats.get("calories_burned", {}).get("mean"),
+        "sleep_efficiency": stats.get("sleep_efficiency", {}).get("mean"),
+        "active_minutes": stats.get("active_minutes", {}).get("mean"),
+        "variance": {
+            "average_steps": stats.get("steps", {}).get("variance"),
+            "average_sleep_hours": stats.get("sleep_hours", {}).get("variance"),
+            "average_resting_hr": stats.get("resting_hr", {}).get("variance"),
+            "hrv_rmssd": stats.get("hrv_rmssd", {}).get("variance"),
+        },
+    }
+
+
+def compute_scores(summary: dict[str, Any]) -> dict[str, Any]:
+    sleep = summary.get("average_sleep_hours") or 0
+    stress = summary.get("stress_index") or 0
+    resting_hr = summary.get("average_resting_hr") or 0
+    hrv = summary.get("hrv_rmssd") or 0
+    steps = summary.get("average_steps") or 0
+    sleep_eff = summary.get("sleep_efficiency") or 0
+
+    sleep_score = min((sleep / 8) * 100, 100) if sleep else None
+    efficiency_score = min(sleep_eff * 100, 100) if sleep_eff else None
+    sleep_score = (
+        round_value(((sleep_score or 0) * 0.6 + (efficiency_score or 0) * 0.4), 1)
+        if sleep_score is not None
+        else None
+    )
+    stress_burden = round_value(max(0, 100 - stress), 1) if stress else None
+    readiness = (
+        round_value(((sleep_score or 0) * 0.4 + (100 - stress) * 0.35 + max(0, 100 - (resting_hr - 50) * 1.5) * 0.25), 1)
+        if sleep_score is not None and stress and resting_hr
+        else None
+    )
+    recovery = (
+        round_value(((hrv / 70) * 100) * 0.6 + max(0, 100 - (resting_hr - 50) * 1.2) * 0.4, 1)
+        if hrv and resting_hr
+        else None
+    )
+    activity = round_value(min(steps / 100, 100), 1) if steps else None
+
+    return {
+        "readiness_score_0_100": readiness,
+        "recovery_score_0_100": recovery,
+        "sleep_score_0_100": sleep_score,
+        "activity_score_0_100": activity,
+        "stress_burden_score_0_100": stress_burden,
+        "score_bands": {"green": [80, 100], "yellow": [60, 79], "red": [0, 59]},
+        "score_explanations": {
+            "readiness_score_0_100": "Computed from sleep score, HRV vs baseline, RHR vs baseline, and recent load.",
+        },
+    }
+
+
+class SummaryPipeline:
+    """Builds the wearables summary payload from one window and one baseline stats pass.
+
+    Every block of the payload (summary means, std aggregates, scores, trends) is
+    derived from the same two stats dicts, whichever source produced them.
+    """
+
+    def __init__(
+        self,
+        window_stats: dict[str, dict[str, Any]],
+        baseline_stats: dict[str, dict[str, Any]],
+        window_days: int,
+        window_length: int,
+        baseline_length: int,
+    ):
+        self.window_stats = window_stats
+        self.baseline_stats = baseline_stats
+        self.window_days = window_days
+        self.window_length = window_length
+        self.baseline_length = baseline_length
+        self.summary = summarize_stats(window_stats)
+        self.baseline_summary = summarize_stats(baseline_stats)
+
+    @classmethod
+    def from_series(
+        cls, series: list[dict[str, Any]] | ColumnarSeries | ColumnMatrix, window_days: int
+    ) -> "SummaryPipeline":
+        series = as_columns(series, SUMMARY_FIELDS)
+        window = series[-window_days:] if window_days else series
+        return cls(
+            window_stats=compute_stats(window, SUMMARY_FIELDS),
+            baseline_stats=compute_stats(series, SUMMARY_FIELDS),
+            window_days=window_days,
+            window_length=len(window),
+            baseline_length=len(series),
+        )
+
+    @classmethod
+    def from_index(cls, index: WindowIndex, window_days: int) -> "SummaryPipeline":
+        return cls(
+            window_stats=index.stats(window_days, SUMMARY_FIELDS),
+            baseline_stats=index.stats(None, SUMMARY_FIELDS),
+            window_days=window_days,
+            window_length=index.window_length(window_days),
+            baseline_length=len(index),
+        )
+
+    def window_std(self, field: str) -> float | None:
+        return self.window_stats.get(field, {}).get("std")
+
+    def notable_trends(self) -> list[str]:
+        summary, baseline_summary = self.summary, self.baseline_summary
+        notable_trends = []
+        if summary.get("average_sleep_hours") and baseline_summary.get("average_sleep_hours"):
+            delta = round_value(summary["average_sleep_hours"] - baseline_summary["average_sleep_hours"], 2)
+            if abs(delta) >= 0.3:
+                notable_trends.append(f"Sleep duration {'up' if delta > 0 else 'down'} {abs(delta)}h vs baseline.")
+        if summary.get("average_steps") and baseline_summary.get("average_steps"):
+            delta = round_value(summary["average_steps"] - baseline_summary["average_steps"], 0)
+            if abs(delta) >= 500:
+                notable_trends.append(f"Steps {'up' if delta > 0 else 'down'} {abs(delta)} vs baseline.")
+        if summary.get("hrv_rmssd") and baseline_summary.get("hrv_rmssd"):
+            delta = round_value(summary["hrv_rmssd"] - baseline_summary["hrv_rmssd"], 1)
+            if abs(delta) >= 3:
+                notable_trends.append(f"HRV {'up' if delta > 0 else 'down'} {abs(delta)} ms vs baseline.")
+        if summary.get("stress_index") and baseline_summary.get("stress_index"):
+            delta = round_value(summary["stress_index"] - baseline_summary["stress_index"], 1)
+            if abs(delta) >= 5:
+                notable_trends.append(f"Stress index {'up' if delta > 0 else 'down'} {abs(delta)} vs baseline.")
+        return notable_trends
+
+    def aggregates(self) -> dict[str, Any]:
+        summary = self.summary
+        return {
+            "sleep": {
+                "duration_mean_h": summary.get("average_sleep_hours"),
+                "duration_std_h": self.window_std("sleep_hours"),
+                "efficiency_mean_pct": summary.get("sleep_efficiency"),
+                "efficiency_std_pct": self.window_std("sleep_efficiency"),
+                "bedtime_mean_local": None,
+                "bedtime_std_min": None,
+                "wake_time_mean_local": None,
+                "wake_time_std_min": None,
+                "awakenings_mean": None,
+            },
+            "recovery": {
+                "resting_hr_mean_bpm": summary.get("average_resting_hr"),
+                "resting_hr_std_bpm": self.window_std("resting_hr"),
+                "hrv_rmssd_mean_ms": summary.get("hrv_rmssd"),
+                "hrv_rmssd_std_ms": self.window_std("hrv_rmssd"),
+                "resp_rate_mean_rpm": None,
+            },
+            "activity": {
+                "steps_mean": summary.get("average_steps"),
+                "steps_std": self.window_std("steps"),
+                "active_minutes_mean": summary.get("active_minutes"),
+                "training_load_mean": None,
+                "strain_mean": None,
+            },
+            "stress": {
+                "stress_index_mean": summary.get("stress_index"),
+                "stress_index_std": self.window_std("stress_index"),
+                "high_stress_minutes_mean": None,
+            },
+        }
+
+    def build(self) -> dict[str, Any]:
+        baseline_summary = self.baseline_summary
+        return {
+            "window_days": self.window_days,
+            "generated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "data_quality": {
+                "coverage_pct": min(self.window_length / float(self.window_days or 1), 1.0),
+                "missingness_notes": [],
+                "device_sources": ["demo"],
+            },
+            "demographics": {"age": None, "sex": None, "timezone": "UTC"},
+            "baselines": {
+                "baseline_window_days": self.baseline_length,
+                "sleep_duration_mean_h": baseline_summary.get("average_sleep_hours"),
+                "hrv_rmssd_mean_ms": baseline_summary.get("hrv_rmssd"),
+                "resting_hr_mean_bpm": baseline_summary.get("average_resting_hr"),
+                "steps_mean": baseline_summary.get("average_steps"),
+            },
+            "aggregates": self.aggregates(),
+            "derived_scores": compute_scores(self.summary),
+            "notable_trends": self.notable_trends(),
+            "alerts": [],
+        }
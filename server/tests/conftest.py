@@ -0,0 +1,22 @@
+import httpx
+import pytest
+from openai import AsyncOpenAI
+
+import llm
+from loadtest.fakes import create_fake_openai_app
+
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    def install(behavior=None):
+        fake_app = create_fake_openai_app(behavior)
+        transport = httpx.ASGITransport(app=fake_app)
+        fake_client = AsyncOpenAI(
+            api_key="test", base_url="http://fake-openai/v1", http_client=httpx.AsyncClient(transport=transport)
+        )
+        monkeypatch.setattr(llm, "_OPENAI_CLIENT", fake_client)
+        monkeypatch.setattr(llm, "LLM_CACHE", None)
+        monkeypatch.delenv("COACH_PIPELINE_MODE", raising=False)
+        return fake_app
+
+    return install
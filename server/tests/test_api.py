@@ -1,6 +1,13 @@
+import itertools
+import json
+import time
+
 from fastapi.testclient import TestClient
 
-from main import app
+import llm
+from llm_cache import LLMResponseCache
+from loadtest.fakes import FakeBehavior
+from main import SUMMARY_CACHE, app, build_wearables_summary, invalidate_persona_data
 
 
 client = TestClient(app)
@@ -20,7 +27,8 @@ def test_personas():
     assert "id" in response.json()[0]
 
 
-def test_chat():
+def test_chat(fake_openai):
+    fake_app = fake_openai()
     response = client.post(
         "/chat",
         json={
@@ -32,3 +40,82 @@ def test_chat():
     data = response.json()
     assert data.get("answer")
     assert data.get("message")
+    assert data["recommendations"][0]["category"] == "sleep"
+    assert fake_app.state.requests == 2
+
+
+def test_chat_falls_back_when_the_model_keeps_returning_broken_json(fake_openai):
+    fake_app = fake_openai(FakeBehavior(invalid_json_rate=1.0))
+    response = client.post("/chat", json={"user_id": "active-alex", "message": "Quick check in?"})
+    assert response.status_code == 200
+    assert response.json()["answer"] == llm.safe_fallback_response()["answer"]
+    assert fake_app.state.requests == 2  # The analysis call and its one fixup retry.
+
+
+def test_series_chat_hits_the_response_cache_across_a_clock_tick(fake_openai, monkeypatch):
+    fake_app = fake_openai()
+    monkeypatch.setattr(llm, "LLM_CACHE", LLMResponseCache(max_entries=8))
+    seconds, gmtime = itertools.count(1_700_000_000), time.gmtime
+    monkeypatch.setattr(time, "gmtime", lambda secs=None: gmtime(next(seconds)))
+    series = [{"date": f"2024-01-{day:02d}", "steps": 4000 + day, "sleep_hours": 7} for day in range(1, 15)]
+    payload = {"metrics": {}, "query": "How am I doing?", "series": series}
+
+    first = client.post("/chat", json=payload).json()
+    second = client.post("/chat", json=payload).json()
+    assert fake_app.state.requests == 2
+    assert second["answer"] == first["answer"]
+    assert second["meta"]["cached"] is True
+
+
+def test_wearables_summary_is_cached_per_data_version(monkeypatch):
+    monkeypatch.setenv("PROFILE_ADMIN_TOKEN", "secret")
+    invalidate_persona_data("stressed-sam")
+    before = SUMMARY_CACHE.stats()
+    first = client.get("/users/stressed-sam/wearables/summary?window_days=7").json()
+    second = client.get("/users/stressed-sam/wearables/summary?window_days=7").json()
+    after = SUMMARY_CACHE.stats()
+    assert first == second
+    assert after["misses"] == before["misses"] + 1
+    assert after["hits"] == before["hits"] + 1
+
+    assert client.post("/api/cache/invalidate", json={"persona_id": "stressed-sam"}).status_code == 403
+    response = client.post(
+        "/api/cache/invalidate", json={"persona_id": "stressed-sam"}, headers={"X-Admin-Token": "secret"}
+    )
+    assert response.status_code == 200
+    client.get("/users/stressed-sam/wearables/summary?window_days=7")
+    assert SUMMARY_CACHE.stats()["misses"] == after["misses"] + 1
+    assert client.get("/api/cache/stats").json()["summaries"]["size"] >= 1
+
+    for window_days in (7, 5):  # A cache hit, then a miss: neither return value may alias the cached dict.
+        returned = build_wearables_summary("stressed-sam", window_days)
+        expected = json.loads(json.dumps(returned))
+        returned["aggregates"]["sleep"]["duration_mean_h"] = -1
+        returned["alerts"].append("mutated")
+        assert build_wearables_summary("stressed-sam", window_days) == expected
+    assert build_wearables_summary("stressed-sam", 7) == first
+
+
+def test_chat_stream_emits_final_event(fake_openai):
+    fake_openai()
+    with client.stream("POST", "/chat/stream", json={"user_id": "active-alex", "message": "Quick check in?"}) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        body = "".join(response.iter_text())
+    events = [block for block in body.split("\n\n") if block.strip()]
+    assert events[0].startswith("event: status")
+    assert events[-1].startswith("event: final")
+    final = json.loads(events[-1].split("data: ", 1)[1])
+    assert final["answer"]
+    assert "recommendations" in final
+
+
+def test_meeting_sync_requires_the_admin_token(monkeypatch):
+    monkeypatch.setenv("PROFILE_ADMIN_TOKEN", "secret")
+    assert client.post("/meetings/sync").status_code == 403
+    assert client.post("/meetings/sync", headers={"X-Admin-Token": "wrong"}).status_code == 403
+
+
+def test_chat_stream_rejects_unknown_user():
+    response = client.post("/chat/stream", json={"user_id": "nobody", "message": "hi"})
+    assert response.status_code == 404
@@ -0,0 +1,84 @@
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+import colformat
+from colformat import ColumnarFormatError, read_columnar, write_columnar
+from persona_store import PersonaStore
+from series import ColumnarSeries
+from summary import summarize_series
+
+
+PERSONA_DIR = Path(__file__).resolve().parent.parent / "data" / "personas"
+
+
+def test_columnar_round_trip_matches_json(tmp_path):
+    payload = json.loads((PERSONA_DIR / "stressed-sam.json").read_text(encoding="utf-8"))
+    rows = payload.pop("data") + [{"date": "2099-01-01", "steps": None}, {"date": "2099-01-02", "steps": 4000.5}]
+    series = ColumnarSeries.from_rows(rows)
+
+    path = tmp_path / "stressed-sam.col"
+    write_columnar(path, payload, series)
+    meta, loaded = read_columnar(path)
+    assert meta == payload
+    assert isinstance(loaded.columns["steps"], memoryview)
+    assert json.dumps(loaded.to_rows()) == json.dumps(rows)
+    assert summarize_series(loaded) == summarize_series(rows)
+    assert summarize_series(loaded[-7:]) == summarize_series(rows[-7:])
+
+
+def test_columnar_round_trip_keeps_non_numeric_fields(tmp_path):
+    rows = [
+        {"date": "2024-03-01", "steps": 4000, "note": "late dinner"},
+        {"date": "2024-03-02", "steps": 5200, "flags": {"travel": True}},
+    ]
+    path = tmp_path / "notes.col"
+    write_columnar(path, {}, ColumnarSeries.from_rows(rows))
+    _, loaded = read_columnar(path)
+    assert loaded.to_rows() == rows
+
+
+def test_store_prefers_fresh_columnar_file_and_falls_back_to_json(tmp_path):
+    persona_dir = tmp_path / "personas"
+    persona_dir.mkdir()
+    json_path = persona_dir / "alex.json"
+    json_path.write_text(json.dumps({"id": "alex", "data": [{"steps": 1000}]}), encoding="utf-8")
+    col_path = persona_dir / "alex.col"
+    write_columnar(col_path, {"id": "alex"}, ColumnarSeries.from_rows([{"steps": 2000}]))
+    stat = json_path.stat()
+    os.utime(col_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    store = PersonaStore(tmp_path)
+    assert store.get("alex").series.row(0)["steps"] == 2000
+
+    col_path.write_bytes(b"not a columnar file")
+    os.utime(col_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2_000_000))
+    assert store.get("alex").series.row(0)["steps"] == 1000
+
+    with pytest.raises(ColumnarFormatError):
+        read_columnar(col_path)
+
+    col_path.write_bytes(b"")
+    os.utime(col_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 3_000_000))
+    assert store.get("alex").series.row(0)["steps"] == 1000
+    with pytest.raises(ColumnarFormatError):
+        read_columnar(col_path)
+
+
+def test_malformed_files_are_unmapped_on_error(tmp_path, monkeypatch):
+    path = tmp_path / "broken.col"
+    write_columnar(path, {}, ColumnarSeries.from_rows([{"steps": 1000}, {"steps": 2000}]))
+    path.write_bytes(path.read_bytes()[:-8])
+    mappings = []
+    real_mmap = colformat.mmap.mmap
+
+    def tracked_mmap(*args, **kwargs):
+        mappings.append(real_mmap(*args, **kwargs))
+        return mappings[-1]
+
+    monkeypatch.setattr(colformat.mmap, "mmap", tracked_mmap)
+    with pytest.raises(ColumnarFormatError, match="truncated"):
+        read_columnar(path)
+    assert mappings and all(mapped.closed for mapped in mappings)
@@ -0,0 +1,87 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import ingest
+from main import app
+from summary import summarize_series
+
+
+client = TestClient(app)
+
+ROWS = [
+    {"date": f"2024-01-{day:02d}", "steps": 4000 + day * 250, "sleep_hours": 6 + day % 3, "hrv": 40 + day}
+    for day in range(1, 21)
+]
+
+
+def as_csv(rows):
+    lines = ["date,steps,sleep_hours,hrv"]
+    lines += [f"{row['date']},{row['steps']},{row['sleep_hours']},{row['hrv']}" for row in rows]
+    return "\n".join(lines) + "\n"
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(ingest, "UPLOAD_CHUNK_BYTES", 7)
+
+
+def uploaded_rows(body):
+    return client.get(f"/uploads/{body['upload_id']}/data").json()["data"]
+
+
+def test_csv_upload_streams_and_matches_buffered_summary(small_chunks):
+    response = client.post("/upload", files={"file": ("data.csv", as_csv(ROWS), "text/csv")})
+    assert response.status_code == 200
+    body = response.json()
+    expected = ingest.normalize_upload_data([{k: str(v) for k, v in row.items()} for row in ROWS])
+    assert "data" not in body
+    assert body["rows"] == len(ROWS)
+    assert uploaded_rows(body) == expected
+    assert body["summary"] == summarize_series(expected)
+
+
+def test_csv_quoted_field_spanning_lines(small_chunks):
+    content = 'date,steps,note\n2024-01-01,5000,"first line\nsecond line"\n2024-01-02,6000,plain\n'
+    response = client.post("/upload", files={"file": ("data.csv", content, "text/csv")})
+    assert response.status_code == 200
+    assert [row["steps"] for row in uploaded_rows(response.json())] == [5000.0, 6000.0]
+
+
+def test_ndjson_upload(small_chunks):
+    content = "\n".join(json.dumps(row) for row in ROWS) + "\n"
+    response = client.post("/upload", files={"file": ("data.ndjson", content, "application/x-ndjson")})
+    assert response.status_code == 200
+    assert response.json()["rows"] == len(ROWS)
+    assert response.json()["summary"] == summarize_series(ingest.normalize_upload_data(ROWS))
+
+
+@pytest.mark.parametrize(
+    "document",
+    [
+        json.dumps(ROWS, indent=2),
+        json.dumps({"source": {"device": "ring", "ids": [1, 2]}, "data": ROWS, "trailer": True}),
+        "\ufeff" + json.dumps({"data": ROWS}, separators=(",", ":")),
+    ],
+)
+def test_json_upload_is_parsed_incrementally(small_chunks, document):
+    response = client.post("/upload", files={"file": ("data.json", document, "application/json")})
+    assert response.status_code == 200
+    assert uploaded_rows(response.json()) == ingest.normalize_upload_data(ROWS)
+
+
+@pytest.mark.parametrize("document", ['{"data": [{"steps": 1}', '[{"steps": 1} {"steps": 2}]', "[1, 2"])
+def test_malformed_json_upload_is_rejected(small_chunks, document):
+    response = client.post("/upload", files={"file": ("data.json", document, "application/json")})
+    assert response.status_code == 400
+
+
+def test_upload_limits(monkeypatch):
+    monkeypatch.setattr(ingest, "UPLOAD_MAX_ROWS", 5)
+    response = client.post("/upload", files={"file": ("data.csv", as_csv(ROWS), "text/csv")})
+    assert response.status_code == 413
+
+    monkeypatch.setattr(ingest, "UPLOAD_MAX_BYTES", 64)
+    response = client.post("/upload", files={"file": ("data.ndjson", as_csv(ROWS), "text/plain")})
+    assert response.status_code == 413
@@ -0,0 +1,83 @@
+import pytest
+
+from json_repair import JSONRepairError, coerce, extract_json_object, repair_json_text, repair_payload
+from llm import load_prompt_module
+
+
+def test_extract_json_object_skips_prose_fences_and_braces_in_strings():
+    text = 'Sure! {not json} here:\n```json\n{"a": "x } y", "b": {"c": [1, 2]}}\n```\nAnything else {?}'
+    assert extract_json_object(text) == {"a": "x } y", "b": {"c": [1, 2]}}
+    with pytest.raises(JSONRepairError):
+        extract_json_object('{"reasoning_trace": [')
+    with pytest.raises(JSONRepairError):
+        extract_json_object('{"reasoning_trace": ["a"], "safety": {"disclaimer": "x"}, "follow_ups": [')
+    with pytest.raises(JSONRepairError):
+        extract_json_object('{outer {"a": 1}}')
+
+
+def test_repair_fills_defaults_coerces_types_and_clamps_enums():
+    schema = load_prompt_module().ANALYSIS_SCHEMA
+    raw = (
+        '{"reasoning_trace": "Sleep is short.",'
+        ' "data_references": [{"metric_path": "aggregates.sleep.duration_mean_h", "value": 6.4,'
+        ' "window_days": "14", "comparison": "vs baseline"}],'
+        ' "recommendations": [{"category": "Sleep hygiene", "action": "Earlier bedtime", "why": "Short sleep",'
+        ' "priority": "HIGH", "timeframe": "next 7 days", "success_metric": "+30min", "note": 1}],'
+        ' "follow_ups": [], "safety": {"disclaimer": "Not medical advice."}}\nLet me know if you need more!'
+    )
+    repaired = repair_json_text(raw, schema)
+    assert repaired["reasoning_trace"] == ["Sleep is short."]
+    assert repaired["data_references"][0]["window_days"] == 14
+    assert repaired["recommendations"][0]["category"] == "sleep"
+    assert repaired["recommendations"][0]["priority"] == "high"
+    assert repaired["safety"] == {"disclaimer": "Not medical advice.", "red_flags": []}
+
+
+def test_repair_gives_up_on_values_it_cannot_infer():
+    schema = load_prompt_module().ANALYSIS_SCHEMA
+    payload = {
+        "reasoning_trace": [],
+        "data_references": [{"metric_path": "steps", "value": 1, "window_days": "two weeks", "comparison": ""}],
+        "recommendations": [],
+        "follow_ups": [],
+        "safety": {"disclaimer": "", "red_flags": []},
+    }
+    with pytest.raises(JSONRepairError):
+        repair_payload(payload, schema)
+    with pytest.raises(JSONRepairError):
+        repair_payload({"recommendations": [{"priority": "urgent"}]}, schema)
+
+
+def test_repair_refuses_refusals_truncations_and_invented_content():
+    schema = load_prompt_module().ANALYSIS_SCHEMA
+    with pytest.raises(JSONRepairError):
+        repair_json_text('{"error": "I can\'t help with that request."}', schema)
+    truncated = (
+        '{"reasoning_trace": ["Short sleep."], "data_references": [],'
+        ' "safety": {"disclaimer": "x", "red_flags": []}, "recommendations": [{"category": "sleep"'
+    )
+    with pytest.raises(JSONRepairError):
+        repair_json_text(truncated, schema)
+
+    valid = {
+        "reasoning_trace": [],
+        "data_references": [],
+        "recommendations": [],
+        "follow_ups": [],
+        "safety": {"disclaimer": "Not medical advice.", "red_flags": []},
+    }
+    assert repair_payload({key: value for key, value in valid.items() if key != "follow_ups"}, schema) == valid
+    with pytest.raises(JSONRepairError):
+        repair_payload({key: value for key, value in valid.items() if key != "recommendations"}, schema)
+    with pytest.raises(JSONRepairError):
+        repair_payload(dict(valid, safety=None), schema)
+    with pytest.raises(JSONRepairError):
+        repair_payload(dict(valid, safety={"red_flags": []}), schema)
+
+
+def test_integer_coercion_never_truncates():
+    assert coerce("14", {"type": "integer"}) == 14
+    assert coerce("14.0", {"type": "integer"}) == 14
+    assert coerce("14.5", {"type": "number"}) == 14.5
+    with pytest.raises(JSONRepairError):
+        coerce("14.5", {"type": "integer"})
@@ -0,0 +1,134 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from openai import AsyncOpenAI
+
+import llm
+from llm_cache import LLMResponseCache
+
+
+VALID_ANALYSIS = {
+    "reasoning_trace": ["Sleep is below baseline."],
+    "data_references": [],
+    "recommendations": [],
+    "follow_ups": [],
+    "safety": {"disclaimer": "Not medical advice.", "red_flags": []},
+}
+
+
+def completion(content):
+    return {
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "test-model",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+    }
+
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    requests = []
+    replies = []
+
+    def handler(request):
+        body = json.loads(request.content)
+        requests.append(body)
+        return httpx.Response(200, json=completion(replies.pop(0)))
+
+    client = AsyncOpenAI(api_key="test", http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(llm, "_OPENAI_CLIENT", client)
+    monkeypatch.setattr(llm, "LLM_CACHE", LLMResponseCache(max_entries=8))
+    return requests, replies
+
+
+def run_coach(query="How did I sleep?"):
+    return asyncio.run(
+        llm.generate_coach_response(wearables_summary={"window_days": 7}, coaching_context={}, user_query=query)
+    )
+
+
+def test_two_stage_pipeline_merges_analysis_and_answer(fake_openai, monkeypatch):
+    requests, replies = fake_openai
+    monkeypatch.delenv("COACH_PIPELINE_MODE", raising=False)
+    replies.extend([json.dumps(VALID_ANALYSIS), json.dumps({"answer": "Aim for an earlier bedtime."})])
+    response = run_coach()
+    assert len(requests) == 2
+    assert response["answer"] == "Aim for an earlier bedtime."
+    assert response["meta"]["pipeline_mode"] == "two_stage"
+
+
+def test_single_stage_pipeline_uses_one_structured_call(fake_openai, monkeypatch):
+    requests, replies = fake_openai
+    monkeypatch.setenv("COACH_PIPELINE_MODE", "single")
+    replies.append(json.dumps(dict(VALID_ANALYSIS, answer="Aim for an earlier bedtime.")))
+    response = run_coach()
+    assert len(requests) == 1
+    assert requests[0]["response_format"]["type"] == "json_schema"
+    assert response["message"] == "Aim for an earlier bedtime."
+    assert response["meta"] == {"pipeline_mode": "single", "model": requests[0]["model"]}
+
+
+def test_mechanical_schema_errors_are_repaired_without_fixup_call(fake_openai, monkeypatch):
+    requests, replies = fake_openai
+    monkeypatch.delenv("COACH_PIPELINE_MODE", raising=False)
+    analysis = dict(VALID_ANALYSIS, reasoning_trace="Sleep is below baseline.", safety={"disclaimer": "Not medical advice."})
+    del analysis["follow_ups"]
+    replies.extend(
+        [
+            "Here is the analysis:\n" + json.dumps(analysis) + "\nHope this helps.",
+            json.dumps({"answer": "Aim for an earlier bedtime."}),
+        ]
+    )
+    response = run_coach()
+    assert len(requests) == 2
+    assert response["answer"] == "Aim for an earlier bedtime."
+    assert response["reasoning_trace"] == ["Sleep is below baseline."]
+    assert response["safety"]["red_flags"] == []
+    assert response["follow_ups"] == []
+
+
+def test_truncated_or_refused_analysis_goes_to_the_fixup_call(fake_openai, monkeypatch):
+    requests, replies = fake_openai
+    monkeypatch.delenv("COACH_PIPELINE_MODE", raising=False)
+    truncated = json.dumps(VALID_ANALYSIS)[:-40]
+    for idx, broken in enumerate((truncated, json.dumps({"error": "I can't help with that."}))):
+        requests.clear()
+        replies.extend([broken, json.dumps(VALID_ANALYSIS), json.dumps({"answer": "Aim for an earlier bedtime."})])
+        response = run_coach(f"How did I sleep? ({idx})")
+        assert len(requests) == 3
+        assert requests[1]["messages"][0]["content"].startswith("You fix JSON")
+        assert response["answer"] == "Aim for an earlier bedtime."
+
+
+def test_repeated_question_is_served_from_response_cache(fake_openai, monkeypatch):
+    requests, replies = fake_openai
+    monkeypatch.delenv("COACH_PIPELINE_MODE", raising=False)
+    replies.extend([json.dumps(VALID_ANALYSIS), json.dumps({"answer": "Aim for an earlier bedtime."})])
+    first = run_coach()
+    second = run_coach()
+    assert len(requests) == 2
+    assert second["answer"] == first["answer"]
+    assert second["meta"]["cached"] is True
+    assert "cached" not in first["meta"]
+    assert llm.LLM_CACHE.stats()["hits"] == 1
+
+
+def test_response_cache_disk_tier_survives_restart(tmp_path):
+    bundle = llm.build_prompt_bundle(
+        wearables_summary={}, coaching_context={}, user_query="Hi", response_schema={"type": "object"}
+    )
+    key = LLMResponseCache.key_for(bundle, "model-a", "schema-1", "two_stage")
+    assert key != LLMResponseCache.key_for(bundle, "model-b", "schema-1", "two_stage")
+
+    cache = LLMResponseCache(disk_path=tmp_path / "llm.sqlite3")
+    cache.set(key, {"answer": "cached"})
+    cache.close()
+
+    restarted = LLMResponseCache(disk_path=tmp_path / "llm.sqlite3")
+    assert asyncio.run(restarted.get_async(key)) == {"answer": "cached"}
+    assert restarted.stats()["disk_hits"] == 1
+    assert restarted.get("missing") is None
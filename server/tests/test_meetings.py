@@ -0,0 +1,153 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+from meetings import MeetingContextCache, MeetingEntry, MeetingMirror, MeetingNotFound, sync_meetings
+
+
+MEETING = {
+    "id": "meeting_1",
+    "createdAt": "2025-01-10T11:25:00Z",
+    "plan": {"sleep": {"baseline": "6h a night", "smartGoals": ["Lights out by 23:00"]}},
+}
+
+
+def make_cache(responses, **kwargs):
+    calls = []
+
+    async def handler(request):
+        calls.append(request.url.path)
+        await asyncio.sleep(0.01)
+        status, body = responses.pop(0) if len(responses) > 1 else responses[0]
+        return httpx.Response(status, json=body)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return MeetingContextCache("http://scribe.test", client=client, **kwargs), calls
+
+
+def test_concurrent_misses_share_one_fetch():
+    cache, calls = make_cache([(200, MEETING)])
+
+    async def scenario():
+        results = await asyncio.gather(*(cache.get("meeting_1") for _ in range(5)))
+        assert await cache.get("meeting_1") == results[0]
+        return results
+
+    results = asyncio.run(scenario())
+    assert calls == ["/api/meetings/meeting_1"]
+    assert results[0]["coach_brief"] == ["sleep: 6h a night"]
+    assert all(result is results[0] for result in results)
+
+
+def test_not_found_is_negatively_cached():
+    cache, calls = make_cache([(404, {"error": "missing"})])
+
+    async def scenario():
+        for _ in range(3):
+            with pytest.raises(MeetingNotFound):
+                await cache.get("nope")
+
+    asyncio.run(scenario())
+    assert len(calls) == 1
+    assert cache.stats()["negative_hits"] == 2
+
+
+def test_expired_entry_is_served_stale_while_revalidating():
+    refreshed = dict(MEETING, plan={"sleep": {"baseline": "7h a night", "smartGoals": []}})
+    cache, calls = make_cache([(200, MEETING), (200, refreshed)], ttl_seconds=0, stale_seconds=60)
+
+    async def scenario():
+        first = await cache.get("meeting_1")
+        stale = await cache.get("meeting_1")
+        await asyncio.sleep(0.05)
+        return first, stale, cache.entries.peek("meeting_1").context
+
+    first, stale, latest = asyncio.run(scenario())
+    assert stale is first
+    assert latest["coach_brief"] == ["sleep: 7h a night"]
+    assert len(calls) == 2
+    assert cache.stats()["stale_served"] == 1
+
+
+def test_expired_entry_falls_back_to_the_mirror_without_waiting(tmp_path):
+    cache, calls = make_cache([(200, MEETING)], ttl_seconds=0, stale_seconds=0, mirror=MeetingMirror(tmp_path))
+
+    async def scenario():
+        first = await cache.get("meeting_1")
+        expired = await cache.get("meeting_1")
+        assert len(calls) == 1  # Served from the mirror; the refetch has not even started yet.
+        await asyncio.sleep(0.05)
+        return first, expired
+
+    first, expired = asyncio.run(scenario())
+    assert expired == first
+    assert len(calls) == 2
+    assert cache.stats()["mirror_hits"] == 1
+
+
+def test_fetches_mirror_contexts_but_flush_the_index_once(tmp_path):
+    mirror = MeetingMirror(tmp_path)
+    cache, calls = make_cache([(200, MEETING)], mirror=mirror, mirror_flush_seconds=60)
+    writes = []
+    original_write_json = mirror._write_json
+    mirror._write_json = lambda path, payload: (writes.append(path.name), original_write_json(path, payload))
+
+    async def scenario():
+        await asyncio.gather(*(cache.get(f"meeting_{idx}") for idx in range(3)))
+        await cache.get("meeting_3")
+        assert not mirror.index_path.exists()  # One flush is pending for all four fetches.
+        await cache.close()
+
+    asyncio.run(scenario())
+    assert writes.count("index.json") == 1
+    assert sorted(MeetingMirror(tmp_path).index) == [f"meeting_{idx}" for idx in range(4)]
+
+
+def scribe_stand_in(meetings):
+    app = FastAPI()
+    app.state.detail_requests = []
+
+    @app.get("/api/meetings")
+    def list_meetings():
+        return [{key: meeting[key] for key in ("id", "createdAt", "status")} for meeting in meetings.values()]
+
+    @app.get("/api/meetings/{meeting_id}")
+    def meeting_detail(meeting_id: str):
+        app.state.detail_requests.append(meeting_id)
+        if meeting_id not in meetings:
+            return JSONResponse(status_code=404, content={"error": "not found"})
+        return meetings[meeting_id]
+
+    return app
+
+
+def test_sync_mirrors_new_and_changed_meetings_only(tmp_path):
+    meetings = {
+        f"meeting_{idx}": dict(MEETING, id=f"meeting_{idx}", status="ready") for idx in range(5)
+    }
+    scribe = scribe_stand_in(meetings)
+
+    def make_synced_cache():
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=scribe))
+        return MeetingContextCache("http://scribe.test", client=client, mirror=MeetingMirror(tmp_path))
+
+    first = asyncio.run(sync_meetings(make_synced_cache(), concurrency=2))
+    assert first == {"listed": 5, "fetched": 5, "unchanged": 0, "removed": 0, "failed": []}
+
+    meetings["meeting_1"]["status"] = "updated"
+    del meetings["meeting_4"]
+    cache = make_synced_cache()
+    cache.entries.set("meeting_0", MeetingEntry({"meeting_id": "meeting_0"}, 0.0))
+    second = asyncio.run(sync_meetings(cache, concurrency=2))
+    assert second == {"listed": 4, "fetched": 1, "unchanged": 3, "removed": 1, "failed": []}
+    assert cache.entries.peek("meeting_0").fetched_at > 0.0  # Unchanged meetings count as freshly fetched.
+    assert sorted(scribe.state.detail_requests) == sorted([f"meeting_{idx}" for idx in range(5)] + ["meeting_1"])
+
+    offline = MeetingContextCache("http://unreachable.invalid", mirror=MeetingMirror(tmp_path))
+    context = asyncio.run(offline.get("meeting_2"))
+    assert context["meeting_id"] == "meeting_2"
+    assert offline.stats()["mirror_hits"] == 1
+    assert offline.stats()["fetches"] == 0
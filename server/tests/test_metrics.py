@@ -0,0 +1,54 @@
+from fastapi.testclient import TestClient
+
+from loadtest.fakes import FakeBehavior
+from main import app
+from metrics import COACH_FALLBACKS, LLM_TOKENS, SCHEMA_VALIDATION_FAILURES, STAGE_SECONDS, Histogram
+
+
+client = TestClient(app)
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("demo_seconds", "Demo.", ("stage",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, stage="a")
+    histogram.observe(0.5, stage="a")
+    histogram.observe(5, stage="a")
+    assert histogram.collect() == [
+        'demo_seconds_bucket{stage="a",le="0.1"} 1',
+        'demo_seconds_bucket{stage="a",le="1.0"} 2',
+        'demo_seconds_bucket{stage="a",le="+Inf"} 3',
+        'demo_seconds_sum{stage="a"} 5.55',
+        'demo_seconds_count{stage="a"} 3',
+    ]
+
+
+def test_chat_records_stage_timings_and_fallbacks(fake_openai):
+    fake_openai(FakeBehavior(invalid_json_rate=1.0))
+    fallbacks = COACH_FALLBACKS.value(mode="two_stage")
+    failures = SCHEMA_VALIDATION_FAILURES.value(step="analysis_fixup")
+    fixups = STAGE_SECONDS.count(stage="fixup_llm")
+
+    response = client.post("/chat", json={"user_id": "stressed-sam", "message": "Any tips?"})
+    assert response.status_code == 200
+    assert COACH_FALLBACKS.value(mode="two_stage") == fallbacks + 1
+    assert SCHEMA_VALIDATION_FAILURES.value(step="analysis_fixup") == failures + 1
+    assert STAGE_SECONDS.count(stage="fixup_llm") == fixups + 1
+
+    body = client.get("/metrics").text
+    assert 'http_request_duration_seconds_count{method="POST",route="/chat",status="200"}' in body
+    assert 'pipeline_stage_duration_seconds_count{stage="persona_load"}' in body
+    assert 'llm_tokens_total{call="analysis",kind="prompt"}' in body
+    assert 'cache_hits_total{cache="summaries"}' in body
+
+
+def test_chat_reports_prompt_cache_hits(fake_openai):
+    fake_app = fake_openai()
+    cached = LLM_TOKENS.value(call="analysis", kind="cached")
+
+    for user_id in ("stressed-sam", "active-alex"):
+        response = client.post("/chat", json={"user_id": user_id, "message": "How is my sleep?"})
+        assert response.status_code == 200
+    # Every analysis prompt starts with the same policy, instructions and schema, so the
+    # second user's call is served partly from the prompt cache.
+    assert LLM_TOKENS.value(call="analysis", kind="cached") > cached
+    assert fake_app.state.cached_tokens > 0
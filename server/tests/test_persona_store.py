@@ -0,0 +1,51 @@
+import json
+import os
+
+from persona_store import PersonaStore
+
+
+def write_persona(root, persona_id, steps):
+    path = root / "personas" / f"{persona_id}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"id": persona_id, "data": [{"steps": steps}]}), encoding="utf-8")
+    return path
+
+
+def test_persona_store_caches_and_reloads_on_change(tmp_path):
+    path = write_persona(tmp_path, "alex", 1000)
+    store = PersonaStore(tmp_path, max_personas=2)
+
+    first = store.get("alex")
+    assert store.get("alex") is first
+    assert store.stats()["hits"] == 1
+    assert store.stats()["misses"] == 1
+
+    path.write_text(json.dumps({"id": "alex", "data": [{"steps": 20000}]}), encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    reloaded = store.get("alex")
+    assert reloaded.series.row(0)["steps"] == 20000
+    assert reloaded.version != first.version
+    assert store.stats()["reloads"] == 1
+
+
+def test_persona_data_keeps_non_numeric_fields(tmp_path):
+    path = tmp_path / "personas" / "notes.json"
+    path.parent.mkdir(parents=True)
+    rows = [{"date": "2024-03-01", "steps": 4000, "note": "late dinner"}, {"date": "2024-03-02", "steps": 5200}]
+    path.write_text(json.dumps({"id": "notes", "data": rows}), encoding="utf-8")
+    assert PersonaStore(tmp_path).get("notes").series.to_rows() == rows
+
+
+def test_persona_store_evicts_least_recently_used(tmp_path):
+    for persona_id in ("a", "b", "c"):
+        write_persona(tmp_path, persona_id, 1)
+    store = PersonaStore(tmp_path, max_personas=2)
+    store.get("a")
+    store.get("b")
+    store.get("a")
+    store.get("c")
+    assert "b" not in store.records
+    assert "a" in store.records
+    assert store.get("missing") is None
+    assert store.get("../personas") is None
@@ -0,0 +1,83 @@
+import json
+import logging
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import profiling
+from main import app
+from profiling import ProfileStore
+from stats import compute_stats
+
+
+client = TestClient(app)
+CSV = "date,steps,sleep_hours\n" + "".join(f"2024-01-{day:02d},{4000 + day},7\n" for day in range(1, 29))
+
+
+@pytest.fixture
+def profile_admin(monkeypatch, tmp_path):
+    monkeypatch.setenv("PROFILE_ADMIN_TOKEN", "secret")
+    monkeypatch.setattr(main.PROFILE_STORE, "root", tmp_path)
+    return {"X-Admin-Token": "secret"}
+
+
+def test_profile_flag_is_ignored_without_the_admin_token(monkeypatch, tmp_path):
+    monkeypatch.setattr(main.PROFILE_STORE, "root", tmp_path)
+    monkeypatch.delenv("PROFILE_ADMIN_TOKEN", raising=False)
+    response = client.get("/api/health", headers={"X-Profile": "cprofile"})
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+    monkeypatch.setenv("PROFILE_ADMIN_TOKEN", "secret")
+    for query in ("?profile=cprofile", "?profile=perf"):
+        response = client.get(f"/api/health{query}", headers={"X-Admin-Token": "wrong"})
+        assert response.status_code == 200
+        assert "X-Profile-Id" not in response.headers
+    assert not list(tmp_path.iterdir())
+
+
+def test_cprofile_run_is_stored_with_spans(profile_admin, tmp_path):
+    response = client.post(
+        "/upload",
+        files={"file": ("data.csv", CSV, "text/csv")},
+        headers={**profile_admin, "X-Profile": "cprofile"},
+    )
+    assert response.status_code == 200
+    profile_id = response.headers["X-Profile-Id"]
+    assert (tmp_path / f"{profile_id}.prof").exists()
+
+    profile = client.get(f"/api/profiles/{profile_id}", headers=profile_admin).json()
+    assert profile["mode"] == "cprofile"
+    assert profile["path"] == "/upload"
+    assert "ingest_upload_file" in profile["report"]
+    assert [span["span"] for span in profile["spans"]] == ["ingest.ingest_upload_file"]
+    assert client.get(f"/api/profiles/{profile_id}").status_code == 403
+
+
+def test_sample_mode_and_unknown_modes(profile_admin):
+    response = client.get("/users/active-alex/wearables/summary", headers={**profile_admin, "X-Profile": "sample"})
+    assert response.status_code == 200
+    profile = client.get(f"/api/profiles/{response.headers['X-Profile-Id']}", headers=profile_admin).json()
+    assert profile["mode"] == "sample"
+    assert client.get("/api/health", headers={**profile_admin, "X-Profile": "perf"}).status_code == 400
+
+
+def test_profile_store_keeps_only_recent_profiles(tmp_path):
+    store = ProfileStore(tmp_path, keep=2)
+    for idx in range(3):
+        store.save(f"p{idx}", profiling.RequestProfiler("sample"), {})
+    assert sorted(path.name for path in tmp_path.glob("*.json")) == ["p1.json", "p2.json"]
+    assert store.load("../p1") is None
+
+
+def test_spans_are_logged_when_enabled(monkeypatch, caplog):
+    monkeypatch.setattr(profiling, "TRACE_SPANS", True)
+    with caplog.at_level(logging.INFO, logger="evida.spans"):
+        with profiling.span("outer", persona="alex"):
+            compute_stats([{"steps": 1}], ["steps"])
+    records = [json.loads(record.message) for record in caplog.records]
+    assert [(record["span"], record["parent"]) for record in records] == [
+        ("stats.compute_stats", "outer"),
+        ("outer", None),
+    ]
+    assert records[1]["persona"] == "alex"
@@ -1,4 +1,10 @@
-from llm import build_prompt_bundle
+import json
+import os
+import shutil
+
+import llm
+from llm import build_prompt_bundle, load_prompt_assets, load_prompt_module
+from prompt_packet import ESTIMATE_MARGIN, PROMPT_CACHE_MIN_TOKENS, count_tokens, drop_path, has_tokenizer
 
 
 def test_prompt_bundle_structure():
@@ -14,3 +20,151 @@ def test_prompt_bundle_structure():
     assert bundle.system
     assert bundle.developer
     assert bundle.user == "Test query"
+
+
+def test_prompt_bundle_packet_is_compact_and_sends_schema_once():
+    module = load_prompt_module()
+    wearables_summary = {"window_days": 14, "demographics": {"age": None, "sex": None}, "alerts": [], "notes": ["x"]}
+    coaching_context = {"meeting_id": "m_1", "coach_brief": ["Sleep: 6h"], "goals": [], "plan": {"weekly_actions": []}}
+    bundle = build_prompt_bundle(
+        wearables_summary=wearables_summary,
+        coaching_context=coaching_context,
+        user_query="Why am I tired?",
+        response_schema=module.RESPONSE_SCHEMA,
+    )
+    schema_text = json.dumps(module.RESPONSE_SCHEMA, ensure_ascii=False, separators=(",", ":"))
+    packet = {
+        "wearables_summary": {"window_days": 14, "notes": ["x"]},
+        "coaching_context": {"meeting_id": "m_1", "coach_brief": ["Sleep: 6h"]},
+    }
+    assert bundle.developer == module.DEVELOPER_INSTRUCTIONS.strip() + "\n\nRESPONSE_SCHEMA_JSON:\n" + schema_text
+    assert bundle.context == "CONTEXT_PACKET_JSON:\n" + json.dumps(packet, separators=(",", ":"))
+    assert list(bundle.token_counts) == [
+        "system", "instructions", "response_schema", "user", "wearables_summary", "coaching_context"
+    ]
+    assert bundle.trimmed == []
+
+    single = build_prompt_bundle(
+        wearables_summary=wearables_summary,
+        coaching_context=coaching_context,
+        user_query="Why am I tired?",
+        response_schema=module.RESPONSE_SCHEMA,
+        schema_in_response_format=True,
+    )
+    assert schema_text not in single.developer
+    assert single.token_counts["response_schema"] < bundle.token_counts["response_schema"]
+
+
+def test_prompt_bundle_trims_low_priority_context_to_budget(monkeypatch):
+    module = load_prompt_module()
+    wearables_summary = {
+        "window_days": 14,
+        "generated_at": "2025-12-23T08:00:00Z",
+        "data_quality": {"coverage_pct": 1.0, "device_sources": ["demo"]},
+        "baselines": {"baseline_window_days": 28, "sleep_duration_mean_h": 7.1, "steps_mean": 8200},
+        "aggregates": {"sleep": {"duration_mean_h": 6.4, "duration_std_h": 0.8}},
+        "derived_scores": {"sleep_score": 71},
+    }
+    kwargs = dict(
+        wearables_summary=wearables_summary,
+        coaching_context={**module.COACHING_CONTEXT_JSON, "goals": [{"id": "g0", "target": "Lights out by 23:00"}]},
+        user_query=module.USER_QUERY,
+        response_schema=module.ANALYSIS_SCHEMA,
+    )
+    full = build_prompt_bundle(**kwargs)
+    budget = sum(full.token_counts.values()) - full.token_counts["wearables_summary"] // 2
+    monkeypatch.setenv("PROMPT_TOKEN_BUDGET", str(budget))
+    trimmed = build_prompt_bundle(**kwargs)
+
+    assert trimmed.trimmed and trimmed.trimmed[0] == "wearables_summary.generated_at"
+    assert sum(trimmed.token_counts.values()) <= budget
+    packet = json.loads(trimmed.context.removeprefix("CONTEXT_PACKET_JSON:\n"))
+    assert packet["coaching_context"]["goals"] == [{"id": "g0", "target": "Lights out by 23:00"}]
+    assert "generated_at" not in packet["wearables_summary"]
+    assert packet["wearables_summary"]["derived_scores"] == {"sleep_score": 71}
+
+
+def test_analysis_prompt_prefix_is_identical_across_users():
+    module = load_prompt_module()
+    first = build_prompt_bundle(
+        wearables_summary={"window_days": 14, "derived_scores": {"sleep_score": 71}},
+        coaching_context={"goals": [{"id": "g0", "target": "Walk daily"}]},
+        user_query="How did I sleep?",
+        response_schema=module.ANALYSIS_SCHEMA,
+    )
+    second = build_prompt_bundle(
+        wearables_summary={"window_days": 7},
+        coaching_context={},
+        user_query="Any tips for stress?",
+        response_schema=module.ANALYSIS_SCHEMA,
+    )
+    assert first.messages()[:2] == second.messages()[:2]
+    assert [message["role"] for message in first.messages()] == ["system", "developer", "developer", "user"]
+
+
+
+def test_analysis_prompt_prefix_is_long_enough_to_cache():
+    module = load_prompt_module()
+    bundle = build_prompt_bundle(
+        wearables_summary={"window_days": 14},
+        coaching_context={},
+        user_query="How did I sleep?",
+        response_schema=module.ANALYSIS_SCHEMA,
+    )
+    prefix_tokens = count_tokens(bundle.system) + count_tokens(bundle.developer)
+    margin = 1 if has_tokenizer() else ESTIMATE_MARGIN
+    assert prefix_tokens >= PROMPT_CACHE_MIN_TOKENS * margin
+
+
+def test_coach_step_uses_its_own_short_prompt():
+    module = load_prompt_module()
+    bundle = build_prompt_bundle(
+        wearables_summary={"window_days": 14},
+        coaching_context={},
+        user_query="How did I sleep?",
+        response_schema=module.ANALYSIS_SCHEMA,
+    )
+    coach = llm.coach_messages(bundle, llm.COACH_SYSTEM, {"reasoning_trace": ["Short sleep."]})
+    assert coach[0] == {"role": "system", "content": llm.COACH_SYSTEM}
+    assert "RESPONSE_SCHEMA_JSON" not in coach[1]["content"]
+    assert '{"reasoning_trace":["Short sleep."]}' in coach[1]["content"]
+
+
+def test_prompt_module_is_cached_until_file_changes(tmp_path, monkeypatch):
+    prompt_path = tmp_path / "prompt_example.py"
+    shutil.copy(llm.PROMPT_MODULE_PATH, prompt_path)
+    monkeypatch.setattr(llm, "PROMPT_MODULE_PATH", prompt_path)
+    monkeypatch.setattr(llm, "_PROMPT_ASSETS", None)
+
+    first = load_prompt_assets()
+    assert load_prompt_assets() is first
+    assert llm.serialized_schema(first.module.RESPONSE_SCHEMA) is first.module.SCHEMA_JSON[1][1]
+    assert json.loads(llm.serialized_schema(first.module.RESPONSE_SCHEMA)) == first.module.RESPONSE_SCHEMA
+
+    prompt_path.write_text(prompt_path.read_text(encoding="utf-8") + "\nEDITED = True\n", encoding="utf-8")
+    stat = prompt_path.stat()
+    os.utime(prompt_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    reloaded = load_prompt_assets()
+    assert reloaded is not first
+    assert reloaded.module.EDITED is True
+
+
+def test_trim_paths_step_through_lists():
+    packet = {
+        "coaching_context": {
+            "plan": {
+                "weekly_actions": [
+                    {"id": "a", "action": "Walk", "notes": {"note": "keep"}},
+                    {"id": "b", "action": "Sleep", "notes": "Lights out"},
+                ]
+            }
+        }
+    }
+    assert drop_path(packet, ("coaching_context", "plan", "weekly_actions", "*", "notes"))
+    assert packet["coaching_context"]["plan"]["weekly_actions"] == [
+        {"id": "a", "action": "Walk"},
+        {"id": "b", "action": "Sleep"},
+    ]
+    assert not drop_path(packet, ("coaching_context", "plan", "weekly_actions", "*", "notes"))
+    assert drop_path(packet, ("coaching_context", "plan", "weekly_actions", "*"))
+    assert packet["coaching_context"]["plan"]["weekly_actions"] == []
@@ -0,0 +1,69 @@
+import json
+
+from series import ColumnarSeries
+
+
+ROWS = [
+    {"date": "2024-03-01", "steps": 4000, "sleep_hours": 7.5},
+    {"date": "2024-03-02", "steps": 5200, "sleep_hours": None},
+    {"date": "2024-03-03", "steps": 6100},
+]
+
+
+def test_round_trip_keeps_ints_and_nulls_and_drops_missing_values():
+    series = ColumnarSeries.from_rows(ROWS)
+    assert series.fields == ["steps", "sleep_hours"]
+    assert len(series) == 3
+    assert series.to_rows() == [
+        {"date": "2024-03-01", "steps": 4000, "sleep_hours": 7.5},
+        {"date": "2024-03-02", "steps": 5200, "sleep_hours": None},
+        {"date": "2024-03-03", "steps": 6100},
+    ]
+    assert isinstance(series.row(0)["steps"], int)
+    assert series.values("sleep_hours") == [7.5, None, None]
+    assert series.values("missing") == [None, None, None]
+
+
+def test_slices_are_series_and_nbytes_counts_columns():
+    series = ColumnarSeries.from_rows(ROWS)
+    tail = series[-2:]
+    assert isinstance(tail, ColumnarSeries)
+    assert tail.dates == ["2024-03-02", "2024-03-03"]
+    assert tail.row(0)["steps"] == 5200
+    assert series.nbytes >= 2 * 3 * 8
+
+
+def test_round_trip_serializes_exactly_like_the_input_rows():
+    rows = [
+        {"date": "2024-03-01", "steps": 8, "sleep_hours": 7.0, "hrv": None},
+        {"date": "2024-03-02", "steps": 8.5, "sleep_hours": 6, "hrv": 41},
+        {"date": "2024-03-03", "sleep_hours": 6.5, "hrv": 40.5},
+        {"date": "2024-03-04", "steps": None, "hrv": 42},
+        {"date": "2024-03-05", "steps": 9, "sleep_hours": 7.25, "hrv": 43},
+    ]
+    series = ColumnarSeries.from_rows(rows)
+    assert json.dumps(series.to_rows()) == json.dumps(rows)
+    assert json.dumps(series[1:4].to_rows()) == json.dumps(rows[1:4])
+    assert series.values("steps") == [8, 8.5, None, None, 9]
+
+
+def test_bools_are_not_numbers():
+    rows = [{"date": "2024-03-01", "steps": True, "active": False}, {"date": "2024-03-02", "steps": 5}]
+    series = ColumnarSeries.from_rows(rows)
+    assert series.fields == ["steps"]
+    assert series.values("steps") == [None, 5]
+    assert series.to_rows() == rows
+
+
+def test_non_numeric_fields_are_kept_beside_the_columns():
+    rows = [
+        {"date": "2024-03-01", "steps": 4000, "note": "late dinner"},
+        {"date": "2024-03-02", "steps": 5200, "tags": ["travel"], "device": {"model": "ring", "fw": 3}},
+        {"date": "2024-03-03", "steps": "n/a", "sleep_hours": 6.5},
+    ]
+    series = ColumnarSeries.from_rows(rows)
+    assert series.fields == ["steps", "sleep_hours"]
+    assert series.to_rows() == rows
+    assert series[1:].to_rows() == rows[1:]
+    assert series.values("steps") == [4000, 5200, None]
+    assert ColumnarSeries.from_rows(ROWS).extras is None
@@ -1,4 +1,41 @@
-from stats import compute_stats
+import json
+import random
+from pathlib import Path
+
+import pytest
+
+import stats
+from series import ColumnarSeries
+from stats import ColumnMatrix, WindowIndex, as_columns, compute_stats, mean, np, round_value, std, variance
+
+
+PERSONA_DIR = Path(__file__).resolve().parent.parent / "data" / "personas"
+FIELDS = [
+    "steps",
+    "sleep_hours",
+    "resting_hr",
+    "hrv_rmssd",
+    "stress_index",
+    "calories_burned",
+    "sleep_efficiency",
+    "active_minutes",
+]
+
+
+def reference_stats(series, fields):
+    stats = {}
+    for field in fields:
+        values = [
+            entry.get(field)
+            for entry in series
+            if isinstance(entry, dict) and isinstance(entry.get(field), (int, float))
+        ]
+        stats[field] = {
+            "mean": round_value(mean(values)),
+            "variance": round_value(variance(values)),
+            "std": round_value(std(values)),
+        }
+    return stats
 
 
 def test_compute_stats_mean_std():
@@ -10,3 +47,123 @@ def test_compute_stats_mean_std():
     stats = compute_stats(series, ["steps"])
     assert stats["steps"]["mean"] == 3000
     assert stats["steps"]["std"] is not None
+    assert stats["steps"]["count"] == 3
+    assert stats["steps"]["min"] == 1000
+    assert stats["steps"]["max"] == 5000
+
+
+def test_compute_stats_matches_reference_functions():
+    for path in sorted(PERSONA_DIR.glob("*.json")):
+        series = json.loads(path.read_text(encoding="utf-8"))["data"]
+        for window in (series, series[-7:], series[-14:]):
+            stats = compute_stats(window, FIELDS)
+            expected = reference_stats(window, FIELDS)
+            for field in FIELDS:
+                for key in ("mean", "variance", "std"):
+                    assert stats[field][key] == expected[field][key], (path.name, field, key)
+
+
+def test_compute_stats_skips_missing_and_non_numeric_values():
+    series = [{"steps": 10}, {"steps": None}, {"steps": "12"}, "bad", {}, {"steps": 20}]
+    stats = compute_stats(series, ["steps", "sleep_hours"])
+    assert stats["steps"] == reference_stats(series, ["steps"])["steps"] | {"count": 2, "min": 10, "max": 20}
+    assert stats["sleep_hours"]["mean"] is None
+    assert stats["sleep_hours"]["count"] == 0
+
+
+def test_numpy_backend_matches_python_backend():
+    pytest.importorskip("numpy")
+    series = json.loads((PERSONA_DIR / "stressed-sam.json").read_text(encoding="utf-8"))["data"]
+    series = series + [{"date": "x", "steps": None}, {"steps": "n/a"}]
+    matrix = ColumnMatrix.from_series(series, FIELDS + ["missing"])
+    python_stats = compute_stats(series, FIELDS + ["missing"])
+    for window, rows in ((matrix, series), (matrix[-7:], series[-7:]), (matrix[:0], [])):
+        numpy_stats = window.stats(FIELDS + ["missing"])
+        assert numpy_stats == compute_stats(rows, FIELDS + ["missing"])
+    assert python_stats["missing"]["count"] == 0
+
+
+def random_rows(rng, days):
+    rows = []
+    for day in range(days):
+        entry = {"date": f"2024-01-{day:03d}"}
+        if rng.random() > 0.1:
+            entry["sleep_efficiency"] = round(rng.uniform(0.6, 0.95), rng.choice((2, 3)))
+        if rng.random() > 0.1:
+            entry["sleep_hours"] = round(rng.uniform(4, 9), rng.choice((2, 3)))
+        if rng.random() > 0.1:
+            entry["steps"] = rng.randrange(2000, 15000)
+        if rng.random() > 0.1:
+            entry["resting_hr"] = rng.choice((rng.randrange(50, 70), round(rng.uniform(50, 70), 1)))
+        rows.append(entry)
+    return rows
+
+
+def test_numpy_backend_rounds_exactly_like_python_backend(monkeypatch):
+    pytest.importorskip("numpy")
+    fields = ["sleep_efficiency", "sleep_hours", "steps", "resting_hr"]
+    rng = random.Random(161)
+    for _ in range(200):
+        rows = random_rows(rng, 161)
+        columnar = ColumnarSeries.from_rows(rows)
+        for window_days in (7, 14, 30, 161):
+            window = rows[-window_days:]
+            monkeypatch.setattr(stats, "STATS_BACKEND", "python")
+            expected = compute_stats(window, fields)
+            monkeypatch.setattr(stats, "STATS_BACKEND", "numpy")
+            actual = compute_stats(window, fields)
+            assert actual == expected
+            assert compute_stats(columnar[-window_days:], fields) == expected
+            for field in ("steps", "resting_hr"):
+                assert [type(actual[field][key]) for key in ("min", "max")] == [
+                    type(expected[field][key]) for key in ("min", "max")
+                ]
+
+
+def test_column_matrix_slices_like_the_list_and_rebuilds_for_new_fields(monkeypatch):
+    pytest.importorskip("numpy")
+    monkeypatch.setattr(stats, "STATS_BACKEND", "numpy")
+    series = [{"steps": 10, "sleep_hours": 7.0}, "bad", None, {"steps": 20}, {"steps": 30, "sleep_hours": 6.5}]
+    matrix = ColumnMatrix.from_series(series, ["steps"])
+    assert len(matrix) == len(series)
+    for days in (1, 2, 3, 4):
+        assert matrix[-days:].stats(["steps"]) == compute_stats(series[-days:], ["steps"])
+
+    rebuilt = as_columns(matrix[-3:], ["steps", "sleep_hours"])
+    assert rebuilt.fields == ["steps", "sleep_hours"]
+    assert compute_stats(matrix[-3:], ["sleep_hours"]) == compute_stats(series[-3:], ["sleep_hours"])
+    assert compute_stats(matrix[-3:], ["sleep_hours"])["sleep_hours"]["count"] == 1
+    with pytest.raises(ValueError):
+        as_columns(ColumnMatrix(["steps"], matrix.values), ["sleep_hours"])
+
+
+def test_window_index_matches_compute_stats_for_trailing_windows():
+    series = json.loads((PERSONA_DIR / "active-alex.json").read_text(encoding="utf-8"))["data"]
+    series = series + [{"steps": None, "sleep_hours": "n/a"}]
+    index = WindowIndex(series, FIELDS)
+    for window_days in (None, 0, 1, 7, 14, 30, 90):
+        window = series[-window_days:] if window_days else series
+        expected = compute_stats(window, FIELDS)
+        stats = index.stats(window_days)
+        assert index.window_length(window_days) == len(window)
+        assert stats == expected, window_days
+
+
+def test_window_index_rounds_every_window_exactly_like_compute_stats():
+    for path in sorted(PERSONA_DIR.glob("*.json")):
+        series = json.loads(path.read_text(encoding="utf-8"))["data"]
+        for source in (series, ColumnarSeries.from_rows(series)):
+            index = WindowIndex(source, FIELDS)
+            for window_days in range(1, len(series) + 1):
+                assert index.stats(window_days) == compute_stats(source[-window_days:], FIELDS), (path.name, window_days)
+
+
+def test_columnar_series_matches_row_stats():
+    series = json.loads((PERSONA_DIR / "recovering-riley.json").read_text(encoding="utf-8"))["data"]
+    series = series + [{"date": "x", "steps": None}, {"steps": "n/a"}, {"date": "y", "steps": True, "awakenings": False}]
+    columnar = ColumnarSeries.from_rows(series)
+    for rows, window in ((series, columnar), (series[-7:], columnar[-7:])):
+        assert compute_stats(window, FIELDS + ["missing"]) == compute_stats(rows, FIELDS + ["missing"])
+        if np is not None:
+            matrix_stats = ColumnMatrix.from_columnar(window, FIELDS).stats(FIELDS)
+            assert matrix_stats == ColumnMatrix.from_series(rows, FIELDS).stats(FIELDS)
@@ -0,0 +1,50 @@
+import json
+from pathlib import Path
+
+import summary
+from stats import WindowIndex
+from summary import SUMMARY_FIELDS, SummaryPipeline
+
+
+PERSONA_PATH = Path(__file__).resolve().parent.parent / "data" / "personas" / "stressed-sam.json"
+
+
+def load_series():
+    return json.loads(PERSONA_PATH.read_text(encoding="utf-8"))["data"]
+
+
+def test_pipeline_computes_window_and_baseline_stats_once(monkeypatch):
+    calls = []
+    original = summary.compute_stats
+
+    def counting_compute_stats(series, fields):
+        calls.append(len(series))
+        return original(series, fields)
+
+    monkeypatch.setattr(summary, "compute_stats", counting_compute_stats)
+    series = load_series()
+    payload = SummaryPipeline.from_series(series, 7).build()
+    assert calls == [7, len(series)]
+    assert payload["window_days"] == 7
+    assert payload["baselines"]["baseline_window_days"] == len(series)
+    assert payload["derived_scores"]["sleep_score_0_100"] is not None
+
+
+def test_index_and_series_pipelines_build_the_same_payload_shape():
+    series = load_series()
+    from_series = SummaryPipeline.from_series(series, 14).build()
+    from_index = SummaryPipeline.from_index(WindowIndex(series, SUMMARY_FIELDS), 14).build()
+    assert from_series.keys() == from_index.keys()
+    assert from_series["aggregates"].keys() == from_index["aggregates"].keys()
+    assert from_series["data_quality"] == from_index["data_quality"]
+    assert from_series["baselines"]["baseline_window_days"] == from_index["baselines"]["baseline_window_days"]
+
+
+def test_index_and_series_pipelines_build_identical_payloads():
+    series = load_series()
+    for window_days in (7, 14, 30, 90):
+        from_series = SummaryPipeline.from_series(series, window_days).build()
+        from_index = SummaryPipeline.from_index(WindowIndex(series, SUMMARY_FIELDS), window_days).build()
+        from_series.pop("generated_at")
+        from_index.pop("generated_at")
+        assert from_series == from_index, window_days
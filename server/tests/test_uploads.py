@@ -0,0 +1,77 @@
+import json
+
+from fastapi.testclient import TestClient
+
+import cache
+from ingest import normalize_upload_data
+from main import UPLOAD_STORE, app, build_wearables_summary_from_series
+from series import ColumnarSeries
+from uploads import UploadStore
+
+
+client = TestClient(app)
+
+ROWS = [{"date": f"2024-02-{day:02d}", "steps": 5000 + day * 100, "sleep_hours": 7} for day in range(1, 29)]
+
+
+def test_upload_is_stored_and_summarized_by_id():
+    response = client.post("/upload", files={"file": ("data.json", json.dumps({"data": ROWS}), "application/json")})
+    assert response.status_code == 200
+    upload_id = response.json()["upload_id"]
+
+    dataset = UPLOAD_STORE.get(upload_id)
+    assert dataset.series.to_rows() == normalize_upload_data(ROWS)
+    page = client.get(f"/uploads/{upload_id}/data", params={"offset": 10, "limit": 5}).json()
+    assert page["total"] == len(ROWS)
+    assert page["data"] == normalize_upload_data(ROWS)[10:15]
+
+    summary = client.get(f"/uploads/{upload_id}/summary", params={"window_days": 7}).json()
+    expected = build_wearables_summary_from_series(normalize_upload_data(ROWS), 7)
+    summary.pop("generated_at"), expected.pop("generated_at")
+    assert summary == expected
+
+    assert client.delete(f"/uploads/{upload_id}").status_code == 200
+    assert client.get(f"/uploads/{upload_id}/summary").status_code == 404
+
+
+def test_chat_with_unknown_upload_id():
+    response = client.post("/chat", json={"query": "How am I doing?", "upload_id": "missing"})
+    assert response.status_code == 404
+
+
+def test_store_evicts_oldest_when_over_byte_budget():
+    rows = ColumnarSeries.from_rows(normalize_upload_data(ROWS))
+    probe = UploadStore(max_bytes=10**9)
+    size = probe.add(rows, {}).nbytes
+    store = UploadStore(max_bytes=size * 2 + size // 2)
+
+    first = store.add(rows, {})
+    second = store.add(rows, {})
+    third = store.add(rows, {})
+    assert store.get(first.upload_id) is None
+    assert store.get(second.upload_id) is second
+    assert store.get(third.upload_id) is third
+    assert store.stats()["weight"] == size * 2
+
+
+def test_reads_renew_the_ttl_without_reweighing_and_adds_purge_expired(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    rows = ColumnarSeries.from_rows(normalize_upload_data(ROWS))
+    store = UploadStore(max_bytes=10**9, ttl_seconds=60)
+    weighed = []
+    weigh = store.datasets.weigh
+    store.datasets.weigh = lambda dataset: weighed.append(dataset) or weigh(dataset)
+
+    kept = store.add(rows, {})
+    idle = store.add(rows, {})
+    now[0] += 50
+    assert store.get(kept.upload_id) is kept
+    now[0] += 50
+    assert len(store.datasets) == 2
+    store.add(rows, {})
+    assert len(store.datasets) == 2
+    assert idle.upload_id not in store.datasets
+    assert store.get(kept.upload_id) is kept
+    assert len(weighed) == 3
+    assert store.stats()["weight"] == kept.nbytes * 2
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import uuid
+from typing import Any
+
+from cache import LRUCache
+from ingest import UploadTooLarge
+from series import ColumnarSeries
+
+
+class UploadedDataset:
+    """One stored upload: its normalized series and the summary computed while ingesting it."""
+
+    __slots__ = ("upload_id", "series", "summary")
+
+    def __init__(self, upload_id: str, series: ColumnarSeries, summary: dict[str, Any]):
+        self.upload_id = upload_id
+        self.series = series
+        self.summary = summary
+
+    def __len__(self) -> int:
+        return len(self.series)
+
+    @property
+    def nbytes(self) -> int:
+        return self.series.nbytes
+
+
+class UploadStore:
+    """Uploaded datasets keyed by upload id, bounded by count, idle TTL and a shared byte budget."""
+
+    def __init__(self, max_bytes: int, max_entries: int = 256, ttl_seconds: float | None = 3600):
+        self.max_bytes = max_bytes
+        self.datasets = LRUCache(
+            max_entries,
+            ttl_seconds=ttl_seconds,
+            name="uploads",
+            max_weight=max_bytes,
+            weigh=lambda dataset: dataset.nbytes,
+        )
+
+    def add(self, series: ColumnarSeries, summary: dict[str, Any]) -> UploadedDataset:
+        dataset = UploadedDataset(uuid.uuid4().hex, series, summary)
+        if dataset.nbytes > self.max_bytes:
+            raise UploadTooLarge("Upload exceeds the upload store memory budget.")
+        # Expired uploads still count against the byte budget until purged; drop them before evicting live ones.
+        self.datasets.purge_expired()
+        self.datasets.set(dataset.upload_id, dataset)
+        return dataset
+
+    def get(self, upload_id: str) -> UploadedDataset | None:
+        dataset = self.datasets.get(upload_id)
+        if dataset is not None:
+            # Reading an upload renews its idle TTL.
+            self.datasets.touch(upload_id)
+        return dataset
+
+    def remove(self, upload_id: str) -> bool:
+        return self.datasets.pop(upload_id) is not None
+
+    def stats(self) -> dict[str, Any]:
+        return self.datasets.stats()